@@ -0,0 +1,281 @@
+import bisect
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from bot.misc import EnvKeys
+
+
+class CatalogCache:
+    """Versioned in-memory LRU cache for catalog reads.
+
+    Entries are keyed by function and arguments. Every catalog write calls
+    ``invalidate``, which bumps ``version`` and drops all entries; a result
+    computed while a write was in progress is not stored.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        with self.__lock:
+            self.version += 1
+            self.__entries.clear()
+
+    def stats(self) -> dict:
+        with self.__lock:
+            return {'version': self.version, 'size': len(self.__entries), 'max_size': self.max_size,
+                    'hits': self.hits, 'misses': self.misses}
+
+    def cached(self, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (func.__name__, args, tuple(sorted(kwargs.items())))
+            with self.__lock:
+                if key in self.__entries:
+                    self.hits += 1
+                    self.__entries.move_to_end(key)
+                    return self.__entries[key]
+                self.misses += 1
+                version = self.version
+            result = func(*args, **kwargs)
+            with self.__lock:
+                if version == self.version:
+                    self.__entries[key] = result
+                    if len(self.__entries) > self.max_size:
+                        self.__entries.popitem(last=False)
+            return result
+
+        return wrapper
+
+
+class CategoryTree:
+    """In-memory adjacency index of the ``categories`` table.
+
+    It is filled from the database on first use (see ``load``) and then kept in
+    sync by the category write paths after they commit, so parent, children and
+    ancestor lookups never touch SQLite. Updates before the first load are
+    ignored. Children are kept sorted by name.
+    """
+
+    def __init__(self):
+        self.__parents: dict[str, str | None] = {}
+        self.__children: dict[str | None, list[str]] = {}
+        self.__loaded = False
+        self.__lock = threading.RLock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.__loaded
+
+    def load(self, rows) -> None:
+        """Replace the index with ``(name, parent_name)`` rows."""
+        with self.__lock:
+            self.__parents.clear()
+            self.__children.clear()
+            for name, parent in rows:
+                self.__parents[name] = parent
+                self.__children.setdefault(parent, []).append(name)
+            for children in self.__children.values():
+                children.sort()
+            self.__loaded = True
+
+    def add(self, name: str, parent: str | None = None) -> None:
+        with self.__lock:
+            if not self.__loaded or name in self.__parents:
+                return
+            self.__parents[name] = parent
+            bisect.insort(self.__children.setdefault(parent, []), name)
+
+    def rename(self, name: str, new_name: str) -> None:
+        with self.__lock:
+            if name not in self.__parents:
+                return
+            parent = self.__parents.pop(name)
+            self.__parents[new_name] = parent
+            siblings = self.__children[parent]
+            siblings.remove(name)
+            bisect.insort(siblings, new_name)
+            children = self.__children.pop(name, [])
+            for child in children:
+                self.__parents[child] = new_name
+            if children:
+                self.__children[new_name] = children
+
+    def remove(self, name: str) -> list[str]:
+        """Drop ``name`` with its whole subtree and return the removed names."""
+        with self.__lock:
+            if name not in self.__parents:
+                return []
+            removed = self.descendants(name)
+            self.__children[self.__parents[name]].remove(name)
+            for category in removed:
+                del self.__parents[category]
+                self.__children.pop(category, None)
+            return removed
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__parents
+
+    def parent(self, name: str) -> str | None:
+        return self.__parents.get(name)
+
+    def children(self, name: str | None = None) -> list[str]:
+        """Return the subcategories of ``name``, or the root categories for ``None``."""
+        with self.__lock:
+            return list(self.__children.get(name, ()))
+
+    def children_page(self, name: str | None, offset: int, limit: int) -> tuple[list[str], int]:
+        """Return ``limit`` subcategories of ``name`` from ``offset`` and their total number."""
+        with self.__lock:
+            children = self.__children.get(name, ())
+            return list(children[offset:offset + limit]), len(children)
+
+    def ancestors(self, name: str) -> list[str]:
+        """Return the parents of ``name`` from the nearest up to the root."""
+        result = []
+        with self.__lock:
+            parent = self.__parents.get(name)
+            while parent is not None:
+                result.append(parent)
+                parent = self.__parents.get(parent)
+        return result
+
+    def descendants(self, name: str) -> list[str]:
+        """Return ``name`` followed by every category below it."""
+        with self.__lock:
+            result = [name]
+            for category in result:
+                result.extend(self.__children.get(category, ()))
+            return result
+
+
+class PermissionCache:
+    """Role permissions joined to a bounded per-user role cache.
+
+    The ``roles`` table has a handful of rows and is loaded whole; user to role
+    assignments are remembered in an LRU of ``max_users`` entries. ``set_role``
+    forgets the user and ``Role.insert_roles`` drops the loaded roles.
+    """
+
+    def __init__(self, max_users: int = 4096):
+        self.max_users = max_users
+        self.__roles: dict[int, int] | None = None
+        self.__users = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def permissions(self, telegram_id: int | str, load_role_id, load_roles) -> int:
+        """Return the permission mask of ``telegram_id``.
+
+        ``load_role_id(telegram_id)`` and ``load_roles()`` are called on a miss;
+        the latter returns ``(role_id, permissions)`` rows. Ids are keyed as ``int``,
+        so handlers passing ids taken from callback data share the entry.
+        """
+        telegram_id = int(telegram_id)
+        with self.__lock:
+            role_id = self.__users.get(telegram_id)
+            if role_id is not None:
+                self.__users.move_to_end(telegram_id)
+            roles = self.__roles
+        if role_id is None:
+            role_id = load_role_id(telegram_id)
+            with self.__lock:
+                self.__users[telegram_id] = role_id
+                if len(self.__users) > self.max_users:
+                    self.__users.popitem(last=False)
+        if roles is None:
+            roles = dict(load_roles())
+            with self.__lock:
+                self.__roles = roles
+        return roles.get(role_id) or 0
+
+    def forget_user(self, telegram_id: int | str) -> None:
+        with self.__lock:
+            self.__users.pop(int(telegram_id), None)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__roles = None
+            self.__users.clear()
+
+    def invalidate_roles(self) -> None:
+        with self.__lock:
+            self.__roles = None
+
+
+def value_digest(value: str) -> bytes:
+    """Return the SHA-256 digest under which ``value`` is kept in ``value_hashes``."""
+    return hashlib.sha256(value.encode('utf-8')).digest()
+
+
+class ValueFilter:
+    """Bloom filter in front of the ``value_hashes`` table.
+
+    A negative answer is certain, so values that were never stocked or sold skip
+    the database lookup; a positive one has to be confirmed there. Digests are
+    never removed, so deleted stock only costs an extra lookup. The bit array is
+    sized for ``capacity`` digests at about 1% false positives and ``full`` tells
+    the loader to rebuild it bigger.
+    """
+
+    HASHES = 7
+    BITS_PER_DIGEST = 10
+
+    def __init__(self):
+        self.capacity = 0
+        self.count = 0
+        self.__size = 0
+        self.__bits = bytearray()
+        self.__lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.__size > 0
+
+    @property
+    def full(self) -> bool:
+        return self.count > self.capacity
+
+    def load(self, digests, capacity: int) -> None:
+        """Replace the filter with ``digests`` sized for ``capacity`` entries."""
+        capacity = max(capacity, 1 << 16)
+        size = capacity * self.BITS_PER_DIGEST
+        bits = bytearray((size + 7) // 8)
+        count = 0
+        for digest in digests:
+            for index in self.__indexes(digest, size):
+                bits[index >> 3] |= 1 << (index & 7)
+            count += 1
+        with self.__lock:
+            self.capacity, self.count, self.__size, self.__bits = capacity, count, size, bits
+
+    def add(self, digest: bytes) -> None:
+        with self.__lock:
+            if not self.__size:
+                return
+            for index in self.__indexes(digest, self.__size):
+                self.__bits[index >> 3] |= 1 << (index & 7)
+            self.count += 1
+
+    def __contains__(self, digest: bytes) -> bool:
+        with self.__lock:
+            if not self.__size:
+                return True
+            return all(self.__bits[index >> 3] & (1 << (index & 7))
+                       for index in self.__indexes(digest, self.__size))
+
+    @classmethod
+    def __indexes(cls, digest: bytes, size: int):
+        return (int.from_bytes(digest[i * 4:i * 4 + 4], 'little') % size for i in range(cls.HASHES))
+
+
+catalog_cache = CatalogCache(EnvKeys.CATALOG_CACHE_SIZE)
+permission_cache = PermissionCache()
+category_tree = CategoryTree()
+value_filter = ValueFilter()
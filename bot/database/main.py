@@ -1,18 +1,70 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
 from typing import Final
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.pool import StaticPool
 
-from bot.misc import SingletonMeta
+from bot.misc import SingletonMeta, EnvKeys
+
+# PRAGMAs applied to every new SQLite connection, selected with SQLITE_PROFILE
+SQLITE_PROFILES: Final = {
+    # SQLite defaults: rollback journal, every commit fsynced, writers block readers
+    'default': {},
+    # WAL lets statistics reads and IPN writes proceed while a purchase commits
+    'performance': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'mmap_size': 268435456,
+        'cache_size': -65536,
+        'temp_store': 'MEMORY',
+    },
+}
+
+
+def engine_options(url: str) -> dict:
+    """Return ``create_engine`` pool arguments suitable for ``url``."""
+    url = make_url(url)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        # an in-memory database lives inside one connection, so every thread must share it
+        return {'poolclass': StaticPool, 'connect_args': {'check_same_thread': False}}
+    return {
+        'pool_size': EnvKeys.DB_POOL_SIZE,
+        'max_overflow': EnvKeys.DB_MAX_OVERFLOW,
+        'pool_recycle': EnvKeys.DB_POOL_RECYCLE,
+        'pool_pre_ping': EnvKeys.DB_POOL_PRE_PING,
+    }
+
+
+def apply_sqlite_profile(engine, profile: str) -> None:
+    """Run the PRAGMAs of ``profile`` on each connection ``engine`` opens."""
+    pragmas = SQLITE_PROFILES[profile]
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
 
 
 class Database(metaclass=SingletonMeta):
     BASE: Final = declarative_base()
 
     def __init__(self):
-        self.__engine = create_engine(f'sqlite:///database.db')
-        session = sessionmaker(bind=self.__engine)
-        self.__session = session()
+        self.__engine = create_engine(EnvKeys.DATABASE_URL, **engine_options(EnvKeys.DATABASE_URL))
+        apply_sqlite_profile(self.__engine, EnvKeys.SQLITE_PROFILE)
+        # one session per thread; it lives only for a single unit of work (see session_scope)
+        self.__session = scoped_session(sessionmaker(bind=self.__engine))
+        # database calls made from the event loop are executed on these threads,
+        # so SQLite I/O never blocks other updates
+        self.__executor = ThreadPoolExecutor(max_workers=EnvKeys.DB_POOL_SIZE, thread_name_prefix='database')
 
     @property
     def session(self):
@@ -21,3 +73,24 @@ class Database(metaclass=SingletonMeta):
     @property
     def engine(self):
         return self.__engine
+
+    def remove_session(self) -> None:
+        """Close the current thread's session and drop its identity map."""
+        self.__session.remove()
+
+    @contextmanager
+    def session_scope(self):
+        """Unit of work: the current thread's session is closed when the block exits."""
+        try:
+            yield self.__session()
+        finally:
+            self.remove_session()
+
+    def __run_unit(self, func, *args, **kwargs):
+        with self.session_scope():
+            return func(*args, **kwargs)
+
+    async def run(self, func, *args, **kwargs):
+        """Run blocking ``func`` as one unit of work on a database thread and await its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.__executor, partial(self.__run_unit, func, *args, **kwargs))
@@ -0,0 +1,105 @@
+"""Awaitable counterparts of the database methods.
+
+Every function here runs its synchronous twin through ``Database().run`` so that
+handlers yield to the event loop while SQLite does the work.
+"""
+import datetime
+from functools import wraps
+
+from bot.database.main import Database
+from bot.database.methods import create, read, update, delete, purchase
+from bot.utils.files import item_lock
+
+
+def _to_async(func):
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await Database().run(func, *args, **kwargs)
+    return wrapper
+
+
+create_user = _to_async(create.create_user)
+create_item = _to_async(create.create_item)
+add_values_to_item = _to_async(create.add_values_to_item)
+add_values_to_item_bulk = _to_async(create.add_values_to_item_bulk)
+create_category = _to_async(create.create_category)
+create_operation = _to_async(create.create_operation)
+start_operation = _to_async(create.start_operation)
+add_bought_item = _to_async(create.add_bought_item)
+
+check_user = _to_async(read.check_user)
+get_user_context = _to_async(read.get_user_context)
+check_role = _to_async(read.check_role)
+check_role_name_by_id = _to_async(read.check_role_name_by_id)
+select_max_role_id = _to_async(read.select_max_role_id)
+select_today_users = _to_async(read.select_today_users)
+get_user_count = _to_async(read.get_user_count)
+select_admins = _to_async(read.select_admins)
+get_all_users = _to_async(read.get_all_users)
+get_all_categories = _to_async(read.get_all_categories)
+get_subcategories = _to_async(read.get_subcategories)
+get_category_parent = _to_async(read.get_category_parent)
+get_all_items = _to_async(read.get_all_items)
+get_categories_page = _to_async(read.get_categories_page)
+get_subcategories_page = _to_async(read.get_subcategories_page)
+get_items_page = _to_async(read.get_items_page)
+count_items = _to_async(read.count_items)
+get_category_availability = _to_async(read.get_category_availability)
+get_bought_item_info = _to_async(read.get_bought_item_info)
+get_item_info = _to_async(read.get_item_info)
+get_user_balance = _to_async(read.get_user_balance)
+get_user_language = _to_async(read.get_user_language)
+get_all_admins = _to_async(read.get_all_admins)
+check_item = _to_async(read.check_item)
+check_category = _to_async(read.check_category)
+get_item_value = _to_async(read.get_item_value)
+select_item_values_amount = _to_async(read.select_item_values_amount)
+check_value = _to_async(read.check_value)
+select_user_items = _to_async(read.select_user_items)
+select_bought_items = _to_async(read.select_bought_items)
+select_bought_items_page = _to_async(read.select_bought_items_page)
+select_bought_item = _to_async(read.select_bought_item)
+get_basket = _to_async(read.get_basket)
+bought_items_list = _to_async(read.bought_items_list)
+select_all_users = _to_async(read.select_all_users)
+get_dashboard_stats = _to_async(read.get_dashboard_stats)
+select_count_items = _to_async(read.select_count_items)
+select_count_goods = _to_async(read.select_count_goods)
+select_count_categories = _to_async(read.select_count_categories)
+select_count_bought_items = _to_async(read.select_count_bought_items)
+select_today_orders = _to_async(read.select_today_orders)
+select_all_orders = _to_async(read.select_all_orders)
+select_today_operations = _to_async(read.select_today_operations)
+select_all_operations = _to_async(read.select_all_operations)
+select_users_balance = _to_async(read.select_users_balance)
+select_user_operations = _to_async(read.select_user_operations)
+select_unfinished_operations = _to_async(read.select_unfinished_operations)
+get_unfinished_operation = _to_async(read.get_unfinished_operation)
+check_user_referrals = _to_async(read.check_user_referrals)
+get_user_referral = _to_async(read.get_user_referral)
+
+set_role = _to_async(update.set_role)
+update_balance = _to_async(update.update_balance)
+update_user_language = _to_async(update.update_user_language)
+buy_item_for_balance = _to_async(update.buy_item_for_balance)
+update_item = _to_async(update.update_item)
+update_category = _to_async(update.update_category)
+rebuild_stock_counters = _to_async(update.rebuild_stock_counters)
+rebuild_daily_stats = _to_async(update.rebuild_daily_stats)
+
+delete_item = _to_async(delete.delete_item)
+delete_only_items = _to_async(delete.delete_only_items)
+delete_category = _to_async(delete.delete_category)
+finish_operation = _to_async(delete.finish_operation)
+buy_item = _to_async(delete.buy_item)
+reserve_item = _to_async(purchase.reserve_item)
+checkout_reservations = _to_async(purchase.checkout_reservations)
+release_reservations = _to_async(purchase.release_reservations)
+expire_reservations = _to_async(purchase.expire_reservations)
+
+
+async def purchase_item(telegram_id: int, item_name: str, price: int,
+                        bought_time: datetime.datetime) -> tuple[int, str] | None:
+    """Sell ``item_name`` with concurrent sales of the same item queued on the event loop."""
+    async with item_lock(item_name):
+        return await Database().run(purchase.purchase_item, telegram_id, item_name, price, bought_time)
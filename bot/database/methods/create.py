@@ -1,25 +1,57 @@
+import datetime
+import tempfile
+from itertools import islice
+from typing import Callable, Iterable, NamedTuple
+
+import sqlalchemy
 import sqlalchemy.exc
+from sqlalchemy.dialects import postgresql, sqlite
 import random
 from bot.database.models import User, ItemValues, Goods, Categories, BoughtGoods, \
-    Operations, UnfinishedOperations
+    Operations, UnfinishedOperations, DailyStats, ValueHashes
 from bot.database import Database
+from bot.database.cache import catalog_cache, category_tree, value_digest
+from bot.database.methods.read import get_value_filter, known_digests
+from bot.utils.files import append_lines_to_file
+
+
+def dialect_insert(table):
+    """Return an INSERT for ``table`` that supports ``ON CONFLICT`` on the configured database."""
+    if Database().engine.dialect.name == 'postgresql':
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+def insert_ignore(table) -> sqlalchemy.Insert:
+    """Return an ``INSERT ... ON CONFLICT DO NOTHING`` for ``table`` on the configured database."""
+    return dialect_insert(table).on_conflict_do_nothing()
+
+
+def record_daily_stats(day: datetime.date, **deltas: int) -> None:
+    """Add ``deltas`` (``users``, ``orders``, ``revenue``, ``top_ups``) to the rollup row of ``day``.
 
+    Runs in the caller's transaction and does not commit.
+    """
+    table = DailyStats.__table__
+    statement = dialect_insert(table).values(day=day, **deltas)
+    Database().session.execute(statement.on_conflict_do_update(
+        index_elements=[table.c.day],
+        set_={name: table.c[name] + statement.excluded[name] for name in deltas}))
 
-def create_user(telegram_id: int, registration_date, referral_id, role: int = 1, language: str | None = None) -> None:
+
+def create_user(telegram_id: int, registration_date: datetime.datetime, referral_id, role: int = 1,
+                language: str | None = None) -> None:
+    """Register a user unless it already exists, in one statement."""
     session = Database().session
-    try:
-        session.query(User.telegram_id).filter(User.telegram_id == telegram_id).one()
-    except sqlalchemy.exc.NoResultFound:
-        if referral_id != '':
-            session.add(
-                User(telegram_id=telegram_id, role_id=role, registration_date=registration_date,
-                     referral_id=referral_id, language=language))
-            session.commit()
-        else:
-            session.add(
-                User(telegram_id=telegram_id, role_id=role, registration_date=registration_date,
-                     referral_id=None, language=language))
-            session.commit()
+    inserted = session.execute(insert_ignore(User.__table__).values(
+        telegram_id=telegram_id, role_id=role, balance=0, registration_date=registration_date,
+        referral_id=referral_id or None, language=language)).rowcount
+    if inserted:
+        record_daily_stats(registration_date.date(), users=1)
+        if referral_id:
+            session.query(User).filter(User.telegram_id == referral_id).update(
+                values={User.referral_count: User.referral_count + 1}, synchronize_session=False)
+    session.commit()
 
 
 def create_item(item_name: str, item_description: str, item_price: int, category_name: str) -> None:
@@ -27,17 +59,128 @@ def create_item(item_name: str, item_description: str, item_price: int, category
     session.add(
         Goods(name=item_name, description=item_description, price=item_price, category_name=category_name))
     session.commit()
+    catalog_cache.invalidate()
+
+
+class UploadResult(NamedTuple):
+    stored: int
+    duplicates: int
+
+
+def register_values(values: list[str]) -> list[str]:
+    """Record the digests of ``values`` in ``value_hashes`` and return the values that were new.
+
+    ``values`` already in stock or sold, and repeats within ``values``, are left
+    out. The Bloom filter answers for most new values; the others are checked
+    against the table, and ``ON CONFLICT DO NOTHING ... RETURNING`` keeps a value
+    a concurrent upload registered first from slipping through. Runs in the
+    caller's transaction and does not commit.
+    """
+    digests = {}
+    for value in values:
+        digests.setdefault(value_digest(value), value)
+    value_filter = get_value_filter()
+    known = known_digests([digest for digest in digests if digest in value_filter])
+    fresh = [{'digest': digest} for digest in digests if digest not in known]
+    if not fresh:
+        return []
+    inserted = Database().session.execute(
+        insert_ignore(ValueHashes.__table__).returning(ValueHashes.digest), fresh).scalars().all()
+    for digest in inserted:
+        value_filter.add(digest)
+    return [digests[digest] for digest in inserted]
 
 
-def add_values_to_item(item_name: str, value: str, is_infinity: bool) -> None:
+def register_sold_values(values: list[str]) -> None:
+    """Record the digests of sold ``values`` so they cannot be uploaded again.
+
+    Values uploaded before ``value_hashes`` existed were never registered, so
+    every sale records its value; a digest already known is left alone. Runs in
+    the caller's transaction and does not commit.
+    """
+    digests = {value_digest(value) for value in values}
+    if not digests:
+        return
+    Database().session.execute(insert_ignore(ValueHashes.__table__), [{'digest': digest} for digest in digests])
+    value_filter = get_value_filter()
+    for digest in digests:
+        value_filter.add(digest)
+
+
+def add_values_to_item(item_name: str, value: str, is_infinity: bool) -> bool:
+    """Store one value of ``item_name``; a finite value already stocked or sold is skipped.
+
+    Returns whether the value was stored.
+    """
     session = Database().session
     if is_infinity is False:
+        if not register_values([value]):
+            return False
         session.add(
             ItemValues(name=item_name, value=value, is_infinity=False))
     else:
         session.add(
             ItemValues(name=item_name, value=value, is_infinity=True))
+    _add_stock(item_name, 1, is_infinity)
     session.commit()
+    if is_infinity is False:
+        append_lines_to_file(item_name, [value])
+    else:
+        catalog_cache.invalidate()
+    return True
+
+
+def _add_stock(item_name: str, amount: int, is_infinity: bool) -> None:
+    """Update the stock counters of ``item_name`` in the current transaction.
+
+    Marking an item infinite changes the cached ``get_item_info``; the caller
+    invalidates ``catalog_cache`` once the transaction is committed.
+    """
+    if is_infinity:
+        values = {Goods.is_infinite: True}
+    else:
+        values = {Goods.stock_count: Goods.stock_count + amount}
+    Database().session.query(Goods).filter(Goods.name == item_name).update(values=values,
+                                                                         synchronize_session=False)
+
+
+def add_values_to_item_bulk(item_name: str, values: Iterable[str], is_infinity: bool = False,
+                            progress: Callable[[int], None] | None = None,
+                            chunk_size: int = 5000) -> UploadResult:
+    """Store all ``values`` of ``item_name`` in a single transaction.
+
+    Values are streamed into executemany INSERTs of ``chunk_size`` rows, so the
+    whole upload costs one commit. Finite values already in stock, already sold
+    or repeated in the upload are skipped (see ``register_values``). ``progress``
+    is called with the number of processed values after every chunk. Finite
+    values are staged in a temporary file and appended to the item's lines file
+    once the transaction is committed.
+    """
+    session = Database().session
+    statement = sqlalchemy.insert(ItemValues.__table__)
+    values = iter(values)
+    processed = stored = 0
+    with tempfile.TemporaryFile() as staged:
+        while chunk := list(islice(values, chunk_size)):
+            processed += len(chunk)
+            if not is_infinity:
+                chunk = register_values(chunk)
+            if chunk:
+                session.execute(statement, [{'item_name': item_name, 'value': value, 'is_infinity': is_infinity}
+                                            for value in chunk])
+            if not is_infinity:
+                staged.write("".join(f"{value}\n" for value in chunk).encode("utf-8"))
+            stored += len(chunk)
+            if progress:
+                progress(processed)
+        _add_stock(item_name, stored, is_infinity)
+        session.commit()
+        if is_infinity:
+            catalog_cache.invalidate()
+        if not is_infinity and stored:
+            staged.seek(0)
+            append_lines_to_file(item_name, (line.decode("utf-8").rstrip("\n") for line in staged))
+    return UploadResult(stored, processed - stored)
 
 
 def create_category(category_name: str, parent: str | None = None) -> None:
@@ -45,12 +188,17 @@ def create_category(category_name: str, parent: str | None = None) -> None:
     session.add(
         Categories(name=category_name, parent_name=parent))
     session.commit()
+    catalog_cache.invalidate()
+    category_tree.add(category_name, parent)
 
 
-def create_operation(user_id: int, value: int, operation_time: str) -> None:
+def create_operation(user_id: int, value: int, operation_time: datetime.datetime) -> None:
     session = Database().session
     session.add(
         Operations(user_id=user_id, operation_value=value, operation_time=operation_time))
+    session.query(User).filter(User.telegram_id == user_id).update(
+        values={User.total_topped_up: User.total_topped_up + value}, synchronize_session=False)
+    record_daily_stats(operation_time.date(), top_ups=value)
     session.commit()
 
 
@@ -62,9 +210,14 @@ def start_operation(user_id: int, value: int, operation_id: str, message_id: int
 
 
 def add_bought_item(item_name: str, value: str, price: int, buyer_id: int,
-                    bought_time: str) -> None:
+                    bought_time: datetime.datetime) -> None:
     session = Database().session
     session.add(
         BoughtGoods(name=item_name, value=value, price=price, buyer_id=buyer_id, bought_datetime=bought_time,
                     unique_id=str(random.randint(1000000000, 9999999999))))
+    if not session.query(Goods.is_infinite).filter(Goods.name == item_name).scalar():
+        register_sold_values([value])
+    session.query(User).filter(User.telegram_id == buyer_id).update(
+        values={User.purchases_count: User.purchases_count + 1}, synchronize_session=False)
+    record_daily_stats(bought_time.date(), orders=1, revenue=price)
     session.commit()
@@ -1,50 +1,90 @@
 import os
-from bot.utils.files import sanitize_name
-from bot.database.models import Database, Goods, ItemValues, Categories, UnfinishedOperations
+
+from sqlalchemy import select
+
+from bot.utils.files import UPLOADS_ROOT, item_upload_folder, remove_lines_file, remove_upload_folder
+from bot.database.cache import catalog_cache, category_tree, value_digest
+from bot.database.methods.read import category_subtree
+from bot.database.models import Database, Goods, ItemValues, Categories, UnfinishedOperations, ValueHashes
+
+
+def forget_values(values: list[str], batch_size: int = 500) -> None:
+    """Drop the digests of deleted, unsold ``values`` so they can be uploaded again.
+
+    Runs in the caller's transaction and does not commit.
+    """
+    digests = list({value_digest(value) for value in values})
+    for start in range(0, len(digests), batch_size):
+        Database().session.query(ValueHashes).filter(
+            ValueHashes.digest.in_(digests[start:start + batch_size])).delete(synchronize_session=False)
+
+
+def stocked_values(*criteria) -> tuple[list[str], list[str]]:
+    """Return all values of the matching ``item_values`` rows and the finite ones among them."""
+    values, finite = [], []
+    for value, is_infinity in Database().session.query(ItemValues.value, ItemValues.is_infinity).filter(*criteria):
+        values.append(value)
+        if not is_infinity:
+            finite.append(value)
+    return values, finite
+
+
+def cleanup_uploads(item_names: list[str], values: list[str]) -> None:
+    """Remove the upload folders and lines files of ``item_names``.
+
+    Each upload folder goes in one tree removal; only ``values`` that still point
+    into the uploads root from before the sharded layout are removed one by one.
+    """
+    folders = tuple(item_upload_folder(item_name) + os.sep for item_name in item_names)
+    for item_name in item_names:
+        remove_lines_file(item_name)
+        remove_upload_folder(item_name)
+    for value in values:
+        if value.startswith(UPLOADS_ROOT + os.sep) and not value.startswith(folders):
+            try:
+                os.remove(value)
+            except OSError:
+                pass
 
 
 def delete_item(item_name: str) -> None:
-    values = Database().session.query(ItemValues.value).filter(ItemValues.item_name == item_name).all()
-    for val in values:
-        if os.path.isfile(val[0]):
-            os.remove(val[0])
+    values, finite = stocked_values(ItemValues.item_name == item_name)
+    forget_values(finite)
     Database().session.query(Goods).filter(Goods.name == item_name).delete()
     Database().session.query(ItemValues).filter(ItemValues.item_name == item_name).delete()
     Database().session.commit()
-    folder = os.path.join('assets', 'uploads', sanitize_name(item_name))
-    if os.path.isdir(folder) and not os.listdir(folder):
-        os.rmdir(folder)
+    catalog_cache.invalidate()
+    cleanup_uploads([item_name], values)
 
 
 def delete_only_items(item_name: str) -> None:
-    values = Database().session.query(ItemValues.value).filter(ItemValues.item_name == item_name).all()
-    for val in values:
-        if os.path.isfile(val[0]):
-            os.remove(val[0])
+    values, finite = stocked_values(ItemValues.item_name == item_name)
+    forget_values(finite)
     Database().session.query(ItemValues).filter(ItemValues.item_name == item_name).delete()
-    folder = os.path.join('assets', 'uploads', sanitize_name(item_name))
-    if os.path.isdir(folder) and not os.listdir(folder):
-        os.rmdir(folder)
+    Database().session.query(Goods).filter(Goods.name == item_name).update(
+        values={Goods.stock_count: 0, Goods.is_infinite: False})
+    Database().session.commit()
+    catalog_cache.invalidate()
+    cleanup_uploads([item_name], values)
 
 
 def delete_category(category_name: str) -> None:
-    # delete subcategories recursively
-    subs = Database().session.query(Categories.name).filter(Categories.parent_name == category_name).all()
-    for sub in subs:
-        delete_category(sub.name)
-    goods = Database().session.query(Goods.name).filter(Goods.category_name == category_name).all()
-    for item in goods:
-        values = Database().session.query(ItemValues.value).filter(ItemValues.item_name == item.name).all()
-        for val in values:
-            if os.path.isfile(val[0]):
-                os.remove(val[0])
-        Database().session.query(ItemValues).filter(ItemValues.item_name == item.name).delete()
-        folder = os.path.join('assets', 'uploads', sanitize_name(item.name))
-        if os.path.isdir(folder) and not os.listdir(folder):
-            os.rmdir(folder)
-    Database().session.query(Goods).filter(Goods.category_name == category_name).delete()
-    Database().session.query(Categories).filter(Categories.name == category_name).delete()
-    Database().session.commit()
+    """Delete a category with its whole subtree, goods and values in one transaction.
+
+    Uploaded files of the deleted values are removed only after the commit."""
+    session = Database().session
+    tree = select(category_subtree(category_name).c.name)
+    goods = select(Goods.name).where(Goods.category_name.in_(tree))
+    item_names = [name for name, in session.execute(goods)]
+    values, finite = stocked_values(ItemValues.item_name.in_(goods))
+    forget_values(finite)
+    session.query(ItemValues).filter(ItemValues.item_name.in_(goods)).delete(synchronize_session=False)
+    session.query(Goods).filter(Goods.category_name.in_(tree)).delete(synchronize_session=False)
+    session.query(Categories).filter(Categories.name.in_(tree)).delete(synchronize_session=False)
+    session.commit()
+    catalog_cache.invalidate()
+    category_tree.remove(category_name)
+    cleanup_uploads(item_names, values)
 
 
 def finish_operation(operation_id: str) -> None:
@@ -58,17 +98,12 @@ def buy_item(item_id: str, infinity: bool = False) -> None:
     File cleanup is handled after successful delivery to the user."""
     if infinity is False:
         session = Database().session
+        item_name = session.query(ItemValues.item_name).filter(ItemValues.id == item_id).scalar()
+        if item_name is None:
+            return
         session.query(ItemValues).filter(ItemValues.id == item_id).delete()
+        session.query(Goods).filter(Goods.name == item_name, Goods.stock_count > 0).update(
+            values={Goods.stock_count: Goods.stock_count - 1})
         session.commit()
-
-        session = Database().session
-        session.query(ItemValues).filter(ItemValues.id == item_id).delete()
-        session.commit()
-
-        value = Database().session.query(ItemValues.value).filter(ItemValues.id == item_id).first()
-        if value and os.path.isfile(value[0]):
-            os.remove(value[0])
-        Database().session.query(ItemValues).filter(ItemValues.id == item_id).delete()
-        Database().session.commit()
     else:
         pass
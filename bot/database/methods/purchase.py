@@ -0,0 +1,199 @@
+import datetime
+import random
+from contextlib import contextmanager
+
+import sqlalchemy
+
+from bot.database.models import User, BoughtGoods, Goods, ItemValues, Reservations
+from bot.database import Database
+from bot.database.methods.create import record_daily_stats, register_sold_values, _add_stock
+from bot.utils.files import pop_line_from_file, append_lines_to_file
+
+
+def purchase_item(telegram_id: int, item_name: str, price: int,
+                  bought_time: datetime.datetime) -> tuple[int, str] | None:
+    """Sell one unit of ``item_name`` to the user in a single transaction.
+
+    The balance is debited by a guarded UPDATE, so concurrent purchases can never
+    overdraw it, and the order row is written in the same commit.
+    Returns ``(new_balance, value)``, or ``None`` if the balance does not cover
+    ``price`` or the item is out of stock, in which case nothing is changed.
+    If the transaction fails after a line was popped, the line is put back.
+    """
+    session = Database().session
+    is_infinite = session.query(Goods.is_infinite).filter(Goods.name == item_name).scalar()
+    if is_infinite is None:
+        return None
+    new_balance = session.execute(
+        sqlalchemy.update(User)
+        .where(User.telegram_id == telegram_id, User.balance >= price)
+        .values(balance=User.balance - price, purchases_count=User.purchases_count + 1)
+        .returning(User.balance)
+    ).scalar()
+    if new_balance is None:
+        session.rollback()
+        return None
+    value = _take_value(item_name, is_infinite)
+    if value is None:
+        session.rollback()
+        return None
+    with _restore_line_on_failure(item_name, None if is_infinite else value):
+        if not is_infinite:
+            _consume_stock(item_name, value)
+            register_sold_values([value])
+        session.add(
+            BoughtGoods(name=item_name, value=value, price=price, buyer_id=telegram_id, bought_datetime=bought_time,
+                        unique_id=str(random.randint(1000000000, 9999999999))))
+        record_daily_stats(bought_time.date(), orders=1, revenue=price)
+        session.commit()
+    return new_balance, value
+
+
+def _take_value(item_name: str, is_infinite: bool) -> str | None:
+    """Return the value to hand out: the stored one of an infinite item, else the next popped line."""
+    if is_infinite:
+        return Database().session.query(ItemValues.value).filter(ItemValues.item_name == item_name).limit(1).scalar()
+    return pop_line_from_file(item_name)
+
+
+@contextmanager
+def _restore_line_on_failure(item_name: str, line: str | None):
+    """Roll back and append the popped ``line`` to the lines file again if the block raises.
+
+    Popping advances the file's head before the transaction commits, so a failed
+    commit would otherwise lose the line for good.
+    """
+    try:
+        yield
+    except Exception:
+        Database().session.rollback()
+        if line is not None:
+            append_lines_to_file(item_name, [line])
+        raise
+
+
+def _consume_stock(item_name: str, value: str) -> None:
+    """Remove the stored row of the popped ``value`` of ``item_name`` and decrement its stock counter."""
+    session = Database().session
+    row = (sqlalchemy.select(ItemValues.id)
+           .where(ItemValues.item_name == item_name, ItemValues.value == value)
+           .limit(1)
+           .scalar_subquery())
+    session.query(ItemValues).filter(ItemValues.id == row).delete(synchronize_session=False)
+    session.query(Goods).filter(Goods.name == item_name, Goods.stock_count > 0).update(
+        values={Goods.stock_count: Goods.stock_count - 1}, synchronize_session=False)
+
+
+def reserve_item(telegram_id: int, item_name: str, expires_at: datetime.datetime, limit: int = 10) -> bool:
+    """Hold one unit of ``item_name`` in the user's basket until ``expires_at``.
+
+    The unit leaves the stock exactly as a sale would; the user's other
+    reservations keep their own expiry. So that nobody can hold stock they
+    could not buy, the basket is capped at ``limit`` units and the balance must
+    cover the whole basket with the new unit. Returns ``False`` if the item is
+    unknown or out of stock, the basket is full or the balance is short.
+    """
+    session = Database().session
+    item = session.query(Goods.is_infinite, Goods.price).filter(Goods.name == item_name).first()
+    if item is None:
+        return False
+    is_infinite = item.is_infinite
+    units, reserved = (session.query(sqlalchemy.func.count(Reservations.id),
+                                     sqlalchemy.func.coalesce(sqlalchemy.func.sum(Goods.price), 0))
+                       .join(Goods, Goods.name == Reservations.item_name)
+                       .filter(Reservations.user_id == telegram_id)
+                       .one())
+    balance = session.query(User.balance).filter(User.telegram_id == telegram_id).scalar() or 0
+    if units >= limit or balance < reserved + item.price:
+        session.rollback()
+        return False
+    value = _take_value(item_name, is_infinite)
+    if value is None:
+        return False
+    with _restore_line_on_failure(item_name, None if is_infinite else value):
+        if not is_infinite:
+            _consume_stock(item_name, value)
+            register_sold_values([value])
+        session.add(Reservations(user_id=telegram_id, item_name=item_name, value=value,
+                                 is_infinite=bool(is_infinite), expires_at=expires_at))
+        session.commit()
+    return True
+
+
+def checkout_reservations(telegram_id: int, bought_time: datetime.datetime) -> tuple[int, list[tuple[str, str]]] | None:
+    """Buy everything reserved in the user's basket in a single transaction.
+
+    The reservations still valid at ``bought_time`` are claimed first by a
+    ``DELETE ... RETURNING``, so units that the expiry sweep or a removal from
+    the basket released in the meantime are neither charged nor delivered. The
+    claimed values are sold as they are, without touching the stock again.
+    Returns ``(new_balance, [(item_name, value), ...])``, with an empty list if
+    nothing valid is reserved, or ``None`` if the balance does not cover the
+    basket, in which case the reservations are kept.
+    """
+    session = Database().session
+    claimed = session.execute(
+        sqlalchemy.delete(Reservations)
+        .where(Reservations.user_id == telegram_id,
+               Reservations.expires_at > bought_time,
+               Reservations.item_name.in_(sqlalchemy.select(Goods.name)))
+        .returning(Reservations.id, Reservations.item_name, Reservations.value, Reservations.is_infinite)
+    ).all()
+    if not claimed:
+        session.rollback()
+        return session.query(User.balance).filter(User.telegram_id == telegram_id).scalar(), []
+    claimed.sort(key=lambda row: row.id)
+    prices = dict(session.query(Goods.name, Goods.price).filter(Goods.name.in_({row.item_name for row in claimed})))
+    total = sum(prices[row.item_name] for row in claimed)
+    new_balance = session.execute(
+        sqlalchemy.update(User)
+        .where(User.telegram_id == telegram_id, User.balance >= total)
+        .values(balance=User.balance - total, purchases_count=User.purchases_count + len(claimed))
+        .returning(User.balance)
+    ).scalar()
+    if new_balance is None:
+        session.rollback()
+        return None
+    session.execute(sqlalchemy.insert(BoughtGoods.__table__), [
+        {'item_name': row.item_name, 'value': row.value, 'price': prices[row.item_name], 'buyer_id': telegram_id,
+         'bought_datetime': bought_time, 'unique_id': random.randint(1000000000, 9999999999)}
+        for row in claimed])
+    register_sold_values([row.value for row in claimed if not row.is_infinite])
+    record_daily_stats(bought_time.date(), orders=len(claimed), revenue=total)
+    session.commit()
+    return new_balance, [(row.item_name, row.value) for row in claimed]
+
+
+def release_reservations(telegram_id: int, reservation_id: int | None = None) -> int:
+    """Return one reservation, or the user's whole basket, to the stock."""
+    criteria = [Reservations.user_id == telegram_id]
+    if reservation_id is not None:
+        criteria.append(Reservations.id == reservation_id)
+    return _release(*criteria)
+
+
+def expire_reservations(now: datetime.datetime) -> int:
+    """Return every reservation that expired before ``now`` to the stock in one transaction."""
+    return _release(Reservations.expires_at <= now)
+
+
+def _release(*criteria) -> int:
+    """Delete the matching reservations and put their units back; returns how many were released."""
+    session = Database().session
+    released = session.execute(
+        sqlalchemy.delete(Reservations).where(*criteria)
+        .returning(Reservations.item_name, Reservations.value, Reservations.is_infinite)
+    ).all()
+    lines = {}
+    for item_name, value, is_infinite in released:
+        if not is_infinite:
+            lines.setdefault(item_name, []).append(value)
+    existing = {name for name, in session.query(Goods.name).filter(Goods.name.in_(lines))}
+    for item_name in existing:
+        session.execute(sqlalchemy.insert(ItemValues.__table__), [
+            {'item_name': item_name, 'value': value, 'is_infinity': False} for value in lines[item_name]])
+        _add_stock(item_name, len(lines[item_name]), False)
+    session.commit()
+    for item_name in existing:
+        append_lines_to_file(item_name, lines[item_name])
+    return len(released)
@@ -1,10 +1,13 @@
 import datetime
 
 import sqlalchemy
-from sqlalchemy import exc, func
+from sqlalchemy import exc, func, select
+from sqlalchemy.orm import aliased
 
+from bot.database.cache import CategoryTree, ValueFilter, catalog_cache, category_tree, permission_cache, \
+    value_filter
 from bot.database.models import Database, User, ItemValues, Goods, Categories, Role, BoughtGoods, \
-    Operations, UnfinishedOperations
+    Operations, UnfinishedOperations, DailyStats, Reservations, ValueHashes
 
 
 def check_user(telegram_id: int) -> User | None:
@@ -14,9 +17,31 @@ def check_user(telegram_id: int) -> User | None:
         return None
 
 
-def check_role(telegram_id: int) -> User | None:
-    role_id = Database().session.query(User.role_id).filter(User.telegram_id == telegram_id).one()[0]
-    return Database().session.query(Role.permissions).filter(Role.id == role_id).one()[0]
+def get_user_context(telegram_id: int):
+    """Return the user's role, permissions, language, balance and purchase count in one query.
+
+    The row has ``telegram_id``, ``role_id``, ``permissions``, ``language``,
+    ``balance``, ``purchases``, ``total_topped_up``, ``referrals`` and ``basket``
+    (reserved units); ``None`` is returned for unknown users.
+    """
+    basket = (select(func.count(Reservations.id))
+              .where(Reservations.user_id == User.telegram_id)
+              .scalar_subquery())
+    return (Database().session.query(User.telegram_id, User.role_id, Role.permissions, User.language,
+                                     User.balance, User.purchases_count.label('purchases'),
+                                     User.total_topped_up, User.referral_count.label('referrals'),
+                                     basket.label('basket'))
+            .outerjoin(Role, Role.id == User.role_id)
+            .filter(User.telegram_id == telegram_id)
+            .first())
+
+
+def check_role(telegram_id: int | str) -> int:
+    """Return the permission mask of the user's role, served from ``permission_cache``."""
+    return permission_cache.permissions(
+        int(telegram_id),
+        lambda user_id: Database().session.query(User.role_id).filter(User.telegram_id == user_id).one()[0],
+        lambda: Database().session.query(Role.id, Role.permissions).all())
 
 
 def check_role_name_by_id(role_id: int):
@@ -27,18 +52,18 @@ def select_max_role_id() -> int:
     return Database().session.query(func.max(Role.id)).scalar()
 
 
-def select_today_users(date: str) -> int | None:
-    try:
-        date_obj = datetime.datetime.strptime(date, "%Y-%m-%d").date()
-        start_of_day = datetime.datetime.combine(date_obj, datetime.time.min)
-        end_of_day = datetime.datetime.combine(date_obj, datetime.time.max)
-
-        return Database().session.query(User).filter(
-            User.registration_date >= str(start_of_day),
-            User.registration_date <= str(end_of_day)
-        ).count()
-    except exc.NoResultFound:
-        return None
+def day_bounds(date: str) -> tuple[datetime.datetime, datetime.datetime]:
+    """Return the half-open ``[start, end)`` datetime range of a ``YYYY-MM-DD`` day."""
+    start_of_day = datetime.datetime.strptime(date, "%Y-%m-%d")
+    return start_of_day, start_of_day + datetime.timedelta(days=1)
+
+
+def select_today_users(date: str) -> int:
+    start_of_day, end_of_day = day_bounds(date)
+    return Database().session.query(func.count(User.telegram_id)).filter(
+        User.registration_date >= start_of_day,
+        User.registration_date < end_of_day
+    ).scalar()
 
 
 def get_user_count() -> int:
@@ -56,34 +81,118 @@ def get_all_users() -> list[tuple[int]]:
     return Database().session.query(User.telegram_id).all()
 
 
+def get_category_tree() -> CategoryTree:
+    """Return the category index, loading it from the database on first use."""
+    if not category_tree.loaded:
+        category_tree.load(Database().session.query(Categories.name, Categories.parent_name).all())
+    return category_tree
+
+
+def get_value_filter() -> ValueFilter:
+    """Return the duplicate-value filter, (re)loading it from ``value_hashes`` when missing or full."""
+    if not value_filter.loaded or value_filter.full:
+        session = Database().session
+        count = session.query(func.count(ValueHashes.digest)).scalar()
+        value_filter.load((digest for digest, in session.query(ValueHashes.digest).yield_per(10000)), count * 2)
+    return value_filter
+
+
+def known_digests(digests: list[bytes], batch_size: int = 500) -> set[bytes]:
+    """Return those of ``digests`` that are already in ``value_hashes``."""
+    known = set()
+    for start in range(0, len(digests), batch_size):
+        batch = digests[start:start + batch_size]
+        known.update(digest for digest, in
+                     Database().session.query(ValueHashes.digest).filter(ValueHashes.digest.in_(batch)))
+    return known
+
+
 def get_all_categories() -> list[str]:
-    return [category[0] for category in
-            Database().session.query(Categories.name)
-            .filter(Categories.parent_name.is_(None)).all()]
+    return get_category_tree().children()
 
 
 def get_subcategories(parent_name: str) -> list[str]:
-    return [category[0] for category in
-            Database().session.query(Categories.name)
-            .filter(Categories.parent_name == parent_name).all()]
+    return get_category_tree().children(parent_name)
 
 
 def get_category_parent(category_name: str) -> str | None:
-    result = (Database().session.query(Categories.parent_name)
-              .filter(Categories.name == category_name).first())
-    return result[0] if result else None
+    return get_category_tree().parent(category_name)
+
+
+def get_categories_page(page: int, per_page: int = 10) -> tuple[list[str], int]:
+    """Return the root categories of page ``page`` and the total number of root categories."""
+    return get_category_tree().children_page(None, page * per_page, per_page)
+
+
+def get_subcategories_page(parent_name: str, page: int, per_page: int = 10) -> tuple[list[str], int]:
+    return get_category_tree().children_page(parent_name, page * per_page, per_page)
 
 
+@catalog_cache.cached
+def get_items_page(category_name: str, after: str | None = None, before: str | None = None,
+                   per_page: int = 10) -> list[str]:
+    """Return one page of the names of the goods in ``category_name``.
+
+    Goods are listed by name and paged by keyset on the ``(category_name, name)``
+    index: the names after ``after``, the names right before ``before``, or the
+    first page.
+    """
+    query = Database().session.query(Goods.name).filter(Goods.category_name == category_name)
+    if before is not None:
+        query = query.filter(Goods.name < before).order_by(Goods.name.desc())
+        return [name for name, in query.limit(per_page)][::-1]
+    if after is not None:
+        query = query.filter(Goods.name > after)
+    return [name for name, in query.order_by(Goods.name).limit(per_page)]
+
+
+@catalog_cache.cached
+def count_items(category_name: str) -> int:
+    return Database().session.query(func.count(Goods.name)).filter(Goods.category_name == category_name).scalar()
+
+
+@catalog_cache.cached
 def get_all_items(category_name: str) -> list[str]:
     return [item[0] for item in
             Database().session.query(Goods.name).filter(Goods.category_name == category_name).all()]
 
 
+def category_subtree(category_name: str):
+    """Return a recursive CTE of ``category_name`` and every category below it."""
+    tree = (select(Categories.name, Categories.parent_name)
+            .where(Categories.name == category_name)
+            .cte('category_tree', recursive=True))
+    children = aliased(Categories)
+    return tree.union_all(
+        select(children.name, children.parent_name).where(children.parent_name == tree.c.name))
+
+
+def get_category_availability(category_name: str) -> list:
+    """Return availability rows for every category in the subtree of ``category_name``.
+
+    Each row has ``category_name``, ``parent_name``, ``item_name``, ``price``,
+    ``stock_count`` and ``is_infinite``; categories without goods appear once with
+    ``None`` item fields. The whole subtree is read with one recursive query.
+    """
+    tree = category_subtree(category_name)
+    return (Database().session.query(tree.c.name.label('category_name'),
+                                     tree.c.parent_name,
+                                     Goods.name.label('item_name'),
+                                     Goods.price,
+                                     Goods.stock_count,
+                                     Goods.is_infinite)
+            .select_from(tree)
+            .outerjoin(Goods, Goods.category_name == tree.c.name)
+            .order_by(tree.c.name, Goods.name)
+            .all())
+
+
 def get_bought_item_info(item_id: str) -> dict | None:
     result = Database().session.query(BoughtGoods).filter(BoughtGoods.id == item_id).first()
     return result.__dict__ if result else None
 
 
+@catalog_cache.cached
 def get_item_info(item_name: str) -> dict | None:
     result = Database().session.query(Goods).filter(Goods.name == item_name).first()
     return result.__dict__ if result else None
@@ -119,30 +228,46 @@ def get_item_value(item_name: str) -> dict | None:
 
 
 def select_item_values_amount(item_name: str) -> int:
-    return Database().session.query(func.count()).filter(ItemValues.item_name == item_name).scalar()
+    return Database().session.query(Goods.stock_count).filter(Goods.name == item_name).scalar() or 0
 
 
-def check_value(item_name: str) -> bool | None:
-    try:
-        result = False
-        values = select_item_values_amount(item_name)
-        for i in range(values):
-            is_inf = Database().session.query(ItemValues).filter(ItemValues.item_name == item_name).first()
-            if is_inf and is_inf.is_infinity:
-                result = True
-    except exc.NoResultFound:
-        return False
-    return result
+def check_value(item_name: str) -> bool:
+    return bool(Database().session.query(Goods.is_infinite).filter(Goods.name == item_name).scalar())
 
 
 def select_user_items(buyer_id: int) -> int:
-    return Database().session.query(func.count()).filter(BoughtGoods.buyer_id == buyer_id).scalar()
+    return Database().session.query(User.purchases_count).filter(User.telegram_id == buyer_id).scalar() or 0
 
 
 def select_bought_items(buyer_id: int) -> list[str]:
     return Database().session.query(BoughtGoods).filter(BoughtGoods.buyer_id == buyer_id).all()
 
 
+def select_bought_items_page(buyer_id: int, after_id: int | None = None, before_id: int | None = None,
+                             limit: int = 10) -> list:
+    """Return one page of ``(id, item_name)`` rows of the user's purchases, oldest first.
+
+    Pages are addressed by keyset on ``id``: rows after ``after_id`` or, going
+    backwards, the rows right before ``before_id``; the first page otherwise.
+    """
+    query = (Database().session.query(BoughtGoods.id, BoughtGoods.item_name)
+             .filter(BoughtGoods.buyer_id == buyer_id))
+    if before_id is not None:
+        rows = query.filter(BoughtGoods.id < before_id).order_by(BoughtGoods.id.desc()).limit(limit).all()
+        return rows[::-1]
+    if after_id is not None:
+        query = query.filter(BoughtGoods.id > after_id)
+    return query.order_by(BoughtGoods.id).limit(limit).all()
+
+
+def get_basket(telegram_id: int) -> list:
+    """Return ``(id, item_name)`` rows of the units reserved in the user's basket."""
+    return (Database().session.query(Reservations.id, Reservations.item_name)
+            .filter(Reservations.user_id == telegram_id)
+            .order_by(Reservations.id)
+            .all())
+
+
 def select_bought_item(unique_id: int) -> dict | None:
     result = Database().session.query(BoughtGoods).filter(BoughtGoods.unique_id == unique_id).first()
     return result.__dict__ if result else None
@@ -155,7 +280,39 @@ def bought_items_list(buyer_id: int) -> list[str]:
 
 
 def select_all_users() -> int:
-    return Database().session.query(func.count()).filter(User).scalar()
+    return Database().session.query(func.count(User.telegram_id)).scalar()
+
+
+def get_dashboard_stats(date: str):
+    """Return every figure of the admin statistics screen in one query.
+
+    Daily and lifetime sales and top-ups come from the ``daily_stats`` rollup;
+    the row has ``today_users``, ``admins``, ``users``, ``today_revenue``,
+    ``revenue``, ``today_top_ups``, ``balance``, ``top_ups``, ``items``,
+    ``goods``, ``categories`` and ``sold``.
+    """
+    day = datetime.datetime.strptime(date, "%Y-%m-%d").date()
+
+    def scalar(column, *criteria):
+        return select(column).where(*criteria).scalar_subquery()
+
+    def today(column):
+        return func.coalesce(scalar(column, DailyStats.day == day), 0)
+
+    return Database().session.query(
+        today(DailyStats.users).label('today_users'),
+        scalar(func.count(User.telegram_id), User.role_id > 1).label('admins'),
+        scalar(func.count(User.telegram_id)).label('users'),
+        today(DailyStats.revenue).label('today_revenue'),
+        func.coalesce(scalar(func.sum(DailyStats.revenue)), 0).label('revenue'),
+        today(DailyStats.top_ups).label('today_top_ups'),
+        func.coalesce(scalar(func.sum(User.balance)), 0).label('balance'),
+        func.coalesce(scalar(func.sum(DailyStats.top_ups)), 0).label('top_ups'),
+        scalar(func.count(ItemValues.id)).label('items'),
+        scalar(func.count(Goods.name)).label('goods'),
+        scalar(func.count(Categories.name)).label('categories'),
+        func.coalesce(scalar(func.sum(DailyStats.orders)), 0).label('sold'),
+    ).one()
 
 
 def select_count_items() -> int:
@@ -174,44 +331,32 @@ def select_count_bought_items() -> int:
     return Database().session.query(BoughtGoods).count()
 
 
-def select_today_orders(date: str) -> int | None:
-    try:
-        date_obj = datetime.datetime.strptime(date, "%Y-%m-%d").date()
-        start_of_day = datetime.datetime.combine(date_obj, datetime.time.min)
-        end_of_day = datetime.datetime.combine(date_obj, datetime.time.max)
-
-        return (
-                Database().session.query(func.sum(BoughtGoods.price))
-                .filter(
-                    func.date(BoughtGoods.bought_datetime) >= start_of_day.date(),
-                    func.date(BoughtGoods.bought_datetime) <= end_of_day.date()
-                )
-                .scalar() or 0
-        )
-    except exc.NoResultFound:
-        return None
+def select_today_orders(date: str) -> int:
+    start_of_day, end_of_day = day_bounds(date)
+    return (
+            Database().session.query(func.sum(BoughtGoods.price))
+            .filter(
+                BoughtGoods.bought_datetime >= start_of_day,
+                BoughtGoods.bought_datetime < end_of_day
+            )
+            .scalar() or 0
+    )
 
 
 def select_all_orders() -> float:
     return Database().session.query(func.sum(BoughtGoods.price)).scalar() or 0
 
 
-def select_today_operations(date: str) -> int | None:
-    try:
-        date_obj = datetime.datetime.strptime(date, "%Y-%m-%d").date()
-        start_of_day = datetime.datetime.combine(date_obj, datetime.time.min)
-        end_of_day = datetime.datetime.combine(date_obj, datetime.time.max)
-
-        return (
-                Database().session.query(func.sum(Operations.operation_value))
-                .filter(
-                    func.date(Operations.operation_time) >= start_of_day.date(),
-                    func.date(Operations.operation_time) <= end_of_day.date()
-                )
-                .scalar() or 0
-        )
-    except exc.NoResultFound:
-        return None
+def select_today_operations(date: str) -> int:
+    start_of_day, end_of_day = day_bounds(date)
+    return (
+            Database().session.query(func.sum(Operations.operation_value))
+            .filter(
+                Operations.operation_time >= start_of_day,
+                Operations.operation_time < end_of_day
+            )
+            .scalar() or 0
+    )
 
 
 def select_all_operations() -> float:
@@ -250,8 +395,8 @@ def get_unfinished_operation(operation_id: str) -> tuple[int, int, int | None] |
     return (result.user_id, result.operation_value, result.message_id) if result else None
 
 
-def check_user_referrals(user_id: int) -> list[int]:
-    return Database().session.query(User).filter(User.referral_id == user_id).count()
+def check_user_referrals(user_id: int) -> int:
+    return Database().session.query(User.referral_count).filter(User.telegram_id == user_id).scalar() or 0
 
 
 def get_user_referral(user_id: int) -> int | None:
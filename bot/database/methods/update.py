@@ -1,11 +1,19 @@
-from bot.database.models import User, ItemValues, Goods, Categories
+import datetime
+
+from sqlalchemy import func, select, exists, or_
+
+from bot.database.models import User, ItemValues, Goods, Categories, BoughtGoods, Operations, DailyStats, \
+    Reservations
 from bot.database import Database
+from bot.database.cache import catalog_cache, category_tree, permission_cache
+from bot.utils.files import rename_lines_file
 
 
 def set_role(telegram_id: str, role: int) -> None:
     Database().session.query(User).filter(User.telegram_id == telegram_id).update(
         values={User.role_id: role})
     Database().session.commit()
+    permission_cache.forget_user(telegram_id)
 
 
 def update_balance(telegram_id: int | str, summ: int) -> None:
@@ -35,6 +43,9 @@ def update_item(item_name: str, new_name: str, new_description: str, new_price:
     Database().session.query(ItemValues).filter(ItemValues.item_name == item_name).update(
         values={ItemValues.item_name: new_name}
     )
+    Database().session.query(Reservations).filter(Reservations.item_name == item_name).update(
+        values={Reservations.item_name: new_name}
+    )
     Database().session.query(Goods).filter(Goods.name == item_name).update(
         values={Goods.name: new_name,
                 Goods.description: new_description,
@@ -42,6 +53,8 @@ def update_item(item_name: str, new_name: str, new_description: str, new_price:
                 Goods.category_name: new_category_name}
     )
     Database().session.commit()
+    catalog_cache.invalidate()
+    rename_lines_file(item_name, new_name)
 
 
 def update_category(category_name: str, new_name: str) -> None:
@@ -49,4 +62,56 @@ def update_category(category_name: str, new_name: str) -> None:
         values={Goods.category_name: new_name})
     Database().session.query(Categories).filter(Categories.name == category_name).update(
         values={Categories.name: new_name})
+    Database().session.query(Categories).filter(Categories.parent_name == category_name).update(
+        values={Categories.parent_name: new_name})
     Database().session.commit()
+    catalog_cache.invalidate()
+    category_tree.rename(category_name, new_name)
+
+
+def rebuild_stock_counters(item_name: str | None = None) -> list[str]:
+    """Recompute ``Goods.stock_count`` and ``Goods.is_infinite`` from ``item_values``.
+
+    Only ``item_name`` is checked when given, otherwise every item. Returns the
+    names of the items whose counters were out of sync and have been repaired.
+    """
+    actual_count = (select(func.count(ItemValues.id))
+                    .where(ItemValues.item_name == Goods.name, ItemValues.is_infinity.is_(False))
+                    .scalar_subquery())
+    actual_infinite = exists().where(ItemValues.item_name == Goods.name, ItemValues.is_infinity.is_(True))
+    session = Database().session
+    query = session.query(Goods.name).filter(
+        or_(Goods.stock_count != actual_count, Goods.is_infinite != actual_infinite))
+    if item_name is not None:
+        query = query.filter(Goods.name == item_name)
+    broken = [name for name, in query.all()]
+    if broken:
+        session.query(Goods).filter(Goods.name.in_(broken)).update(
+            values={Goods.stock_count: actual_count, Goods.is_infinite: actual_infinite},
+            synchronize_session=False)
+        session.commit()
+        catalog_cache.invalidate()
+    return broken
+
+
+def rebuild_daily_stats() -> int:
+    """Recompute the whole ``daily_stats`` rollup from users, orders and operations.
+
+    Returns the number of days written.
+    """
+    session = Database().session
+    days = {}
+    sources = (
+        (func.date(User.registration_date), (func.count(User.telegram_id),), ('users',)),
+        (func.date(BoughtGoods.bought_datetime), (func.count(BoughtGoods.id), func.sum(BoughtGoods.price)),
+         ('orders', 'revenue')),
+        (func.date(Operations.operation_time), (func.sum(Operations.operation_value),), ('top_ups',)),
+    )
+    for day, aggregates, names in sources:
+        for row in session.query(day, *aggregates).group_by(day):
+            totals = days.setdefault(datetime.date.fromisoformat(str(row[0])), {})
+            totals.update(zip(names, row[1:]))
+    session.query(DailyStats).delete()
+    session.add_all(DailyStats(day, **totals) for day, totals in days.items())
+    session.commit()
+    return len(days)
@@ -1,6 +1,8 @@
 import datetime
-from sqlalchemy import Column, Integer, String, BigInteger, ForeignKey, Text, Boolean, VARCHAR
+from sqlalchemy import Column, Index, Integer, String, BigInteger, ForeignKey, Text, Boolean, Date, DateTime, \
+    LargeBinary, false
 from bot.database.main import Database
+from bot.database.cache import permission_cache
 from sqlalchemy.orm import relationship
 
 
@@ -12,6 +14,8 @@ class Permission:
     SHOP_MANAGE = 16
     ADMINS_MANAGE = 32
     OWN = 64
+    # any of these opens the administrator console
+    CONSOLE = BROADCAST | SETTINGS_MANAGE | USERS_MANAGE | SHOP_MANAGE | ADMINS_MANAGE
 
 
 class Role(Database.BASE):
@@ -51,6 +55,7 @@ class Role(Database.BASE):
             role.default = (role.name == default_role)
             Database().session.add(role)
         Database().session.commit()
+        permission_cache.invalidate_roles()
 
     def add_permission(self, perm):
         if not self.has_permission(perm):
@@ -73,11 +78,14 @@ class Role(Database.BASE):
 class User(Database.BASE):
     __tablename__ = 'users'
     telegram_id = Column(BigInteger, nullable=False, unique=True, primary_key=True)
-    role_id = Column(Integer, ForeignKey('roles.id'), default=1)
+    role_id = Column(Integer, ForeignKey('roles.id'), default=1, index=True)
     balance = Column(BigInteger, nullable=False, default=0)
     language = Column(String(5), nullable=True)
-    referral_id = Column(BigInteger, nullable=True)
-    registration_date = Column(VARCHAR, nullable=False)
+    referral_id = Column(BigInteger, nullable=True, index=True)
+    registration_date = Column(DateTime, nullable=False, index=True)
+    total_topped_up = Column(BigInteger, nullable=False, default=0, server_default='0')
+    purchases_count = Column(Integer, nullable=False, default=0, server_default='0')
+    referral_count = Column(Integer, nullable=False, default=0, server_default='0')
     user_operations = relationship("Operations", back_populates="user_telegram_id")
     user_unfinished_operations = relationship("UnfinishedOperations", back_populates="user_telegram_id")
     user_goods = relationship("BoughtGoods", back_populates="user_telegram_id")
@@ -95,7 +103,7 @@ class User(Database.BASE):
 class Categories(Database.BASE):
     __tablename__ = 'categories'
     name = Column(String(100), primary_key=True, unique=True, nullable=False)
-    parent_name = Column(String(100), nullable=True)
+    parent_name = Column(String(100), nullable=True, index=True)
     item = relationship("Goods", back_populates="category")
 
     def __init__(self, name: str, parent_name: str | None = None):
@@ -105,10 +113,15 @@ class Categories(Database.BASE):
 
 class Goods(Database.BASE):
     __tablename__ = 'goods'
+    # serves the category filters and the keyset pages of a category's goods in name order
+    __table_args__ = (Index('ix_goods_category_name_name', 'category_name', 'name'),)
     name = Column(String(100), nullable=False, unique=True, primary_key=True)
     price = Column(BigInteger, nullable=False)
     description = Column(Text, nullable=False)
     category_name = Column(String(100), ForeignKey('categories.name'), nullable=False)
+    # denormalized from item_values, kept in sync by every write path (see rebuild_stock_counters)
+    stock_count = Column(Integer, nullable=False, default=0, server_default='0')
+    is_infinite = Column(Boolean, nullable=False, default=False, server_default=false())
     category = relationship("Categories", back_populates="item")
     values = relationship("ItemValues", back_populates="item")
 
@@ -121,6 +134,8 @@ class Goods(Database.BASE):
 
 class ItemValues(Database.BASE):
     __tablename__ = 'item_values'
+    # serves the per-item filters and finding the row of a value popped from the lines file
+    __table_args__ = (Index('ix_item_values_item_name_value', 'item_name', 'value'),)
     id = Column(Integer, nullable=False, primary_key=True)
     item_name = Column(String(100), ForeignKey('goods.name'), nullable=False)
     value = Column(Text, nullable=True)
@@ -139,12 +154,12 @@ class BoughtGoods(Database.BASE):
     item_name = Column(String(100), nullable=False)
     value = Column(Text, nullable=False)
     price = Column(BigInteger, nullable=False)
-    buyer_id = Column(BigInteger, ForeignKey('users.telegram_id'), nullable=False)
-    bought_datetime = Column(VARCHAR, nullable=False)
+    buyer_id = Column(BigInteger, ForeignKey('users.telegram_id'), nullable=False, index=True)
+    bought_datetime = Column(DateTime, nullable=False, index=True)
     unique_id = Column(BigInteger, nullable=False, unique=True)
     user_telegram_id = relationship("User", back_populates="user_goods")
 
-    def __init__(self, name: str, value: str, price: int, bought_datetime: str, unique_id,
+    def __init__(self, name: str, value: str, price: int, bought_datetime: datetime.datetime, unique_id,
                  buyer_id: int = 0):
         self.item_name = name
         self.value = value
@@ -157,12 +172,12 @@ class BoughtGoods(Database.BASE):
 class Operations(Database.BASE):
     __tablename__ = 'operations'
     id = Column(Integer, nullable=False, primary_key=True)
-    user_id = Column(BigInteger, ForeignKey('users.telegram_id'), nullable=False)
+    user_id = Column(BigInteger, ForeignKey('users.telegram_id'), nullable=False, index=True)
     operation_value = Column(BigInteger, nullable=False)
-    operation_time = Column(VARCHAR, nullable=False)
+    operation_time = Column(DateTime, nullable=False, index=True)
     user_telegram_id = relationship("User", back_populates="user_operations")
 
-    def __init__(self, user_id: int, operation_value: int, operation_time: str):
+    def __init__(self, user_id: int, operation_value: int, operation_time: datetime.datetime):
         self.user_id = user_id
         self.operation_value = operation_value
         self.operation_time = operation_time
@@ -173,7 +188,7 @@ class UnfinishedOperations(Database.BASE):
     id = Column(Integer, nullable=False, primary_key=True)
     user_id = Column(BigInteger, ForeignKey('users.telegram_id'), nullable=False)
     operation_value = Column(BigInteger, nullable=False)
-    operation_id = Column(String(500), nullable=False)
+    operation_id = Column(String(500), nullable=False, index=True)
     message_id = Column(BigInteger, nullable=True)
     user_telegram_id = relationship("User", back_populates="user_unfinished_operations")
 
@@ -184,6 +199,48 @@ class UnfinishedOperations(Database.BASE):
         self.message_id = message_id
 
 
+class Reservations(Database.BASE):
+    __tablename__ = 'reservations'
+    id = Column(Integer, nullable=False, primary_key=True)
+    user_id = Column(BigInteger, ForeignKey('users.telegram_id'), nullable=False, index=True)
+    item_name = Column(String(100), nullable=False)
+    value = Column(Text, nullable=False)
+    is_infinite = Column(Boolean, nullable=False, default=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    def __init__(self, user_id: int, item_name: str, value: str, is_infinite: bool, expires_at: datetime.datetime):
+        self.user_id = user_id
+        self.item_name = item_name
+        self.value = value
+        self.is_infinite = is_infinite
+        self.expires_at = expires_at
+
+
+class ValueHashes(Database.BASE):
+    __tablename__ = 'value_hashes'
+    digest = Column(LargeBinary(32), primary_key=True)
+
+    def __init__(self, digest: bytes):
+        self.digest = digest
+
+
+class DailyStats(Database.BASE):
+    __tablename__ = 'daily_stats'
+    day = Column(Date, primary_key=True)
+    users = Column(Integer, nullable=False, default=0, server_default='0')
+    orders = Column(Integer, nullable=False, default=0, server_default='0')
+    revenue = Column(BigInteger, nullable=False, default=0, server_default='0')
+    top_ups = Column(BigInteger, nullable=False, default=0, server_default='0')
+
+    def __init__(self, day: datetime.date, users: int = 0, orders: int = 0, revenue: int = 0, top_ups: int = 0):
+        self.day = day
+        self.users = users
+        self.orders = orders
+        self.revenue = revenue
+        self.top_ups = top_ups
+
+
 def register_models():
     Database.BASE.metadata.create_all(Database().engine)
-    Role.insert_roles()
+    with Database().session_scope():
+        Role.insert_roles()
@@ -4,7 +4,7 @@ from aiogram.types import Message, CallbackQuery
 from aiogram.utils.exceptions import BotBlocked
 
 from bot.keyboards import back, close
-from bot.database.methods import check_role, get_all_users
+from bot.database.methods.aio import check_role, get_all_users
 from bot.database.models import Permission
 from bot.misc import TgConfig
 from bot.logger_mesh import logger
@@ -15,8 +15,8 @@ async def send_message_callback_handler(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
     TgConfig.STATE[user_id] = 'waiting_for_message'
     TgConfig.STATE[f'{user_id}_message_id'] = call.message.message_id
-    role = check_role(user_id)
-    if role >= Permission.BROADCAST:
+    role = await check_role(user_id)
+    if role & Permission.BROADCAST:
         await bot.edit_message_text(chat_id=call.message.chat.id,
                                     message_id=call.message.message_id,
                                     text='Send the message for broadcast:',
@@ -33,7 +33,7 @@ async def broadcast_messages(message: Message):
     TgConfig.STATE[user_id] = None
     await bot.delete_message(chat_id=message.chat.id,
                              message_id=message.message_id)
-    users = get_all_users()
+    users = await get_all_users()
     max_users = 0
     for user_row in users:
         max_users += 1
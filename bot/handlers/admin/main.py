@@ -2,7 +2,8 @@ from aiogram import Dispatcher
 from aiogram.types import CallbackQuery
 
 from bot.keyboards import console
-from bot.database.methods import check_role
+from bot.database.methods.aio import check_role
+from bot.database.models import Permission
 from bot.misc import TgConfig
 
 from bot.handlers.admin.broadcast import register_mailing
@@ -14,8 +15,8 @@ from bot.handlers.other import get_bot_user_ids
 async def console_callback_handler(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
     TgConfig.STATE[user_id] = None
-    role = check_role(user_id)
-    if role > 1:
+    role = await check_role(user_id)
+    if role & Permission.CONSOLE:
         await bot.edit_message_text('⛩️ Administrator menu',
                                     chat_id=call.message.chat.id,
                                     message_id=call.message.message_id,
@@ -1,17 +1,18 @@
+import asyncio
 import datetime
 import os
+import time
+from contextlib import asynccontextmanager
 from io import BytesIO
 
 from aiogram import Dispatcher
 from aiogram.types import Message, CallbackQuery
 from aiogram.utils.exceptions import ChatNotFound
 
-from bot.database.methods import check_role, select_today_users, select_admins, get_user_count, select_today_orders, \
-    select_all_orders, select_today_operations, select_users_balance, select_all_operations, select_count_items, \
-    select_count_goods, select_count_categories, select_count_bought_items, check_category, create_category, \
-    delete_category, update_category, check_item, create_item, add_values_to_item, update_item, \
+from bot.database.methods.aio import check_role, get_dashboard_stats, check_category, create_category, \
+    delete_category, update_category, check_item, create_item, add_values_to_item, add_values_to_item_bulk, update_item, \
     delete_item, check_value, delete_only_items, select_bought_item
-from bot.utils.files import get_next_file_path
+from bot.utils.files import get_next_file_path, uploaded_values
 from bot.database.models import Permission
 from bot.handlers.other import get_bot_user_ids
 from bot.keyboards import shop_management, goods_management, categories_management, back, item_management, \
@@ -20,11 +21,52 @@ from bot.logger_mesh import logger
 from bot.misc import TgConfig
 
 
+@asynccontextmanager
+async def upload_progress(bot, chat_id: int, message_id: int, interval: float = 2.0):
+    """Yield a callback that reports stored line counts in the admin's message.
+
+    The callback is invoked from a database thread, so edits are scheduled on the
+    event loop and throttled to one per ``interval`` seconds. On exit the scheduled
+    edits are awaited, so a late one cannot overwrite the result shown next.
+    """
+    loop = asyncio.get_running_loop()
+    last_report = time.monotonic()
+    pending = []
+
+    def report(done: int) -> None:
+        nonlocal last_report
+        now = time.monotonic()
+        if now - last_report < interval:
+            return
+        last_report = now
+        pending.append(asyncio.run_coroutine_threadsafe(
+            bot.edit_message_text(f'⏳ Uploading... {done} lines stored',
+                                  chat_id=chat_id,
+                                  message_id=message_id),
+            loop))
+
+    try:
+        yield report
+    finally:
+        for edit in pending:
+            try:
+                await asyncio.wrap_future(edit)
+            except Exception:
+                pass
+
+
+def upload_summary(text: str, result=None) -> str:
+    """Append the number of skipped duplicate values of an upload ``result`` to ``text``."""
+    if result and result.duplicates:
+        text += f'\n♻️ Duplicates skipped: <b>{result.duplicates}</b>'
+    return text
+
+
 async def shop_callback_handler(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
     TgConfig.STATE[user_id] = None
-    role = check_role(user_id)
-    if role >= Permission.SHOP_MANAGE:
+    role = await check_role(user_id)
+    if role & Permission.SHOP_MANAGE:
         await bot.edit_message_text('⛩️ Shop management menu',
                                     chat_id=call.message.chat.id,
                                     message_id=call.message.message_id,
@@ -36,9 +78,9 @@ async def shop_callback_handler(call: CallbackQuery):
 async def logs_callback_handler(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
     TgConfig.STATE[user_id] = None
-    role = check_role(user_id)
+    role = await check_role(user_id)
     file_path = 'bot.log'
-    if role >= Permission.SHOP_MANAGE:
+    if role & Permission.SHOP_MANAGE:
         if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
             with open(file_path, 'rb') as document:
                 await bot.send_document(chat_id=call.message.chat.id,
@@ -53,8 +95,8 @@ async def logs_callback_handler(call: CallbackQuery):
 async def goods_management_callback_handler(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
     TgConfig.STATE[user_id] = None
-    role = check_role(user_id)
-    if role >= Permission.SHOP_MANAGE:
+    role = await check_role(user_id)
+    if role & Permission.SHOP_MANAGE:
         await bot.edit_message_text('🛒 Prekių valdymo meniu',
                                     chat_id=call.message.chat.id,
                                     message_id=call.message.message_id,
@@ -66,8 +108,8 @@ async def goods_management_callback_handler(call: CallbackQuery):
 async def categories_callback_handler(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
     TgConfig.STATE[user_id] = None
-    role = check_role(user_id)
-    if role >= Permission.SHOP_MANAGE:
+    role = await check_role(user_id)
+    if role & Permission.SHOP_MANAGE:
         await bot.edit_message_text('🧾 Kategorijų valdymo meniu',
                                     chat_id=call.message.chat.id,
                                     message_id=call.message.message_id,
@@ -80,8 +122,8 @@ async def add_category_callback_handler(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
     TgConfig.STATE[user_id] = 'add_category'
     TgConfig.STATE[f'{user_id}_message_id'] = call.message.message_id
-    role = check_role(user_id)
-    if role >= Permission.SHOP_MANAGE:
+    role = await check_role(user_id)
+    if role & Permission.SHOP_MANAGE:
         await bot.edit_message_text('Enter category name',
                                     chat_id=call.message.chat.id,
                                     message_id=call.message.message_id,
@@ -94,8 +136,8 @@ async def add_subcategory_callback_handler(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
     TgConfig.STATE[user_id] = 'add_subcategory_parent'
     TgConfig.STATE[f'{user_id}_message_id'] = call.message.message_id
-    role = check_role(user_id)
-    if role >= Permission.SHOP_MANAGE:
+    role = await check_role(user_id)
+    if role & Permission.SHOP_MANAGE:
         await bot.edit_message_text('Enter parent category name',
                                     chat_id=call.message.chat.id,
                                     message_id=call.message.message_id,
@@ -107,28 +149,28 @@ async def add_subcategory_callback_handler(call: CallbackQuery):
 async def statistics_callback_handler(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
     TgConfig.STATE[user_id] = None
-    role = check_role(user_id)
-    if role >= Permission.SHOP_MANAGE:
-        today = datetime.datetime.now().strftime("%Y-%m-%d")
+    role = await check_role(user_id)
+    if role & Permission.SHOP_MANAGE:
+        stats = await get_dashboard_stats(datetime.datetime.now().strftime("%Y-%m-%d"))
         await bot.edit_message_text('Shop statistics:\n'
                                     '➖➖➖➖➖➖➖➖➖➖➖➖➖\n'
                                     '<b>◽USERS</b>\n'
-                                    f'◾️Users in last 24h: {select_today_users(today)}\n'
-                                    f'◾️Total administrators: {select_admins()}\n'
-                                    f'◾️Total users: {get_user_count()}\n'
+                                    f'◾️Users in last 24h: {stats.today_users}\n'
+                                    f'◾️Total administrators: {stats.admins}\n'
+                                    f'◾️Total users: {stats.users}\n'
                                     '➖➖➖➖➖➖➖➖➖➖➖➖➖\n'
                                     '◽<b>FUNDS</b>\n'
-                                    f'◾Sales in 24h: {select_today_orders(today)}€\n'
-                                    f'◾Items sold for: {select_all_orders()}€\n'
-                                    f'◾Top-ups in 24h: {select_today_operations(today)}€\n'
-                                    f'◾Funds in system: {select_users_balance()}€\n'
-                                    f'◾Total topped up: {select_all_operations()}€\n'
+                                    f'◾Sales in 24h: {stats.today_revenue}€\n'
+                                    f'◾Items sold for: {stats.revenue}€\n'
+                                    f'◾Top-ups in 24h: {stats.today_top_ups}€\n'
+                                    f'◾Funds in system: {stats.balance}€\n'
+                                    f'◾Total topped up: {stats.top_ups}€\n'
                                     '➖➖➖➖➖➖➖➖➖➖➖➖➖\n'
                                     '◽<b>OTHER</b>\n'
-                                    f'◾Items: {select_count_items()}pcs.\n'
-                                    f'◾Positions: {select_count_goods()}pcs.\n'
-                                    f'◾Categories: {select_count_categories()}pcs.\n'
-                                    f'◾Items sold: {select_count_bought_items()}pcs.',
+                                    f'◾Items: {stats.items}pcs.\n'
+                                    f'◾Positions: {stats.goods}pcs.\n'
+                                    f'◾Categories: {stats.categories}pcs.\n'
+                                    f'◾Items sold: {stats.sold}pcs.',
                                     chat_id=call.message.chat.id,
                                     message_id=call.message.message_id,
                                     reply_markup=back('shop_management'),
@@ -142,7 +184,7 @@ async def process_category_for_add(message: Message):
     msg = message.text
     message_id = TgConfig.STATE.get(f'{user_id}_message_id')
     TgConfig.STATE[user_id] = None
-    category = check_category(msg)
+    category = await check_category(msg)
     await bot.delete_message(chat_id=message.chat.id,
                              message_id=message.message_id)
     if category:
@@ -151,7 +193,7 @@ async def process_category_for_add(message: Message):
                                     text='❌ Category not created (already exists)',
                                     reply_markup=back('categories_management'))
         return
-    create_category(msg)
+    await create_category(msg)
     await bot.edit_message_text(chat_id=message.chat.id,
                                 message_id=message_id,
                                 text='✅ Category created',
@@ -168,7 +210,7 @@ async def process_subcategory_parent(message: Message):
     TgConfig.STATE[user_id] = 'add_subcategory_name'
     TgConfig.STATE[f'{user_id}_parent'] = parent
     await bot.delete_message(chat_id=message.chat.id, message_id=message.message_id)
-    if not check_category(parent):
+    if not await check_category(parent):
         await bot.edit_message_text(chat_id=message.chat.id,
                                     message_id=message_id,
                                     text='❌ Parent category does not exist',
@@ -188,13 +230,13 @@ async def process_subcategory_name(message: Message):
     parent = TgConfig.STATE.get(f'{user_id}_parent')
     TgConfig.STATE[user_id] = None
     await bot.delete_message(chat_id=message.chat.id, message_id=message.message_id)
-    if check_category(sub):
+    if await check_category(sub):
         await bot.edit_message_text(chat_id=message.chat.id,
                                     message_id=message_id,
                                     text='❌ Subcategory already exists',
                                     reply_markup=back('categories_management'))
         return
-    create_category(sub, parent)
+    await create_category(sub, parent)
     await bot.edit_message_text(chat_id=message.chat.id,
                                 message_id=message_id,
                                 text='✅ Subcategory created',
@@ -208,8 +250,8 @@ async def delete_category_callback_handler(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
     TgConfig.STATE[user_id] = 'delete_category'
     TgConfig.STATE[f'{user_id}_message_id'] = call.message.message_id
-    role = check_role(user_id)
-    if role >= Permission.SHOP_MANAGE:
+    role = await check_role(user_id)
+    if role & Permission.SHOP_MANAGE:
         await bot.edit_message_text('Enter category name',
                                     chat_id=call.message.chat.id,
                                     message_id=call.message.message_id,
@@ -223,7 +265,7 @@ async def process_category_for_delete(message: Message):
     msg = message.text
     message_id = TgConfig.STATE.get(f'{user_id}_message_id')
     TgConfig.STATE[user_id] = None
-    category = check_category(msg)
+    category = await check_category(msg)
     await bot.delete_message(chat_id=message.chat.id,
                              message_id=message.message_id)
     if not category:
@@ -232,7 +274,7 @@ async def process_category_for_delete(message: Message):
                                     text='❌ Category not deleted (does not exist)',
                                     reply_markup=back('categories_management'))
         return
-    delete_category(msg)
+    await delete_category(msg)
     await bot.edit_message_text(chat_id=message.chat.id,
                                 message_id=message_id,
                                 text='✅ Category deleted',
@@ -246,8 +288,8 @@ async def update_category_callback_handler(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
     TgConfig.STATE[f'{user_id}_message_id'] = call.message.message_id
     TgConfig.STATE[user_id] = 'check_category'
-    role = check_role(user_id)
-    if role >= Permission.SHOP_MANAGE:
+    role = await check_role(user_id)
+    if role & Permission.SHOP_MANAGE:
         await bot.edit_message_text('Enter category name to update:',
                                     chat_id=call.message.chat.id,
                                     message_id=call.message.message_id,
@@ -261,7 +303,7 @@ async def check_category_for_update(message: Message):
     category_name = message.text
     message_id = TgConfig.STATE.get(f'{user_id}_message_id')
     await bot.delete_message(chat_id=message.chat.id, message_id=message.message_id)
-    category = check_category(category_name)
+    category = await check_category(category_name)
     if not category:
         await bot.edit_message_text(chat_id=message.chat.id,
                                     message_id=message_id,
@@ -283,7 +325,7 @@ async def check_category_name_for_update(message: Message):
     old_name = TgConfig.STATE.get(f'{user_id}_check_category')
     TgConfig.STATE[user_id] = None
     await bot.delete_message(chat_id=message.chat.id, message_id=message.message_id)
-    update_category(old_name, category)
+    await update_category(old_name, category)
     await bot.edit_message_text(chat_id=message.chat.id,
                                 message_id=message_id,
                                 text=f'✅ Category "{category}" updated successfully.',
@@ -296,8 +338,8 @@ async def check_category_name_for_update(message: Message):
 async def goods_settings_menu_callback_handler(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
     TgConfig.STATE[user_id] = None
-    role = check_role(user_id)
-    if role >= Permission.SHOP_MANAGE:
+    role = await check_role(user_id)
+    if role & Permission.SHOP_MANAGE:
         await bot.edit_message_text('🛒 Pasirinkite veiksmą šiai prekei',
                                     chat_id=call.message.chat.id,
                                     message_id=call.message.message_id,
@@ -310,8 +352,8 @@ async def add_item_callback_handler(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
     TgConfig.STATE[f'{user_id}_message_id'] = call.message.message_id
     TgConfig.STATE[user_id] = 'create_item_name'
-    role = check_role(user_id)
-    if role >= Permission.SHOP_MANAGE:
+    role = await check_role(user_id)
+    if role & Permission.SHOP_MANAGE:
         await bot.edit_message_text('🏷️ Įveskite prekės pavadinimą',
                                     chat_id=call.message.chat.id,
                                     message_id=call.message.message_id,
@@ -324,7 +366,7 @@ async def check_item_name_for_add(message: Message):
     bot, user_id = await get_bot_user_ids(message)
     item_name = message.text
     message_id = TgConfig.STATE.get(f'{user_id}_message_id')
-    item = check_item(item_name)
+    item = await check_item(item_name)
     await bot.delete_message(chat_id=message.chat.id, message_id=message.message_id)
     if item:
         await bot.edit_message_text(chat_id=message.chat.id,
@@ -378,7 +420,7 @@ async def check_category_for_add_item(message: Message):
     message_id = TgConfig.STATE.get(f'{user_id}_message_id')
     await bot.delete_message(chat_id=message.chat.id,
                              message_id=message.message_id)
-    category = check_category(category_name)
+    category = await check_category(category_name)
     if not category:
         await bot.edit_message_text(chat_id=message.chat.id,
                                     message_id=message_id,
@@ -423,34 +465,26 @@ async def adding_item(message: Message):
     category_name = TgConfig.STATE.get(f'{user_id}_category')
     answer = TgConfig.STATE.get(f'{user_id}_answer')
     if answer == 'no':
-        values_list = []
-        if message.document and message.document.file_name.endswith('.txt'):
-            file = await message.document.download(BytesIO())
-            file.seek(0)
-            values_list = [line.strip() for line in file.read().decode().splitlines() if line.strip()]
-        elif message.text and os.path.isfile(message.text):
-            with open(message.text, 'r', encoding='utf-8') as f:
-                values_list = [line.strip() for line in f if line.strip()]
-        else:
-            values_list = message.text.split(';') if message.text else []
+        await create_item(item_name, item_description, item_price, category_name)
+        async with uploaded_values(message) as values, \
+                upload_progress(bot, message.chat.id, message_id) as progress:
+            result = await add_values_to_item_bulk(item_name, values, False, progress)
         await bot.delete_message(chat_id=message.chat.id,
                                  message_id=message.message_id)
-        create_item(item_name, item_description, item_price, category_name)
-        for i in values_list:
-            add_values_to_item(item_name, i, False)
         group_id = TgConfig.GROUP_ID
         if group_id:
             try:
                 await bot.send_message(chat_id=group_id,
                                        text=f'🎁 Upload\n'
                                             f'🏷️ Item: <b>{item_name}</b>'
-                                            f'\n📦 Quantity: <b>{len(values_list)}</b>',
+                                            f'\n📦 Quantity: <b>{result.stored}</b>',
                                        parse_mode='HTML')
             except ChatNotFound:
                 pass
         await bot.edit_message_text(chat_id=message.chat.id,
                                     message_id=message_id,
-                                    text='✅ Item created, product added',
+                                    text=upload_summary('✅ Item created, product added', result),
+                                    parse_mode='HTML',
                                     reply_markup=back('item-management'))
         admin_info = await bot.get_chat(user_id)
         logger.info(f"User {user_id} ({admin_info.first_name}) "
@@ -464,8 +498,8 @@ async def adding_item(message: Message):
             value = message.text
         await bot.delete_message(chat_id=message.chat.id,
                                  message_id=message.message_id)
-        create_item(item_name, item_description, item_price, category_name)
-        add_values_to_item(item_name, value, True)
+        await create_item(item_name, item_description, item_price, category_name)
+        await add_values_to_item(item_name, value, True)
         group_id = TgConfig.GROUP_ID if TgConfig.GROUP_ID != -988765433 else None
         if group_id:
             try:
@@ -489,8 +523,8 @@ async def update_item_amount_callback_handler(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
     TgConfig.STATE[f'{user_id}_message_id'] = call.message.message_id
     TgConfig.STATE[user_id] = 'update_amount_of_item'
-    role = check_role(user_id)
-    if role >= Permission.SHOP_MANAGE:
+    role = await check_role(user_id)
+    if role & Permission.SHOP_MANAGE:
         await bot.edit_message_text('🏷️ Įveskite prekės pavadinimą',
                                     chat_id=call.message.chat.id,
                                     message_id=call.message.message_id,
@@ -505,14 +539,14 @@ async def check_item_name_for_amount_upd(message: Message):
     message_id = TgConfig.STATE.get(f'{user_id}_message_id')
     await bot.delete_message(chat_id=message.chat.id,
                              message_id=message.message_id)
-    item = check_item(item_name)
+    item = await check_item(item_name)
     if not item:
         await bot.edit_message_text(chat_id=message.chat.id,
                                     message_id=message_id,
                                     text='❌ Товар не может быть добавлен (Такой позиции не существует)',
                                     reply_markup=back('goods_management'))
     else:
-        if check_value(item_name) is False:
+        if await check_value(item_name) is False:
             TgConfig.STATE[user_id] = 'add_new_amount'
             TgConfig.STATE[f'{user_id}_name'] = message.text
             await bot.edit_message_text(
@@ -529,48 +563,40 @@ async def check_item_name_for_amount_upd(message: Message):
 
 async def updating_item_amount(message: Message):
     bot, user_id = await get_bot_user_ids(message)
-    values_list = []
-    if message.document and message.document.file_name.endswith('.txt'):
-        file = await message.document.download(BytesIO())
-        file.seek(0)
-        values_list = [line.strip() for line in file.read().decode().splitlines() if line.strip()]
-    elif message.text and os.path.isfile(message.text):
-        with open(message.text, 'r', encoding='utf-8') as f:
-            values_list = [line.strip() for line in f if line.strip()]
-    else:
-        values_list = message.text.split(';') if message.text else []
     TgConfig.STATE[user_id] = None
     message_id = TgConfig.STATE.get(f'{user_id}_message_id')
     item_name = TgConfig.STATE.get(f'{user_id}_name')
+    async with uploaded_values(message) as values, \
+            upload_progress(bot, message.chat.id, message_id) as progress:
+        result = await add_values_to_item_bulk(item_name, values, False, progress)
     await bot.delete_message(chat_id=message.chat.id,
                              message_id=message.message_id)
-    for i in values_list:
-        add_values_to_item(item_name, i, False)
     group_id = TgConfig.GROUP_ID if TgConfig.GROUP_ID != -988765433 else None
     if group_id:
         try:
             await bot.send_message(chat_id=group_id,
                                    text=f'🎁 Upload\n'
                                         f'🏷️ Item: <b>{item_name}</b>'
-                                        f'\n📦 Quantity: <b>{len(values_list)}</b>',
+                                        f'\n📦 Quantity: <b>{result.stored}</b>',
                                    parse_mode='HTML')
         except ChatNotFound:
             pass
     await bot.edit_message_text(chat_id=message.chat.id,
                                 message_id=message_id,
-                                text='✅ Товар добавлен',
+                                text=upload_summary('✅ Товар добавлен', result),
+                                parse_mode='HTML',
                                 reply_markup=back('goods_management'))
     admin_info = await bot.get_chat(user_id)
     logger.info(f"User {user_id} ({admin_info.first_name}) "
-                f'добавил товары к позиции "{item_name}" в количестве {len(values_list)} шт')
+                f'добавил товары к позиции "{item_name}" в количестве {result.stored} шт')
 
 
 async def update_item_callback_handler(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
     TgConfig.STATE[user_id] = 'check_item_name'
     TgConfig.STATE[f'{user_id}_message_id'] = call.message.message_id
-    role = check_role(user_id)
-    if role >= Permission.SHOP_MANAGE:
+    role = await check_role(user_id)
+    if role & Permission.SHOP_MANAGE:
         await bot.edit_message_text('🏷️ Įveskite prekės pavadinimą',
                                     chat_id=call.message.chat.id,
                                     message_id=call.message.message_id,
@@ -585,7 +611,7 @@ async def check_item_name_for_update(message: Message):
     message_id = TgConfig.STATE.get(f'{user_id}_message_id')
     await bot.delete_message(chat_id=message.chat.id,
                              message_id=message.message_id)
-    item = check_item(item_name)
+    item = await check_item(item_name)
     if not item:
         await bot.edit_message_text(chat_id=message.chat.id,
                                     message_id=message_id,
@@ -641,7 +667,7 @@ async def update_item_price(message: Message):
         return
     TgConfig.STATE[f'{user_id}_price'] = message.text
     item_old_name = TgConfig.STATE.get(f'{user_id}_old_name')
-    if check_value(item_old_name) is False:
+    if await check_value(item_old_name) is False:
         await bot.edit_message_text(chat_id=message.chat.id,
                                     message_id=message_id,
                                     text='Do you want to make unlimited goods?',
@@ -664,7 +690,7 @@ async def update_item_process(call: CallbackQuery):
     price = TgConfig.STATE.get(f'{user_id}_price')
     if answer[3] == 'no':
         TgConfig.STATE[user_id] = None
-        update_item(item_old_name, item_new_name, item_description, price, category)
+        await update_item(item_old_name, item_new_name, item_description, price, category)
         await bot.edit_message_text(chat_id=call.message.chat.id,
                                     message_id=message_id,
                                     text='✅ Item updated',
@@ -691,12 +717,6 @@ async def update_item_process(call: CallbackQuery):
 
 async def update_item_infinity(message: Message):
     bot, user_id = await get_bot_user_ids(message)
-    if message.document and message.document.file_name.endswith('.txt'):
-        file = await message.document.download(BytesIO())
-        file.seek(0)
-        msg = file.read().decode()
-    else:
-        msg = message.text
     change = TgConfig.STATE[f'{user_id}_change']
     message_id = TgConfig.STATE.get(f'{user_id}_message_id')
     item_old_name = TgConfig.STATE.get(f'{user_id}_old_name')
@@ -704,21 +724,29 @@ async def update_item_infinity(message: Message):
     item_description = TgConfig.STATE.get(f'{user_id}_description')
     category = TgConfig.STATE.get(f'{user_id}_category')
     price = TgConfig.STATE.get(f'{user_id}_price')
-    await bot.delete_message(chat_id=message.chat.id,
-                             message_id=message.message_id)
+    result = None
     if change == 'make':
-        delete_only_items(item_old_name)
-        add_values_to_item(item_old_name, msg, False)
+        if message.document and message.document.file_name.endswith('.txt'):
+            file = await message.document.download(BytesIO())
+            file.seek(0)
+            msg = file.read().decode()
+        else:
+            msg = message.text
+        await delete_only_items(item_old_name)
+        await add_values_to_item(item_old_name, msg, True)
     elif change == 'deny':
-        delete_only_items(item_old_name)
-        values_list = [line.strip() for line in msg.splitlines() if line.strip()]
-        for i in values_list:
-            add_values_to_item(item_old_name, i, False)
+        await delete_only_items(item_old_name)
+        async with uploaded_values(message, separator=None) as values, \
+                upload_progress(bot, message.chat.id, message_id) as progress:
+            result = await add_values_to_item_bulk(item_old_name, values, False, progress)
+    await bot.delete_message(chat_id=message.chat.id,
+                             message_id=message.message_id)
     TgConfig.STATE[user_id] = None
-    update_item(item_old_name, item_new_name, item_description, price, category)
+    await update_item(item_old_name, item_new_name, item_description, price, category)
     await bot.edit_message_text(chat_id=message.chat.id,
                                 message_id=message_id,
-                                text='✅ Item updated',
+                                text=upload_summary('✅ Item updated', result),
+                                parse_mode='HTML',
                                 reply_markup=back('goods_management'))
     admin_info = await bot.get_chat(user_id)
     logger.info(f"User {user_id} ({admin_info.first_name}) "
@@ -729,8 +757,8 @@ async def delete_item_callback_handler(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
     TgConfig.STATE[f'{user_id}_message_id'] = call.message.message_id
     TgConfig.STATE[user_id] = 'process_removing_item'
-    role = check_role(user_id)
-    if role >= Permission.SHOP_MANAGE:
+    role = await check_role(user_id)
+    if role & Permission.SHOP_MANAGE:
         await bot.edit_message_text('🏷️ Įveskite prekės pavadinimą',
                                     chat_id=call.message.chat.id,
                                     message_id=call.message.message_id,
@@ -744,7 +772,7 @@ async def delete_str_item(message: Message):
     msg = message.text
     TgConfig.STATE[user_id] = None
     message_id = TgConfig.STATE.get(f'{user_id}_message_id')
-    item = check_item(msg)
+    item = await check_item(msg)
     await bot.delete_message(chat_id=message.chat.id,
                              message_id=message.message_id)
     if not item:
@@ -753,7 +781,7 @@ async def delete_str_item(message: Message):
                                     text='❌ Item not deleted (does not exist)',
                                     reply_markup=back('goods_management'))
         return
-    delete_item(msg)
+    await delete_item(msg)
     await bot.edit_message_text(chat_id=message.chat.id,
                                 message_id=message_id,
                                 text='✅ Item deleted',
@@ -767,8 +795,8 @@ async def show_bought_item_callback_handler(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
     TgConfig.STATE[user_id] = 'show_item'
     TgConfig.STATE[f'{user_id}_message_id'] = call.message.message_id
-    role = check_role(user_id)
-    if role >= Permission.SHOP_MANAGE:
+    role = await check_role(user_id)
+    if role & Permission.SHOP_MANAGE:
         await bot.edit_message_text(
             '🔍 Enter the unique ID of the purchased item',
             chat_id=call.message.chat.id,
@@ -783,7 +811,7 @@ async def process_item_show(message: Message):
     msg = message.text
     message_id = TgConfig.STATE.get(f'{user_id}_message_id')
     TgConfig.STATE[user_id] = None
-    item = select_bought_item(msg)
+    item = await select_bought_item(msg)
     await bot.delete_message(chat_id=message.chat.id, message_id=message.message_id)
     if item:
         await bot.edit_message_text(
@@ -5,9 +5,8 @@ from aiogram.types import Message, CallbackQuery
 from aiogram.utils.exceptions import BotBlocked
 
 from bot.keyboards import back, user_manage_check, user_management, user_items_list, close
-from bot.database.methods import check_role, check_user, select_user_operations, select_user_items, \
-    check_role_name_by_id, check_user_referrals, select_bought_items, set_role, create_operation, update_balance, \
-    bought_items_list
+from bot.database.methods.aio import check_role, check_user, select_user_items, \
+    check_role_name_by_id, select_bought_items_page, set_role, create_operation, update_balance
 from bot.misc import TgConfig
 from bot.database.models import Permission
 from bot.handlers.other import get_bot_user_ids
@@ -17,8 +16,8 @@ async def user_callback_handler(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
     TgConfig.STATE[f'{user_id}_message_id'] = call.message.message_id
     TgConfig.STATE[user_id] = 'user_id_for_check'
-    role = check_role(user_id)
-    if role >= Permission.USERS_MANAGE:
+    role = await check_role(user_id)
+    if role & Permission.USERS_MANAGE:
         await bot.edit_message_text('👤 Enter the user ID to view or edit their data',
                                     chat_id=call.message.chat.id,
                                     message_id=call.message.message_id,
@@ -32,7 +31,7 @@ async def check_user_data(message: Message):
     msg = message.text
     TgConfig.STATE[user_id] = None
     message_id = TgConfig.STATE.get(f'{user_id}_message_id')
-    user = check_user(msg)
+    user = await check_user(msg)
     await bot.delete_message(chat_id=message.chat.id,
                              message_id=message.message_id)
     if not message.text.isdigit():
@@ -60,18 +59,14 @@ async def user_profile_view(call: CallbackQuery):
     bot, admin_id = await get_bot_user_ids(call)
     TgConfig.STATE[user_id] = None
     TgConfig.STATE[f'{admin_id}_user_data'] = user_id
-    user = check_user(user_id)
-    admin_permissions = check_role(admin_id)
-    user_permissions = check_role(user_id)
+    user = await check_user(user_id)
+    admin_permissions = await check_role(admin_id)
+    user_permissions = await check_role(user_id)
     user_info = await bot.get_chat(user_id)
-    operations = select_user_operations(user_id)
-    overall_balance = 0
-    if operations:
-        for i in operations:
-            overall_balance += i
-    items = select_user_items(user_id)
-    role = check_role_name_by_id(user.role_id)
-    referrals = check_user_referrals(user.telegram_id)
+    overall_balance = user.total_topped_up
+    items = user.purchases_count
+    role = await check_role_name_by_id(user.role_id)
+    referrals = user.referral_count
     await bot.edit_message_text(
         chat_id=call.message.chat.id,
         message_id=call.message.message_id,
@@ -95,13 +90,13 @@ async def user_profile_view(call: CallbackQuery):
 async def user_items_callback_handler(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
     user_data = call.data[11:]
-    role = check_role(user_id)
-    if role >= Permission.ADMINS_MANAGE:
+    role = await check_role(user_id)
+    if role & Permission.ADMINS_MANAGE:
         TgConfig.STATE[f'{user_id}_back'] = f'user-items_{user_data}'
-        bought_goods = select_bought_items(user_data)
-        goods = bought_items_list(user_id)
-        max_index = len(goods) // 10
-        if len(goods) % 10 == 0:
+        bought_goods = await select_bought_items_page(int(user_data))
+        goods = await select_user_items(user_data)
+        max_index = goods // 10
+        if goods % 10 == 0:
             max_index -= 1
         keyboard = user_items_list(bought_goods, user_data, f'check-user_{user_data}',
                                    f'user-items_{user_data}', 0, max_index)
@@ -118,9 +113,9 @@ async def process_admin_for_purpose(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
     user_data = call.data[10:]
     user_info = await bot.get_chat(user_data)
-    role = check_role(user_id)
-    if role >= Permission.ADMINS_MANAGE:
-        set_role(user_data, 2)
+    role = await check_role(user_id)
+    if role & Permission.ADMINS_MANAGE:
+        await set_role(user_data, 2)
         await bot.edit_message_text(
             chat_id=call.message.chat.id,
             message_id=call.message.message_id,
@@ -147,9 +142,9 @@ async def process_admin_for_remove(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
     user_data = call.data[13:]
     user_info = await bot.get_chat(user_data)
-    role = check_role(user_id)
-    if role >= Permission.ADMINS_MANAGE:
-        set_role(user_data, 1)
+    role = await check_role(user_id)
+    if role & Permission.ADMINS_MANAGE:
+        await set_role(user_data, 1)
         await bot.edit_message_text(
             chat_id=call.message.chat.id,
             message_id=call.message.message_id,
@@ -177,8 +172,8 @@ async def replenish_user_balance_callback_handler(call: CallbackQuery):
     user_data = call.data[18:]
     TgConfig.STATE[f'{user_id}_message_id'] = call.message.message_id
     TgConfig.STATE[user_id] = 'process_replenish_user_balance'
-    role = check_role(user_id)
-    if role >= Permission.USERS_MANAGE:
+    role = await check_role(user_id)
+    if role & Permission.USERS_MANAGE:
         await bot.edit_message_text(
             chat_id=call.message.chat.id,
             message_id=call.message.message_id,
@@ -204,10 +199,9 @@ async def process_replenish_user_balance(message: Message):
             reply_markup=back(f'check-user_{user_data}')
         )
         return
-    current_time = datetime.datetime.now()
-    formatted_time = current_time.strftime("%Y-%m-%d %H:%M:%S")
-    create_operation(user_data, msg, formatted_time)
-    update_balance(user_data, msg)
+    current_time = datetime.datetime.now().replace(microsecond=0)
+    await create_operation(user_data, msg, current_time)
+    await update_balance(user_data, msg)
     user_info = await bot.get_chat(user_data)
     await bot.edit_message_text(
         chat_id=message.chat.id,
@@ -16,38 +16,35 @@ from aiogram.types import (
     InlineKeyboardButton,
 )
 
-from bot.database.methods import (
-    select_max_role_id,
-    create_user,
-    check_role,
-    check_user,
-    get_all_categories,
-    get_all_items,
-    select_bought_items,
+from bot.database.methods.aio import (
+    get_categories_page,
+    get_items_page,
+    count_items,
+    select_bought_items_page,
+    select_user_items,
     get_bought_item_info,
     get_item_info,
-    select_item_values_amount,
     get_user_balance,
-    add_bought_item,
-    buy_item_for_balance,
-    select_user_operations,
-    select_user_items,
-    check_user_referrals,
     start_operation,
     select_unfinished_operations,
     get_user_referral,
     finish_operation,
     update_balance,
     create_operation,
-    bought_items_list,
-    check_value,
-    get_subcategories,
+    get_subcategories_page,
+    get_category_availability,
     get_category_parent,
     get_user_language,
     update_user_language,
     get_unfinished_operation,
+    purchase_item,
+    reserve_item,
+    checkout_reservations,
+    release_reservations,
+    get_basket,
+    check_role,
 )
-from bot.utils.files import pop_line_from_file
+from bot.database.models import Permission
 from bot.handlers.other import get_bot_user_ids, get_bot_info
 from bot.keyboards import (
     main_menu,
@@ -69,6 +66,8 @@ from bot.keyboards import (
 )
 from bot.localization import t
 from bot.logger_mesh import logger
+from bot.utils.user_context import UserContext
+from bot.utils.files import lines_count
 from bot.misc import TgConfig, EnvKeys
 from bot.misc.payment import quick_pay, check_payment_status
 from bot.misc.nowpayments import create_payment, check_payment
@@ -101,12 +100,11 @@ SKIN_RANGES = [
 # --------------------------------
 
 
-def build_menu_text(user_obj, balance: float, purchases: int, lang: str) -> str:
+def build_menu_text(user_obj, balance: float, purchases: int, lang: str, basket_count: int = 0) -> str:
     """Return main menu text. Greeting remains in English regardless of language."""
     mention = (
         f"<a href='tg://user?id={user_obj.id}'>{html.escape(user_obj.full_name)}</a>"
     )
-    basket_count = len(TgConfig.BASKETS.get(user_obj.id, []))
     return (
         f"{t(lang, 'hello', user=mention)}\n"
         f"{t(lang, 'balance', balance=f'{balance:.2f}')}\n"
@@ -116,22 +114,35 @@ def build_menu_text(user_obj, balance: float, purchases: int, lang: str) -> str:
     )
 
 
-def build_subcategory_description(parent: str, lang: str) -> str:
+async def build_subcategory_description(parent: str, lang: str) -> str:
     """Return formatted description listing subcategories and their items."""
     lines = [f" {parent}", ""]
-    for sub in get_subcategories(parent):
+    subcategories = {}
+    for row in await get_category_availability(parent):
+        if row.parent_name != parent:
+            continue
+        goods = subcategories.setdefault(row.category_name, [])
+        if row.item_name is not None:
+            goods.append(row)
+    counts = await asyncio.to_thread(
+        lambda: {
+            item.item_name: lines_count(item.item_name)
+            for goods in subcategories.values()
+            for item in goods
+            if not item.is_infinite
+        }
+    )
+    for sub, goods in subcategories.items():
         lines.append(f"🏘️ {sub}:")
-        goods = get_all_items(sub)
         for item in goods:
-            info = get_item_info(item)
-            amount = select_item_values_amount(item) if not check_value(item) else "∞"
-            lines.append(f"    • {item} ({info['price']:.2f}€) - {amount}")
+            amount = counts[item.item_name] if not item.is_infinite else "∞"
+            lines.append(f"    • {item.item_name} ({item.price:.2f}€) - {amount}")
         lines.append("")
     lines.append(t(lang, "choose_subcategory"))
     return "\n".join(lines)
 
 
-async def start(message: Message):
+async def start(message: Message, user_context: UserContext):
     bot, user_id = await get_bot_user_ids(message)
 
     if message.chat.type != ChatType.PRIVATE:
@@ -139,22 +150,8 @@ async def start(message: Message):
 
     TgConfig.STATE[user_id] = None
 
-    owner = select_max_role_id()
-    current_time = datetime.datetime.now()
-    formatted_time = current_time.strftime("%Y-%m-%d %H:%M:%S")
-    referral_id = message.text[7:] if message.text[7:] != str(user_id) else None
-    user_role = owner if str(user_id) == EnvKeys.OWNER_ID else 1
-    create_user(
-        telegram_id=user_id,
-        registration_date=formatted_time,
-        referral_id=referral_id,
-        role=user_role,
-    )
     chat = TgConfig.CHANNEL_URL[13:]
-    role_data = check_role(user_id)
-    user_db = check_user(user_id)
-
-    user_lang = user_db.language
+    user_lang = user_context.language
     if not user_lang:
         lang_markup = InlineKeyboardMarkup(row_width=1)
         lang_markup.add(
@@ -182,23 +179,21 @@ async def start(message: Message):
         await bot.delete_message(chat_id=message.chat.id, message_id=message.message_id)
         return
 
-    balance = user_db.balance if user_db else 0
-    purchases = select_user_items(user_id)
-    markup = main_menu(role_data, chat, TgConfig.HELPER_URL, user_lang)
-    text = build_menu_text(message.from_user, balance, purchases, user_lang)
+    markup = main_menu(user_context.permissions, chat, TgConfig.HELPER_URL, user_lang)
+    text = build_menu_text(message.from_user, user_context.balance, user_context.purchases, user_lang,
+                           user_context.basket)
     await bot.send_message(user_id, text, reply_markup=markup)
     await bot.delete_message(chat_id=message.chat.id, message_id=message.message_id)
 
 
-async def back_to_menu_callback_handler(call: CallbackQuery):
+async def back_to_menu_callback_handler(call: CallbackQuery, user_context: UserContext):
     bot, user_id = await get_bot_user_ids(call)
-    user = check_user(call.from_user.id)
-    user_lang = get_user_language(user_id) or "en"
+    user_lang = user_context.language or "en"
     markup = main_menu(
-        user.role_id, TgConfig.CHANNEL_URL, TgConfig.HELPER_URL, user_lang
+        user_context.permissions, TgConfig.CHANNEL_URL, TgConfig.HELPER_URL, user_lang
     )
-    purchases = select_user_items(user_id)
-    text = build_menu_text(call.from_user, user.balance, purchases, user_lang)
+    text = build_menu_text(call.from_user, user_context.balance, user_context.purchases, user_lang,
+                           user_context.basket)
     await bot.edit_message_text(
         text,
         chat_id=call.message.chat.id,
@@ -279,12 +274,10 @@ async def region_item_handler(call: CallbackQuery):
 
 async def navigate_categories(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
-    categories = get_all_categories()
     current_index = int(call.data.split("_")[1])
-    max_index = len(categories) // 10
-    if len(categories) % 10 == 0:
-        max_index -= 1
-    if 0 <= current_index <= max_index:
+    categories, total = await get_categories_page(current_index)
+    max_index = (total - 1) // 10
+    if categories and 0 <= current_index <= max_index:
         markup = categories_list(categories, current_index, max_index)
         await bot.edit_message_text(
             message_id=call.message.message_id,
@@ -303,18 +296,18 @@ async def dummy_button(call: CallbackQuery):
     await bot.answer_callback_query(callback_query_id=call.id, text="")
 
 
-async def items_list_callback_handler(call: CallbackQuery):
+async def items_list_callback_handler(call: CallbackQuery, user_context: UserContext):
     category_name = call.data[9:]
     bot, user_id = await get_bot_user_ids(call)
     TgConfig.STATE[user_id] = None
-    subcategories = get_subcategories(category_name)
+    subcategories, total = await get_subcategories_page(category_name, 0)
     if subcategories:
-        max_index = len(subcategories) // 10
-        if len(subcategories) % 10 == 0:
-            max_index -= 1
-        markup = subcategories_list(subcategories, category_name, 0, max_index)
-        lang = get_user_language(user_id) or "en"
-        text = build_subcategory_description(category_name, lang)
+        max_index = (total - 1) // 10
+        markup = subcategories_list(
+            subcategories, category_name, 0, max_index, await get_category_parent(category_name)
+        )
+        lang = user_context.language or "en"
+        text = await build_subcategory_description(category_name, lang)
         await bot.edit_message_text(
             text,
             chat_id=call.message.chat.id,
@@ -322,12 +315,11 @@ async def items_list_callback_handler(call: CallbackQuery):
             reply_markup=markup,
         )
     else:
-        goods = get_all_items(category_name)
-        max_index = len(goods) // 10
-        if len(goods) % 10 == 0:
-            max_index -= 1
+        goods = await get_items_page(category_name)
+        TgConfig.STATE[f'{user_id}_goods_page'] = (category_name, 0, goods)
+        max_index = (await count_items(category_name) - 1) // 10
         markup = goods_list(goods, category_name, 0, max_index)
-        lang = get_user_language(user_id) or "en"
+        lang = user_context.language or "en"
         await bot.edit_message_text(
             t(lang, "select_product"),
             chat_id=call.message.chat.id,
@@ -338,13 +330,22 @@ async def items_list_callback_handler(call: CallbackQuery):
 
 async def navigate_goods(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
-    category_name = call.data.split("_")[1]
-    current_index = int(call.data.split("_")[2])
-    goods = get_all_items(category_name)
-    max_index = len(goods) // 10
-    if len(goods) % 10 == 0:
-        max_index -= 1
-    if 0 <= current_index <= max_index:
+    category_name, current_index = call.data[len("goods-page_"):].rsplit("_", 1)
+    current_index = int(current_index)
+    # the keyset cursors of the shown page are kept server side: goods names would overflow
+    # Telegram's 64-byte callback data
+    shown = TgConfig.STATE.get(f'{user_id}_goods_page')
+    if shown and shown[0] == category_name and shown[2] and current_index == shown[1] + 1:
+        goods = await get_items_page(category_name, after=shown[2][-1])
+    elif shown and shown[0] == category_name and shown[2] and current_index == shown[1] - 1:
+        goods = await get_items_page(category_name, before=shown[2][0])
+    else:
+        # an old message or a restarted bot: start over from the first page
+        current_index = 0
+        goods = await get_items_page(category_name)
+    max_index = (await count_items(category_name) - 1) // 10
+    if goods and 0 <= current_index <= max_index:
+        TgConfig.STATE[f'{user_id}_goods_page'] = (category_name, current_index, goods)
         markup = goods_list(goods, category_name, current_index, max_index)
         await bot.edit_message_text(
             message_id=call.message.message_id,
@@ -360,14 +361,14 @@ async def navigate_goods(call: CallbackQuery):
 
 async def navigate_subcategories(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
-    parent = call.data.split("_")[1]
-    current_index = int(call.data.split("_")[2])
-    subs = get_subcategories(parent)
-    max_index = len(subs) // 10
-    if len(subs) % 10 == 0:
-        max_index -= 1
-    if 0 <= current_index <= max_index:
-        markup = subcategories_list(subs, parent, current_index, max_index)
+    parent, current_index = call.data[len("subcategories-page_"):].rsplit("_", 1)
+    current_index = int(current_index)
+    subs, total = await get_subcategories_page(parent, current_index)
+    max_index = (total - 1) // 10
+    if subs and 0 <= current_index <= max_index:
+        markup = subcategories_list(
+            subs, parent, current_index, max_index, await get_category_parent(parent)
+        )
         await bot.edit_message_text(
             message_id=call.message.message_id,
             chat_id=call.message.chat.id,
@@ -380,16 +381,16 @@ async def navigate_subcategories(call: CallbackQuery):
         )
 
 
-async def item_info_callback_handler(call: CallbackQuery):
+async def item_info_callback_handler(call: CallbackQuery, user_context: UserContext):
     item_name = call.data[5:]
     bot, user_id = await get_bot_user_ids(call)
     TgConfig.STATE[user_id] = None
-    item_info_list = get_item_info(item_name)
+    item_info_list = await get_item_info(item_name)
     category = item_info_list["category_name"]
     quantity = "Quantity - unlimited"
-    if not check_value(item_name):
-        quantity = f"Quantity - {select_item_values_amount(item_name)}pcs."
-    lang = get_user_language(user_id) or "en"
+    if not item_info_list["is_infinite"]:
+        quantity = f"Quantity - {await asyncio.to_thread(lines_count, item_name)}pcs."
+    lang = user_context.language or "en"
     markup = item_info(item_name, category, lang)
     await bot.edit_message_text(
         f"🏪 Item {item_name}\n"
@@ -412,29 +413,37 @@ def home_markup(lang: str = "en"):
     )
 
 
-async def add_to_basket_handler(call: CallbackQuery):
+async def add_to_basket_handler(call: CallbackQuery, user_context: UserContext):
     item_name = call.data[len("addbasket_") :]
     bot, user_id = await get_bot_user_ids(call)
-    basket = TgConfig.BASKETS.setdefault(user_id, [])
-    basket.append(item_name)
-    await call.answer("Added to basket")
+    expires_at = datetime.datetime.now().replace(microsecond=0) + datetime.timedelta(
+        seconds=TgConfig.RESERVATION_TIME
+    )
+    if await reserve_item(user_id, item_name, expires_at, TgConfig.BASKET_LIMIT):
+        await call.answer("Added to basket")
+        return
+    if user_context.basket >= TgConfig.BASKET_LIMIT:
+        await call.answer(f"❌ The basket holds at most {TgConfig.BASKET_LIMIT} items", show_alert=True)
+        return
+    await call.answer("❌ Item out of stock or the balance does not cover the basket", show_alert=True)
 
 
-async def view_basket_handler(call: CallbackQuery):
+async def view_basket_handler(call: CallbackQuery, user_context: UserContext):
     bot, user_id = await get_bot_user_ids(call)
-    basket = TgConfig.BASKETS.get(user_id, [])
-    lang = get_user_language(user_id) or "en"
+    basket = await get_basket(user_id)
+    lang = user_context.language or "en"
     if not basket:
         await call.answer(t(lang, "basket_empty"), show_alert=True)
         return
 
     text_lines = [t(lang, "basket") + "\n"]
     markup = InlineKeyboardMarkup(row_width=1)
-    for idx, name in enumerate(basket):
-        text_lines.append(f"{idx + 1}. {name}")
+    for idx, reservation in enumerate(basket):
+        text_lines.append(f"{idx + 1}. {reservation.item_name}")
         markup.add(
             InlineKeyboardButton(
-                t(lang, "remove_item", item=name), callback_data=f"remove_{idx}"
+                t(lang, "remove_item", item=reservation.item_name),
+                callback_data=f"remove_{reservation.id}",
             )
         )
     markup.add(
@@ -449,84 +458,77 @@ async def view_basket_handler(call: CallbackQuery):
     )
 
 
-async def remove_from_basket_handler(call: CallbackQuery):
+async def remove_from_basket_handler(call: CallbackQuery, user_context: UserContext):
     bot, user_id = await get_bot_user_ids(call)
-    idx = int(call.data.split("_")[1])
-    basket = TgConfig.BASKETS.get(user_id, [])
-    if 0 <= idx < len(basket):
-        basket.pop(idx)
-    await view_basket_handler(call)
+    reservation_id = int(call.data.split("_")[1])
+    await release_reservations(user_id, reservation_id)
+    await view_basket_handler(call, user_context)
 
 
-async def clear_basket_handler(call: CallbackQuery):
+async def clear_basket_handler(call: CallbackQuery, user_context: UserContext):
     bot, user_id = await get_bot_user_ids(call)
-    TgConfig.BASKETS[user_id] = []
-    lang = get_user_language(user_id) or "en"
+    await release_reservations(user_id)
+    lang = user_context.language or "en"
     await call.answer(t(lang, "basket_empty"), show_alert=True)
 
 
-async def pay_basket_handler(call: CallbackQuery):
+async def pay_basket_handler(call: CallbackQuery, user_context: UserContext):
     bot, user_id = await get_bot_user_ids(call)
-    basket = TgConfig.BASKETS.get(user_id, [])
-    if not basket:
+    if not user_context.basket:
         await call.answer("Basket empty")
         return
-    total_price = sum(get_item_info(name)["price"] for name in basket)
-    balance = get_user_balance(user_id)
-    if balance < total_price:
+    current_time = datetime.datetime.now().replace(microsecond=0)
+    checkout = await checkout_reservations(user_id, current_time)
+    if checkout is None:
         await call.answer("Insufficient funds", show_alert=True)
         return
-    for name in list(basket):
-        fake_call = type(
-            "Fake",
-            (),
-            {
-                "data": f"buy_{name}",
-                "from_user": call.from_user,
-                "message": call.message,
-            },
-        )
-        await buy_item_callback_handler(fake_call)
-    TgConfig.BASKETS[user_id] = []
+    new_balance, bought = checkout
+    if not bought:
+        await call.answer("Basket empty")
+        return
+    lines = [f"✅ Items purchased. <b>Balance</b>: <i>{new_balance}</i>€", ""]
+    lines.extend(f"{item_name}: {value}" for item_name, value in bought)
+    await bot.edit_message_text(
+        "\n".join(lines),
+        chat_id=call.message.chat.id,
+        message_id=call.message.message_id,
+        parse_mode="HTML",
+        reply_markup=home_markup(user_context.language or "en"),
+    )
+    user_info = await bot.get_chat(user_id)
+    logger.info(
+        f"User {user_id} ({user_info.first_name})"
+        f" bought {len(bought)} items from the basket"
+    )
 
 
 async def buy_item_callback_handler(call: CallbackQuery):
     item_name = call.data[4:]
     bot, user_id = await get_bot_user_ids(call)
     msg = call.message.message_id
-    item_info_list = get_item_info(item_name)
+    item_info_list = await get_item_info(item_name)
     item_price = item_info_list["price"]
-    user_balance = get_user_balance(user_id)
-
-    if user_balance >= item_price:
-        value_line = pop_line_from_file(item_name)
+    current_time = datetime.datetime.now().replace(microsecond=0)
+    purchase = await purchase_item(user_id, item_name, item_price, current_time)
 
-        if value_line:
-            current_time = datetime.datetime.now()
-            formatted_time = current_time.strftime("%Y-%m-%d %H:%M:%S")
-            new_balance = buy_item_for_balance(user_id, item_price)
-            await bot.edit_message_text(
-                chat_id=call.message.chat.id,
-                message_id=msg,
-                text=f'✅ Item purchased. <b>Balance</b>: <i>{new_balance}</i>€\n\n{value_line}',
-                parse_mode="HTML",
-                reply_markup=home_markup(get_user_language(user_id) or "en"),
-            )
-            add_bought_item(
-                item_name,
-                value_line,
-                item_price,
-                user_id,
-                formatted_time,
-            )
+    if purchase:
+        new_balance, value_line = purchase
+        await bot.edit_message_text(
+            chat_id=call.message.chat.id,
+            message_id=msg,
+            text=f'✅ Item purchased. <b>Balance</b>: <i>{new_balance}</i>€\n\n{value_line}',
+            parse_mode="HTML",
+            reply_markup=home_markup(await get_user_language(user_id) or "en"),
+        )
 
-            user_info = await bot.get_chat(user_id)
-            logger.info(
-                f"User {user_id} ({user_info.first_name})"
-                f" bought 1 item of {item_name} for {item_price}€"
-            )
-            return
+        user_info = await bot.get_chat(user_id)
+        logger.info(
+            f"User {user_id} ({user_info.first_name})"
+            f" bought 1 item of {item_name} for {item_price}€"
+        )
+        return
 
+    if await get_user_balance(user_id) >= item_price:
         await bot.edit_message_text(
             chat_id=call.message.chat.id,
             message_id=msg,
@@ -544,24 +546,22 @@ async def buy_item_callback_handler(call: CallbackQuery):
 
 
 # Home button callback handler
-async def process_home_menu(call: CallbackQuery):
+async def process_home_menu(call: CallbackQuery, user_context: UserContext):
     await call.message.delete()
     bot, user_id = await get_bot_user_ids(call)
-    user = check_user(user_id)
-    lang = get_user_language(user_id) or "en"
-    markup = main_menu(user.role_id, TgConfig.CHANNEL_URL, TgConfig.HELPER_URL, lang)
-    purchases = select_user_items(user_id)
-    text = build_menu_text(call.from_user, user.balance, purchases, lang)
+    lang = user_context.language or "en"
+    markup = main_menu(user_context.permissions, TgConfig.CHANNEL_URL, TgConfig.HELPER_URL, lang)
+    text = build_menu_text(call.from_user, user_context.balance, user_context.purchases, lang,
+                           user_context.basket)
     await bot.send_message(user_id, text, reply_markup=markup)
 
 
-async def bought_items_callback_handler(call: CallbackQuery):
+async def bought_items_callback_handler(call: CallbackQuery, user_context: UserContext):
     bot, user_id = await get_bot_user_ids(call)
     TgConfig.STATE[user_id] = None
-    bought_goods = select_bought_items(user_id)
-    goods = bought_items_list(user_id)
-    max_index = len(goods) // 10
-    if len(goods) % 10 == 0:
+    bought_goods = await select_bought_items_page(user_id)
+    max_index = user_context.purchases // 10
+    if user_context.purchases % 10 == 0:
         max_index -= 1
     markup = user_items_list(
         bought_goods, "user", "profile", "bought_items", 0, max_index
@@ -576,14 +576,21 @@ async def bought_items_callback_handler(call: CallbackQuery):
 
 async def navigate_bought_items(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
-    goods = bought_items_list(user_id)
-    bought_goods = select_bought_items(user_id)
-    current_index = int(call.data.split("_")[1])
-    data = call.data.split("_")[2]
-    max_index = len(goods) // 10
-    if len(goods) % 10 == 0:
+    _, current_index, data, direction, cursor = call.data.split("_")
+    current_index, cursor = int(current_index), int(cursor)
+    # callback data comes from the client: only admins may page through another user's purchases
+    if data != "user" and not await check_role(user_id) & Permission.ADMINS_MANAGE:
+        data = "user"
+    buyer_id = user_id if data == "user" else int(data)
+    if direction == "next":
+        bought_goods = await select_bought_items_page(buyer_id, after_id=cursor)
+    else:
+        bought_goods = await select_bought_items_page(buyer_id, before_id=cursor)
+    goods = await select_user_items(buyer_id)
+    max_index = goods // 10
+    if goods % 10 == 0:
         max_index -= 1
-    if 0 <= current_index <= max_index:
+    if bought_goods and 0 <= current_index <= max_index:
         if data == "user":
             back_data = "profile"
             pre_back = "bought_items"
@@ -610,7 +617,7 @@ async def bought_item_info_callback_handler(call: CallbackQuery):
     back_data = call.data.split(":")[2]
     bot, user_id = await get_bot_user_ids(call)
     TgConfig.STATE[user_id] = None
-    item = get_bought_item_info(item_id)
+    item = await get_bought_item_info(item_id)
     await bot.edit_message_text(
         f'<b>Item</b>: <code>{item["item_name"]}</code>\n'
         f'<b>Price</b>: <code>{item["price"]}</code>€\n'
@@ -641,21 +648,13 @@ async def rules_callback_handler(call: CallbackQuery):
     await call.answer(text="❌ Rules were not added")
 
 
-async def profile_callback_handler(call: CallbackQuery):
+async def profile_callback_handler(call: CallbackQuery, user_context: UserContext):
     bot, user_id = await get_bot_user_ids(call)
     user = call.from_user
     TgConfig.STATE[user_id] = None
-    user_info = check_user(user_id)
-    balance = user_info.balance
-    operations = select_user_operations(user_id)
-    overall_balance = 0
-
-    if operations:
-
-        for i in operations:
-            overall_balance += i
-
-    items = select_user_items(user_id)
+    balance = user_context.balance
+    overall_balance = user_context.total_topped_up
+    items = user_context.purchases
     referral = TgConfig.REFERRAL_PERCENT
     markup = profile(referral, items)
     await bot.edit_message_text(
@@ -671,10 +670,10 @@ async def profile_callback_handler(call: CallbackQuery):
     )
 
 
-async def referral_callback_handler(call: CallbackQuery):
+async def referral_callback_handler(call: CallbackQuery, user_context: UserContext):
     bot, user_id = await get_bot_user_ids(call)
     TgConfig.STATE[user_id] = None
-    referrals = check_user_referrals(user_id)
+    referrals = user_context.referrals
     referral_percent = TgConfig.REFERRAL_PERCENT
     await bot.edit_message_text(
         f"💚 Referral system\n"
@@ -737,7 +736,7 @@ async def process_replenish_balance(message: Message):
     )
 
 
-async def pay_yoomoney(call: CallbackQuery):
+async def pay_yoomoney(call: CallbackQuery, user_context: UserContext):
     bot, user_id = await get_bot_user_ids(call)
     amount = TgConfig.STATE.pop(f"{user_id}_amount", None)
     if not amount:
@@ -747,7 +746,7 @@ async def pay_yoomoney(call: CallbackQuery):
     fake = type("Fake", (), {"text": amount, "from_user": call.from_user})
     label, url = quick_pay(fake)
     sleep_time = int(TgConfig.PAYMENT_TIME)
-    lang = get_user_language(user_id) or "en"
+    lang = user_context.language or "en"
     markup = payment_menu(url, label, lang)
     await bot.edit_message_text(
         chat_id=call.message.chat.id,
@@ -757,18 +756,18 @@ async def pay_yoomoney(call: CallbackQuery):
         f'<b>❗️ After payment press "Check payment"</b>',
         reply_markup=markup,
     )
-    start_operation(user_id, amount, label, call.message.message_id)
+    await start_operation(user_id, amount, label, call.message.message_id)
     await asyncio.sleep(sleep_time)
-    info = get_unfinished_operation(label)
+    info = await get_unfinished_operation(label)
     if info:
         _, _, _ = info
         status = await check_payment_status(label)
         if status not in ("paid", "success"):
-            finish_operation(label)
+            await finish_operation(label)
             await bot.send_message(user_id, t(lang, "invoice_cancelled"))
 
 
-async def crypto_payment(call: CallbackQuery):
+async def crypto_payment(call: CallbackQuery, user_context: UserContext):
     bot, user_id = await get_bot_user_ids(call)
     currency = call.data.split("_")[1]
     amount = TgConfig.STATE.pop(f"{user_id}_amount", None)
@@ -779,7 +778,7 @@ async def crypto_payment(call: CallbackQuery):
     payment_id, address, pay_amount = create_payment(float(amount), currency)
 
     sleep_time = int(TgConfig.PAYMENT_TIME)
-    lang = get_user_language(user_id) or "en"
+    lang = user_context.language or "en"
     expires_at = (
         datetime.datetime.now() + datetime.timedelta(seconds=sleep_time)
     ).strftime("%H:%M")
@@ -809,14 +808,14 @@ async def crypto_payment(call: CallbackQuery):
         parse_mode="HTML",
         reply_markup=markup,
     )
-    start_operation(user_id, amount, payment_id, sent.message_id)
+    await start_operation(user_id, amount, payment_id, sent.message_id)
     await asyncio.sleep(sleep_time)
-    info = get_unfinished_operation(payment_id)
+    info = await get_unfinished_operation(payment_id)
     if info:
         _, _, _ = info
         status = await check_payment(payment_id)
         if status not in ("finished", "confirmed", "sending"):
-            finish_operation(payment_id)
+            await finish_operation(payment_id)
             await bot.send_message(user_id, t(lang, "invoice_cancelled"))
 
 
@@ -824,7 +823,7 @@ async def checking_payment(call: CallbackQuery):
     bot, user_id = await get_bot_user_ids(call)
     message_id = call.message.message_id
     label = call.data[6:]
-    info = get_unfinished_operation(label)
+    info = await get_unfinished_operation(label)
 
     if info:
         user_id_db, operation_value, _ = info
@@ -833,15 +832,14 @@ async def checking_payment(call: CallbackQuery):
             payment_status = await check_payment(label)
 
         if payment_status in ("success", "paid", "finished", "confirmed", "sending"):
-            current_time = datetime.datetime.now()
-            formatted_time = current_time.strftime("%Y-%m-%d %H:%M:%S")
-            referral_id = get_user_referral(user_id)
-            finish_operation(label)
+            current_time = datetime.datetime.now().replace(microsecond=0)
+            referral_id = await get_user_referral(user_id)
+            await finish_operation(label)
 
             if referral_id and TgConfig.REFERRAL_PERCENT != 0:
                 referral_percent = TgConfig.REFERRAL_PERCENT
                 referral_operation = round((referral_percent / 100) * operation_value)
-                update_balance(referral_id, referral_operation)
+                await update_balance(referral_id, referral_operation)
                 await bot.send_message(
                     referral_id,
                     f"✅ You received {referral_operation}€ "
@@ -849,8 +847,8 @@ async def checking_payment(call: CallbackQuery):
                     reply_markup=close(),
                 )
 
-            create_operation(user_id, operation_value, formatted_time)
-            update_balance(user_id, operation_value)
+            await create_operation(user_id, operation_value, current_time)
+            await update_balance(user_id, operation_value)
             await bot.edit_message_text(
                 chat_id=call.message.chat.id,
                 message_id=message_id,
@@ -863,13 +861,13 @@ async def checking_payment(call: CallbackQuery):
         await call.answer(text="❌ Invoice not found")
 
 
-async def cancel_payment(call: CallbackQuery):
+async def cancel_payment(call: CallbackQuery, user_context: UserContext):
 
     bot, user_id = await get_bot_user_ids(call)
     invoice_id = call.data.split("_", 1)[1]
-    lang = get_user_language(user_id) or "en"
-    if get_unfinished_operation(invoice_id):
-        finish_operation(invoice_id)
+    lang = user_context.language or "en"
+    if await get_unfinished_operation(invoice_id):
+        await finish_operation(invoice_id)
         await bot.edit_message_text(
             t(lang, "invoice_cancelled"),
             chat_id=call.message.chat.id,
@@ -884,9 +882,9 @@ async def check_sub_to_channel(call: CallbackQuery):
 
     bot, user_id = await get_bot_user_ids(call)
     invoice_id = call.data.split("_", 1)[1]
-    lang = get_user_language(user_id) or "en"
-    if get_unfinished_operation(invoice_id):
-        finish_operation(invoice_id)
+    lang = await get_user_language(user_id) or "en"
+    if await get_unfinished_operation(invoice_id):
+        await finish_operation(invoice_id)
         await bot.edit_message_text(
             t(lang, "invoice_cancelled"),
             chat_id=call.message.chat.id,
@@ -897,9 +895,9 @@ async def check_sub_to_channel(call: CallbackQuery):
         await call.answer(text="❌ Invoice not found")
 
 
-async def change_language(call: CallbackQuery):
+async def change_language(call: CallbackQuery, user_context: UserContext):
     bot, user_id = await get_bot_user_ids(call)
-    current_lang = get_user_language(user_id) or "en"
+    current_lang = user_context.language or "en"
     markup = InlineKeyboardMarkup(row_width=1)
     markup.add(
         InlineKeyboardButton(
@@ -926,18 +924,15 @@ async def change_language(call: CallbackQuery):
     )
 
 
-async def set_language(call: CallbackQuery, first_time=False):
+async def set_language(call: CallbackQuery, user_context: UserContext, first_time=False):
     bot, user_id = await get_bot_user_ids(call)
     lang_code = call.data.split("_")[-1]
-    update_user_language(user_id, lang_code)
+    await update_user_language(user_id, lang_code)
     await call.message.delete()
-    role = check_role(user_id)
     chat = TgConfig.CHANNEL_URL[13:]
-    user = check_user(user_id)
-    balance = user.balance if user else 0
-    markup = main_menu(role, chat, TgConfig.HELPER_URL, lang_code)
-    purchases = select_user_items(user_id)
-    text = build_menu_text(call.from_user, balance, purchases, lang_code)
+    markup = main_menu(user_context.permissions, chat, TgConfig.HELPER_URL, lang_code)
+    text = build_menu_text(call.from_user, user_context.balance, user_context.purchases, lang_code,
+                           user_context.basket)
 
     # Only send the video if it's the first time (after /start)
     if first_time:
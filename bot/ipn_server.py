@@ -22,6 +22,12 @@ from bot.logger_mesh import logger
 app = Flask(__name__)
 
 
+@app.teardown_request
+def remove_session(exc: BaseException | None) -> None:
+    # every IPN request is its own unit of work
+    Database().remove_session()
+
+
 def verify_signature(data: bytes, signature: str | None) -> bool:
     if not EnvKeys.NOWPAYMENTS_IPN_SECRET:
         return True
@@ -60,8 +66,8 @@ def nowpayments_ipn():
             user_id = record.user_id
             message_id = record.message_id
             finish_operation(payment_id)
-            formatted_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            create_operation(user_id, value, formatted_time)
+            current_time = datetime.datetime.now().replace(microsecond=0)
+            create_operation(user_id, value, current_time)
             update_balance(user_id, value)
 
             referral_id = get_user_referral(user_id)
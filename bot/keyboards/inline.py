@@ -1,7 +1,7 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
+from bot.database.models import Permission
 from bot.localization import t
-from bot.database.methods import get_category_parent
 
 
 def main_menu(
@@ -40,7 +40,7 @@ def main_menu(
     if row:
         inline_keyboard.append(row)
 
-    if role > 1:
+    if role & Permission.CONSOLE:
         inline_keyboard.append(
             [InlineKeyboardButton(t(lang, "admin_panel"), callback_data="console")]
         )
@@ -49,10 +49,9 @@ def main_menu(
 
 
 def categories_list(
-    list_items: list[str], current_index: int, max_index: int
+    page_items: list[str], current_index: int, max_index: int
 ) -> InlineKeyboardMarkup:
     markup = InlineKeyboardMarkup()
-    page_items = list_items[current_index * 10 : (current_index + 1) * 10]
     for name in page_items:
         markup.add(InlineKeyboardButton(text=name, callback_data=f"category_{name}"))
     if max_index > 0:
@@ -75,10 +74,9 @@ def categories_list(
 
 
 def goods_list(
-    list_items: list[str], category_name: str, current_index: int, max_index: int
+    page_items: list[str], category_name: str, current_index: int, max_index: int
 ) -> InlineKeyboardMarkup:
     markup = InlineKeyboardMarkup()
-    page_items = list_items[current_index * 10 : (current_index + 1) * 10]
     for name in page_items:
         markup.add(InlineKeyboardButton(text=name, callback_data=f"item_{name}"))
     if max_index > 0:
@@ -103,10 +101,13 @@ def goods_list(
 
 
 def subcategories_list(
-    list_items: list[str], parent: str, current_index: int, max_index: int
+    page_items: list[str],
+    parent: str,
+    current_index: int,
+    max_index: int,
+    back_parent: str | None = None,
 ) -> InlineKeyboardMarkup:
     markup = InlineKeyboardMarkup()
-    page_items = list_items[current_index * 10 : (current_index + 1) * 10]
     for name in page_items:
         markup.add(InlineKeyboardButton(text=name, callback_data=f"category_{name}"))
     if max_index > 0:
@@ -125,7 +126,6 @@ def subcategories_list(
             ),
         ]
         markup.row(*buttons)
-    back_parent = get_category_parent(parent)
     back_data = "shop" if back_parent is None else f"category_{back_parent}"
     markup.add(InlineKeyboardButton("🛒 View Basket", callback_data="view_basket"))
     markup.add(InlineKeyboardButton("🔙 Go back", callback_data=back_data))
@@ -133,15 +133,15 @@ def subcategories_list(
 
 
 def user_items_list(
-    list_items: list,
+    page_items: list,
     data: str,
     back_data: str,
     pre_back: str,
     current_index: int,
     max_index: int,
 ) -> InlineKeyboardMarkup:
+    """Build one page of purchases; the arrows carry the keyset cursor of the next page."""
     markup = InlineKeyboardMarkup()
-    page_items = list_items[current_index * 10 : (current_index + 1) * 10]
     for item in page_items:
         markup.add(
             InlineKeyboardButton(
@@ -151,14 +151,16 @@ def user_items_list(
     if max_index > 0:
         buttons = [
             InlineKeyboardButton(
-                text="◀️", callback_data=f"bought-goods-page_{current_index - 1}_{data}"
+                text="◀️",
+                callback_data=f"bought-goods-page_{current_index - 1}_{data}_prev_{page_items[0].id}",
             ),
             InlineKeyboardButton(
                 text=f"{current_index + 1}/{max_index + 1}",
                 callback_data="dummy_button",
             ),
             InlineKeyboardButton(
-                text="▶️", callback_data=f"bought-goods-page_{current_index + 1}_{data}"
+                text="▶️",
+                callback_data=f"bought-goods-page_{current_index + 1}_{data}_next_{page_items[-1].id}",
             ),
         ]
         markup.row(*buttons)
@@ -237,8 +239,8 @@ def user_management(
                 )
             ]
         )
-    if admin_role >= admin_manage and admin_role > user_role:
-        if user_role == 1:
+    if admin_role & admin_manage and not user_role & admin_manage:
+        if not user_role & Permission.CONSOLE:
             inline_keyboard.append(
                 [
                     InlineKeyboardButton(
@@ -1,20 +1,28 @@
+import asyncio
+
 from aiogram.utils import executor
 from aiogram import Bot, Dispatcher
 from aiogram.contrib.fsm_storage.memory import MemoryStorage
 
 from bot.filters import register_all_filters
+from bot.middlewares import register_all_middlewares
 from bot.misc import EnvKeys
 from bot.handlers import register_all_handlers
 from bot.database.models import register_models
+from bot.utils.files import validate_line_counts
+from bot.utils.reservations import expire_reservations_periodically
 from bot.logger_mesh import logger, file_handler
 
 logger.addHandler(file_handler)
 
 
 async def __on_start_up(dp: Dispatcher) -> None:
+    register_all_middlewares(dp)
     register_all_filters(dp)
     register_all_handlers(dp)
     register_models()
+    validate_line_counts()
+    asyncio.create_task(expire_reservations_periodically())
 
 
 def start_bot():
@@ -0,0 +1 @@
+from .main import register_all_middlewares
@@ -0,0 +1,7 @@
+from aiogram import Dispatcher
+
+from bot.middlewares.user_context import UserContextMiddleware
+
+
+def register_all_middlewares(dp: Dispatcher) -> None:
+    dp.middleware.setup(UserContextMiddleware())
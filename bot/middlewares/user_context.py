@@ -0,0 +1,19 @@
+from aiogram.dispatcher.middlewares import BaseMiddleware
+from aiogram.types import CallbackQuery, ChatType, Message
+
+from bot.utils.user_context import UserContext, load_user_context, register_user
+
+
+class UserContextMiddleware(BaseMiddleware):
+    """Load the user once per update and pass it to handlers as ``user_context``.
+
+    ``/start`` in a private chat registers the user first (see ``register_user``).
+    """
+
+    async def on_process_message(self, message: Message, data: dict) -> None:
+        if message.chat.type == ChatType.PRIVATE and message.is_command() and message.get_command() == '/start':
+            await register_user(message.from_user.id, message.get_args())
+        data['user_context'] = await load_user_context(message.from_user.id)
+
+    async def on_process_callback_query(self, call: CallbackQuery, data: dict) -> None:
+        data['user_context'] = await load_user_context(call.from_user.id)
@@ -21,3 +21,10 @@ class EnvKeys(ABC):
     NOWPAYMENTS_IPN_URL: Final = os.environ.get('NOWPAYMENTS_IPN_URL')
     NOWPAYMENTS_IPN_SECRET: Final = os.environ.get('NOWPAYMENTS_IPN_SECRET')
 
+    DATABASE_URL: Final = os.environ.get('DATABASE_URL', 'sqlite:///database.db')
+    DB_POOL_SIZE: Final = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW: Final = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    CATALOG_CACHE_SIZE: Final = int(os.environ.get('CATALOG_CACHE_SIZE', 1024))
+    SQLITE_PROFILE: Final = os.environ.get('SQLITE_PROFILE', 'performance')
+    DB_POOL_RECYCLE: Final = int(os.environ.get('DB_POOL_RECYCLE', -1))
+    DB_POOL_PRE_PING: Final = os.environ.get('DB_POOL_PRE_PING', '').lower() in ('1', 'true', 'yes')
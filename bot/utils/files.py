@@ -1,5 +1,19 @@
+import asyncio
+import hashlib
 import os
 import re
+import shutil
+import tempfile
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from typing import Iterable, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process locks apply
+    fcntl = None
 
 
 def sanitize_name(name: str) -> str:
@@ -7,27 +21,109 @@ def sanitize_name(name: str) -> str:
     return re.sub(r"\W+", "_", name)
 
 
+UPLOADS_ROOT = os.path.join('assets', 'uploads')
+UPLOADS_BUCKET_SIZE = 1000
+
+
+def item_upload_folder(item_name: str) -> str:
+    """Return the upload folder of ``item_name``.
+
+    Item folders are spread over 256 shards by a hash of the name, and every
+    item folder splits its files into buckets of ``UPLOADS_BUCKET_SIZE``, so no
+    directory grows past a few thousand entries.
+    """
+    name = sanitize_name(item_name)
+    shard = hashlib.sha1(name.encode('utf-8')).hexdigest()[:2]
+    return os.path.join(UPLOADS_ROOT, shard, name)
+
+
 def ensure_item_folder(item_name: str) -> str:
-    folder = os.path.join('assets', 'uploads', sanitize_name(item_name))
+    folder = item_upload_folder(item_name)
     os.makedirs(folder, exist_ok=True)
     return folder
 
 
+def _scan_upload_numbers(folder: str) -> int:
+    """Return the highest file number below ``folder``; used only when its counter is missing."""
+    numbers = [int(stem) for _, _, files in os.walk(folder)
+               for stem in (os.path.splitext(f)[0] for f in files) if stem.isdigit()]
+    return max(numbers, default=0)
+
+
 def get_next_file_path(item_name: str, extension: str = 'jpg') -> str:
+    """Allocate the next numbered upload path of ``item_name``.
+
+    Numbers come from a counter file in the item folder that is advanced under
+    the same thread and process lock as the lines files, so allocation does not
+    list the folder.
+    """
     folder = ensure_item_folder(item_name)
-    existing = [f for f in os.listdir(folder) if f.endswith(f'.{extension}')]
-    numbers = [int(os.path.splitext(f)[0]) for f in existing if os.path.splitext(f)[0].isdigit()]
-    next_num = max(numbers) + 1 if numbers else 1
-    return os.path.join(folder, f'{next_num}.{extension}')
+    counter = os.path.join(folder, '.counter')
+    with _file_lock(counter):
+        try:
+            with open(counter) as f:
+                number = int(f.read()) + 1
+        except (FileNotFoundError, ValueError):
+            number = _scan_upload_numbers(folder) + 1
+        with open(counter, 'w') as f:
+            f.write(str(number))
+    bucket = os.path.join(folder, f'{number // UPLOADS_BUCKET_SIZE:04d}')
+    os.makedirs(bucket, exist_ok=True)
+    return os.path.join(bucket, f'{number}.{extension}')
 
 
 def cleanup_item_file(file_path: str) -> None:
-    """Remove file and clean up its folder if empty."""
-    if os.path.isfile(file_path):
+    """Remove file and clean up its bucket folder if empty."""
+    try:
         os.remove(file_path)
-        folder = os.path.dirname(file_path)
-        if os.path.isdir(folder) and not os.listdir(folder):
-            os.rmdir(folder)
+    except FileNotFoundError:
+        return
+    try:
+        os.rmdir(os.path.dirname(file_path))
+    except OSError:
+        pass
+
+
+def remove_upload_folder(item_name: str) -> None:
+    """Remove the upload folder of ``item_name`` with all its files and its counter."""
+    shutil.rmtree(item_upload_folder(item_name), ignore_errors=True)
+
+
+def iter_upload_lines(path: str) -> Iterator[str]:
+    """Yield the stripped non-empty lines of an uploaded text file.
+
+    The file is decoded incrementally while it is read, so memory use does not
+    depend on its size.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line
+
+
+@asynccontextmanager
+async def uploaded_values(message, separator: str | None = ';'):
+    """Yield the values an admin sent: the lines of a .txt document or local file, or the message text.
+
+    Documents are streamed to a temporary file in chunks and read back lazily, so
+    an upload is never held in memory; the temporary file is removed afterwards.
+    Message text is split on ``separator``, or into stripped lines if it is ``None``.
+    """
+    if message.document and message.document.file_name.endswith('.txt'):
+        fd, path = tempfile.mkstemp(suffix='.txt')
+        os.close(fd)
+        try:
+            await message.document.download(destination_file=path)
+            yield iter_upload_lines(path)
+        finally:
+            os.remove(path)
+    elif message.text and os.path.isfile(message.text):
+        yield iter_upload_lines(message.text)
+    elif separator is None:
+        yield [line.strip() for line in (message.text or '').splitlines() if line.strip()]
+    else:
+        yield message.text.split(separator) if message.text else []
 
 
 def ensure_lines_folder(item_name: str) -> str:
@@ -58,28 +154,212 @@ def ensure_lines_file(item_name: str) -> str:
     return os.path.join(folder, f"{sanitize_name(item_name)}.txt")
 
 
+# A lines file is consumed from the front; the byte offset of the first unsold
+# line and the number of lines left are kept in a fixed-width ``<file>.head``
+# sidecar, stamped with the file size and mtime they are valid for, so a pop is
+# a seek, a readline and a small write and stock is known without a scan. The
+# sold prefix is cut off in the background once it is larger than
+# LINES_COMPACT_THRESHOLD and half of the file.
+# Pops and compaction hold a per-file thread lock plus an flock on
+# ``<file>.lock``, so the bot, the IPN server and other processes never hand
+# out the same line twice.
+LINES_COMPACT_THRESHOLD = 1 << 20
+_HEAD_WIDTH = 20
+_line_locks: dict[str, threading.Lock] = {}
+_line_locks_guard = threading.Lock()
+_compactor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='lines-compaction')
+_compaction_pending: set[str] = set()
+_item_locks = weakref.WeakValueDictionary()
+
+
+def item_lock(item_name: str) -> asyncio.Lock:
+    """Return the event-loop lock serializing sales of ``item_name``."""
+    lock = _item_locks.get(item_name)
+    if lock is None:
+        lock = _item_locks[item_name] = asyncio.Lock()
+    return lock
+
+
+@contextmanager
+def _file_lock(path: str):
+    with _line_locks_guard:
+        lock = _line_locks.setdefault(path, threading.Lock())
+    with lock:
+        if fcntl is None:
+            yield
+            return
+        with open(f"{path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _read_state(path: str) -> tuple[int, ...] | None:
+    try:
+        with open(f"{path}.head", "rb") as f:
+            state = tuple(int(field) for field in f.read().split())
+    except (FileNotFoundError, ValueError):
+        return None
+    return state if len(state) == 4 else None
+
+
+def _write_state(path: str, head: int, count: int) -> None:
+    """Store ``head`` and ``count`` together with the size and mtime they are valid for."""
+    stat = os.stat(path)
+    data = " ".join(str(field).zfill(_HEAD_WIDTH) for field in (head, count, stat.st_size, stat.st_mtime_ns))
+    head_path = f"{path}.head"
+    # same-length in-place rewrite, so lock-free readers never see an empty file
+    with open(head_path, "r+b" if os.path.isfile(head_path) else "wb") as f:
+        f.write(data.encode())
+
+
+def _count_lines(path: str, head: int) -> int:
+    with open(path, "rb") as f:
+        f.seek(head)
+        return sum(1 for raw in f if raw.strip())
+
+
+def _load_state(path: str) -> tuple[int, int]:
+    """Return ``(head, count)`` of a lines file; the caller holds its lock.
+
+    If the file was changed behind the index (its size or mtime differ from the
+    recorded ones), the remaining lines are counted again.
+    """
+    stat = os.stat(path)
+    state = _read_state(path)
+    if state and state[2:] == (stat.st_size, stat.st_mtime_ns):
+        return state[0], state[1]
+    # keep the head if it still fits, otherwise the file was replaced: start over
+    head = state[0] if state and state[0] <= stat.st_size else 0
+    count = _count_lines(path, head)
+    _write_state(path, head, count)
+    return head, count
+
+
+def lines_count(item_name: str) -> int:
+    """Return the number of unsold lines of ``item_name`` from its index, in O(1)."""
+    path = ensure_lines_file(item_name)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return 0
+    state = _read_state(path)
+    if state and state[2:] == (stat.st_size, stat.st_mtime_ns):
+        return state[1]
+    with _file_lock(path):
+        return _load_state(path)[1] if os.path.isfile(path) else 0
+
+
+def validate_line_counts() -> int:
+    """Check the index of every lines file against its size and mtime; returns the number of files."""
+    folder = os.path.join("assets", "lines")
+    if not os.path.isdir(folder):
+        return 0
+    paths = [os.path.join(folder, name) for name in os.listdir(folder) if name.endswith(".txt")]
+    for path in paths:
+        with _file_lock(path):
+            _load_state(path)
+    return len(paths)
+
+
+def compact_lines_file(item_name: str) -> None:
+    """Drop the already sold prefix of the item's lines file and reset its head."""
+    path = ensure_lines_file(item_name)
+    with _line_locks_guard:
+        _compaction_pending.discard(path)
+    with _file_lock(path):
+        if not os.path.isfile(path):
+            return
+        head, count = _load_state(path)
+        if not head:
+            return
+        tmp_path = f"{path}.tmp"
+        with open(path, "rb") as src, open(tmp_path, "wb") as dst:
+            src.seek(head)
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp_path, path)
+        _write_state(path, 0, count)
+
 
 def pop_line_from_file(item_name: str) -> str | None:
     """Pop and return the first non-empty line from the item's text file.
 
-    If the file does not exist or contains no lines, ``None`` is returned.
-    The popped line is removed from the file.
+    If the file does not exist or has no lines left, ``None`` is returned.
+    The popped line is consumed by advancing the file's head offset.
     """
     path = ensure_lines_file(item_name)
-    if not os.path.isfile(path):
-        return None
-
-    with open(path, "r+", encoding="utf-8") as f:
-        lines = f.readlines()
-        # Remove empty lines and preserve newline characters for remaining lines
-        lines = [ln for ln in lines if ln.strip()]
-        if not lines:
-            # Truncate file if it only contained empty lines
-            f.seek(0)
-            f.truncate()
+    with _file_lock(path):
+        if not os.path.isfile(path):
             return None
-        first = lines.pop(0).rstrip("\n")
-        f.seek(0)
-        f.truncate()
-        f.writelines([ln if ln.endswith("\n") else ln + "\n" for ln in lines])
-    return first
+        head, count = _load_state(path)
+        line = None
+        with open(path, "rb") as f:
+            f.seek(head)
+            for raw in iter(f.readline, b""):
+                if raw.strip():
+                    line = raw.decode("utf-8").rstrip("\r\n")
+                    break
+            head = f.tell()
+        if line is None and head:
+            # nothing left: empty the file instead of keeping a sold prefix around
+            open(path, "wb").close()
+            head = 0
+        _write_state(path, head, count - 1 if line is not None else 0)
+        size = os.path.getsize(path)
+    if head > LINES_COMPACT_THRESHOLD and head * 2 > size:
+        with _line_locks_guard:
+            schedule = path not in _compaction_pending
+            _compaction_pending.add(path)
+        if schedule:
+            _compactor.submit(compact_lines_file, item_name)
+    return line
+
+
+def append_lines_to_file(item_name: str, lines: Iterable[str]) -> int:
+    """Append ``lines`` to the end of the item's lines file; returns how many were written."""
+    path = ensure_lines_file(item_name)
+    written = 0
+    with _file_lock(path):
+        if not os.path.isfile(path):
+            open(path, "wb").close()
+        head, count = _load_state(path)
+        with open(path, "ab") as f:
+            if f.tell() and not _ends_with_newline(path):
+                f.write(b"\n")
+            for line in lines:
+                f.write(f"{line}\n".encode("utf-8"))
+                written += 1
+        _write_state(path, head, count + written)
+    return written
+
+
+def remove_lines_file(item_name: str) -> None:
+    """Delete the item's lines file together with its index.
+
+    The ``.lock`` file is kept: a process may be waiting for the flock on it,
+    and a fresh lock file would let another one in at the same time.
+    """
+    path = ensure_lines_file(item_name)
+    with _file_lock(path):
+        for file_path in (path, f"{path}.head"):
+            if os.path.isfile(file_path):
+                os.remove(file_path)
+
+
+def rename_lines_file(item_name: str, new_name: str) -> None:
+    """Move the lines file and its index along with a renamed item."""
+    path, new_path = ensure_lines_file(item_name), ensure_lines_file(new_name)
+    if path == new_path:
+        return
+    with _file_lock(path):
+        for suffix in ("", ".head"):
+            if os.path.isfile(path + suffix):
+                os.replace(path + suffix, new_path + suffix)
+
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
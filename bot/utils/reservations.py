@@ -0,0 +1,17 @@
+import asyncio
+import datetime
+
+from bot.database.methods.aio import expire_reservations
+from bot.logger_mesh import logger
+
+
+async def expire_reservations_periodically(interval: float = 60) -> None:
+    """Return expired basket reservations to the stock every ``interval`` seconds."""
+    while True:
+        try:
+            released = await expire_reservations(datetime.datetime.now().replace(microsecond=0))
+            if released:
+                logger.info(f"Released {released} expired basket reservations")
+        except Exception as e:
+            logger.error(f"Failed to release expired reservations: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,42 @@
+import datetime
+
+from bot.database.methods.aio import create_user, get_user_context, select_max_role_id
+from bot.misc import EnvKeys
+
+
+class UserContext:
+    """Per-update snapshot of the user row, taken before the handler runs."""
+
+    def __init__(self, telegram_id: int, role_id: int = 1, permissions: int = 0, language: str | None = None,
+                 balance: int = 0, purchases: int = 0, total_topped_up: int = 0, referrals: int = 0,
+                 basket: int = 0, registered: bool = False):
+        self.telegram_id = telegram_id
+        self.role_id = role_id
+        self.permissions = permissions
+        self.language = language
+        self.balance = balance
+        self.purchases = purchases
+        self.total_topped_up = total_topped_up
+        self.referrals = referrals
+        self.basket = basket
+        self.registered = registered
+
+
+async def register_user(user_id: int, referral_id: str | None) -> None:
+    """Register the user of a ``/start``; an ``INSERT ... ON CONFLICT DO NOTHING``, so repeats are cheap."""
+    is_owner = str(user_id) == EnvKeys.OWNER_ID
+    await create_user(
+        telegram_id=user_id,
+        registration_date=datetime.datetime.now().replace(microsecond=0),
+        referral_id=referral_id if referral_id != str(user_id) else None,
+        role=await select_max_role_id() if is_owner else 1,
+    )
+
+
+async def load_user_context(telegram_id: int) -> UserContext:
+    """Load the user, role permissions, balance and counters in one query."""
+    row = await get_user_context(telegram_id)
+    if row is None:
+        return UserContext(telegram_id)
+    return UserContext(row.telegram_id, row.role_id, row.permissions or 0, row.language, row.balance,
+                       row.purchases, row.total_topped_up, row.referrals, row.basket, registered=True)
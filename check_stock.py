@@ -0,0 +1,16 @@
+from bot.database import Database
+from bot.database.methods import rebuild_stock_counters
+
+
+def main() -> None:
+    with Database().session_scope():
+        repaired = rebuild_stock_counters()
+    if not repaired:
+        print("Stock counters are consistent")
+        return
+    for name in repaired:
+        print(f"Rebuilt stock counters of {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,13 @@
 from logging.config import fileConfig
 
-from sqlalchemy import engine_from_config
+from sqlalchemy import create_engine
 from sqlalchemy import pool
 
 from alembic import context
 
 from bot.database.models.main import *
 from bot.database.main import Database
+from bot.misc import EnvKeys
 
 config = context.config
 
@@ -28,7 +29,7 @@ def run_migrations_offline() -> None:
     script output.
 
     """
-    url = config.get_main_option("sqlalchemy.url")
+    url = EnvKeys.DATABASE_URL
     context.configure(
         url=url,
         target_metadata=target_metadata,
@@ -47,11 +48,18 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
-    connectable = engine_from_config(
-        config.get_section(config.config_ini_section, {}),
-        prefix="sqlalchemy.",
-        poolclass=pool.NullPool,
-    )
+    connection = config.attributes.get('connection')
+    if connection is not None:
+        # a caller (e.g. the migration tests) passed its own connection
+        context.configure(
+            connection=connection, target_metadata=target_metadata
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
+    connectable = create_engine(EnvKeys.DATABASE_URL, poolclass=pool.NullPool)
 
     with connectable.connect() as connection:
         context.configure(
@@ -0,0 +1,26 @@
+"""add index on goods.category_name
+
+Revision ID: 4b9a0d2c7e15
+Revises: e81f4c3b9d06
+Create Date: 2026-10-17 15:47:22.904316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b9a0d2c7e15'
+down_revision: Union[str, None] = 'e81f4c3b9d06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_goods_category_name'), 'goods', ['category_name'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_goods_category_name'), table_name='goods')
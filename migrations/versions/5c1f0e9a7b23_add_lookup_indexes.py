@@ -0,0 +1,35 @@
+"""add indexes on hot lookup columns
+
+Revision ID: 5c1f0e9a7b23
+Revises: 365d7977dc8d
+Create Date: 2026-10-17 10:02:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1f0e9a7b23'
+down_revision: Union[str, None] = '365d7977dc8d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_item_values_item_name'), 'item_values', ['item_name'], unique=False)
+    op.create_index(op.f('ix_bought_goods_buyer_id'), 'bought_goods', ['buyer_id'], unique=False)
+    op.create_index(op.f('ix_operations_user_id'), 'operations', ['user_id'], unique=False)
+    op.create_index(op.f('ix_unfinished_operations_operation_id'), 'unfinished_operations', ['operation_id'],
+                    unique=False)
+    op.create_index(op.f('ix_users_referral_id'), 'users', ['referral_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_users_referral_id'), table_name='users')
+    op.drop_index(op.f('ix_unfinished_operations_operation_id'), table_name='unfinished_operations')
+    op.drop_index(op.f('ix_operations_user_id'), table_name='operations')
+    op.drop_index(op.f('ix_bought_goods_buyer_id'), table_name='bought_goods')
+    op.drop_index(op.f('ix_item_values_item_name'), table_name='item_values')
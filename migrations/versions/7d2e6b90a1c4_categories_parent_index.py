@@ -0,0 +1,26 @@
+"""add index on categories.parent_name
+
+Revision ID: 7d2e6b90a1c4
+Revises: c3a8d5f2e417
+Create Date: 2026-10-17 14:21:09.532871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2e6b90a1c4'
+down_revision: Union[str, None] = 'c3a8d5f2e417'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_categories_parent_name'), 'categories', ['parent_name'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_categories_parent_name'), table_name='categories')
@@ -0,0 +1,60 @@
+"""store timestamps as indexed DateTime columns
+
+Revision ID: 9e4b27d1c6fa
+Revises: 5c1f0e9a7b23
+Create Date: 2026-10-17 11:26:09.532871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4b27d1c6fa'
+down_revision: Union[str, None] = '5c1f0e9a7b23'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    ('users', 'registration_date'),
+    ('bought_goods', 'bought_datetime'),
+    ('operations', 'operation_time'),
+)
+BATCH_SIZE = 5000
+
+
+def _backfill(table: str, sql: str) -> None:
+    """Run ``sql`` over ``table`` in rowid batches so large tables are not locked at once."""
+    connection = op.get_bind()
+    max_rowid = connection.execute(sa.text(f'SELECT max(rowid) FROM {table}')).scalar() or 0
+    for start in range(0, max_rowid, BATCH_SIZE):
+        connection.execute(sa.text(f'{sql} AND rowid > :start AND rowid <= :end'),
+                           {'start': start, 'end': start + BATCH_SIZE})
+
+
+def upgrade() -> None:
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+    for table, column in COLUMNS:
+        if sqlite:
+            # SQLite ignores declared types, and a batch rebuild would copy the column through
+            # CAST(... AS DATETIME), whose NUMERIC affinity turns '2025-07-07 02:38:21' into 2025.
+            # Keep the text and bring it to the DateTime storage format instead, so range
+            # predicates compare correctly with the values SQLAlchemy writes
+            _backfill(table, f"UPDATE {table} SET {column} = {column} || '.000000' WHERE length({column}) = 19")
+        else:
+            op.alter_column(table, column, existing_type=sa.VARCHAR(), type_=sa.DateTime(),
+                            existing_nullable=False, postgresql_using=f'{column}::timestamp')
+        op.create_index(op.f(f'ix_{table}_{column}'), table, [column], unique=False)
+
+
+def downgrade() -> None:
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+    for table, column in COLUMNS:
+        op.drop_index(op.f(f'ix_{table}_{column}'), table_name=table)
+        if sqlite:
+            _backfill(table, f'UPDATE {table} SET {column} = substr({column}, 1, 19) WHERE length({column}) > 19')
+        else:
+            op.alter_column(table, column, existing_type=sa.DateTime(), type_=sa.VARCHAR(),
+                            existing_nullable=False)
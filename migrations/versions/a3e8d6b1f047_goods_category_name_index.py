@@ -0,0 +1,28 @@
+"""index goods by (category_name, name)
+
+Revision ID: a3e8d6b1f047
+Revises: f2a9c4d7e861
+Create Date: 2026-10-17 22:13:45.604128
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3e8d6b1f047'
+down_revision: Union[str, None] = 'f2a9c4d7e861'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_goods_category_name_name', 'goods', ['category_name', 'name'], unique=False)
+    op.drop_index(op.f('ix_goods_category_name'), table_name='goods')
+
+
+def downgrade() -> None:
+    op.create_index(op.f('ix_goods_category_name'), 'goods', ['category_name'], unique=False)
+    op.drop_index('ix_goods_category_name_name', table_name='goods')
@@ -0,0 +1,40 @@
+"""maintained per-user aggregates
+
+Revision ID: a6c3e8f1b270
+Revises: 4b9a0d2c7e15
+Create Date: 2026-10-17 16:19:45.117830
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6c3e8f1b270'
+down_revision: Union[str, None] = '4b9a0d2c7e15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('total_topped_up', sa.BigInteger(), server_default='0', nullable=False))
+    op.add_column('users', sa.Column('purchases_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('users', sa.Column('referral_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        'UPDATE users SET '
+        'total_topped_up = (SELECT coalesce(sum(operation_value), 0) FROM operations '
+        'WHERE operations.user_id = users.telegram_id), '
+        'purchases_count = (SELECT count(*) FROM bought_goods '
+        'WHERE bought_goods.buyer_id = users.telegram_id), '
+        'referral_count = (SELECT count(*) FROM users AS referrals '
+        'WHERE referrals.referral_id = users.telegram_id)'
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('referral_count')
+        batch_op.drop_column('purchases_count')
+        batch_op.drop_column('total_topped_up')
@@ -0,0 +1,39 @@
+"""basket reservations
+
+Revision ID: b52d7f09c3e8
+Revises: a6c3e8f1b270
+Create Date: 2026-10-17 17:02:11.385204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b52d7f09c3e8'
+down_revision: Union[str, None] = 'a6c3e8f1b270'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('reservations',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('user_id', sa.BigInteger(), nullable=False),
+                    sa.Column('item_name', sa.String(length=100), nullable=False),
+                    sa.Column('value', sa.Text(), nullable=False),
+                    sa.Column('is_infinite', sa.Boolean(), nullable=False),
+                    sa.Column('expires_at', sa.DateTime(), nullable=False),
+                    sa.ForeignKeyConstraint(['user_id'], ['users.telegram_id'], ),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.create_index(op.f('ix_reservations_expires_at'), 'reservations', ['expires_at'], unique=False)
+    op.create_index(op.f('ix_reservations_user_id'), 'reservations', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_reservations_user_id'), table_name='reservations')
+    op.drop_index(op.f('ix_reservations_expires_at'), table_name='reservations')
+    op.drop_table('reservations')
@@ -0,0 +1,36 @@
+"""denormalized stock counter and infinite flag on goods
+
+Revision ID: c3a8d5f2e417
+Revises: 9e4b27d1c6fa
+Create Date: 2026-10-17 12:40:53.207716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a8d5f2e417'
+down_revision: Union[str, None] = '9e4b27d1c6fa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('goods', sa.Column('stock_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('goods', sa.Column('is_infinite', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.execute(
+        'UPDATE goods SET '
+        'stock_count = (SELECT count(*) FROM item_values '
+        'WHERE item_values.item_name = goods.name AND NOT item_values.is_infinity), '
+        'is_infinite = EXISTS (SELECT 1 FROM item_values '
+        'WHERE item_values.item_name = goods.name AND item_values.is_infinity)'
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('goods') as batch_op:
+        batch_op.drop_column('is_infinite')
+        batch_op.drop_column('stock_count')
@@ -0,0 +1,28 @@
+"""index item_values by (item_name, value)
+
+Revision ID: c5d2e8f1a934
+Revises: a3e8d6b1f047
+Create Date: 2026-10-17 23:02:18.731904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d2e8f1a934'
+down_revision: Union[str, None] = 'a3e8d6b1f047'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_item_values_item_name_value', 'item_values', ['item_name', 'value'], unique=False)
+    op.drop_index(op.f('ix_item_values_item_name'), table_name='item_values')
+
+
+def downgrade() -> None:
+    op.create_index(op.f('ix_item_values_item_name'), 'item_values', ['item_name'], unique=False)
+    op.drop_index('ix_item_values_item_name_value', table_name='item_values')
@@ -0,0 +1,49 @@
+"""value hashes for duplicate detection
+
+Revision ID: d7f3a1e5c942
+Revises: b52d7f09c3e8
+Create Date: 2026-10-17 17:48:36.502917
+
+"""
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7f3a1e5c942'
+down_revision: Union[str, None] = 'b52d7f09c3e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    value_hashes = op.create_table('value_hashes',
+                                   sa.Column('digest', sa.LargeBinary(length=32), nullable=False),
+                                   sa.PrimaryKeyConstraint('digest')
+                                   )
+    connection = op.get_bind()
+    seen = set()
+    batch = []
+    for query in ('SELECT value FROM item_values WHERE NOT is_infinity',
+                  'SELECT value FROM bought_goods',
+                  'SELECT value FROM reservations WHERE NOT is_infinite'):
+        for value, in connection.execute(sa.text(query)):
+            if value is None:
+                continue
+            digest = hashlib.sha256(value.encode('utf-8')).digest()
+            if digest in seen:
+                continue
+            seen.add(digest)
+            batch.append({'digest': digest})
+            if len(batch) >= 5000:
+                op.bulk_insert(value_hashes, batch)
+                batch = []
+    if batch:
+        op.bulk_insert(value_hashes, batch)
+
+
+def downgrade() -> None:
+    op.drop_table('value_hashes')
@@ -0,0 +1,44 @@
+"""daily statistics rollup
+
+Revision ID: e81f4c3b9d06
+Revises: 7d2e6b90a1c4
+Create Date: 2026-10-17 15:08:37.640192
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e81f4c3b9d06'
+down_revision: Union[str, None] = '7d2e6b90a1c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('daily_stats',
+                    sa.Column('day', sa.Date(), nullable=False),
+                    sa.Column('users', sa.Integer(), server_default='0', nullable=False),
+                    sa.Column('orders', sa.Integer(), server_default='0', nullable=False),
+                    sa.Column('revenue', sa.BigInteger(), server_default='0', nullable=False),
+                    sa.Column('top_ups', sa.BigInteger(), server_default='0', nullable=False),
+                    sa.PrimaryKeyConstraint('day')
+                    )
+    op.execute(
+        'INSERT INTO daily_stats (day, users, orders, revenue, top_ups) '
+        'SELECT day, sum(users), sum(orders), sum(revenue), sum(top_ups) FROM ('
+        'SELECT date(registration_date) AS day, count(*) AS users, 0 AS orders, 0 AS revenue, 0 AS top_ups '
+        'FROM users GROUP BY date(registration_date) '
+        'UNION ALL SELECT date(bought_datetime), 0, count(*), sum(price), 0 '
+        'FROM bought_goods GROUP BY date(bought_datetime) '
+        'UNION ALL SELECT date(operation_time), 0, 0, 0, sum(operation_value) '
+        'FROM operations GROUP BY date(operation_time)'
+        ') AS days GROUP BY day'
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('daily_stats')
@@ -0,0 +1,26 @@
+"""add index on users.role_id
+
+Revision ID: f2a9c4d7e861
+Revises: d7f3a1e5c942
+Create Date: 2026-10-17 20:41:07.218533
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a9c4d7e861'
+down_revision: Union[str, None] = 'd7f3a1e5c942'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_users_role_id'), 'users', ['role_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_users_role_id'), table_name='users')
@@ -0,0 +1,12 @@
+from bot.database import Database
+from bot.database.methods import rebuild_daily_stats
+
+
+def main() -> None:
+    with Database().session_scope():
+        days = rebuild_daily_stats()
+    print(f"Rebuilt daily statistics for {days} days")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import os
+
+# settings are read once when bot.misc is imported, so point them at a throwaway database first
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['SQLITE_PROFILE'] = 'default'
+
+import pytest
+from alembic.config import Config
+
+from bot.database import Database
+from bot.database.cache import catalog_cache, category_tree, permission_cache, value_filter
+from bot.database.models import Role
+from bot.utils import files
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+
+def alembic_config(connection) -> Config:
+    """Return an alembic config that runs the repository's migrations on ``connection``."""
+    config = Config()
+    config.set_main_option('script_location', MIGRATIONS)
+    config.attributes['connection'] = connection
+    return config
+
+
+def wait_for_compaction() -> None:
+    """Let queued lines-file compactions finish while the test's directory is still the current one."""
+    # the compactor has a single worker, so the no-op runs after everything queued before it
+    files._compactor.submit(lambda: None).result()
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """An empty schema with the default roles; files are written below ``tmp_path``."""
+    monkeypatch.chdir(tmp_path)
+    metadata = Database.BASE.metadata
+    metadata.create_all(Database().engine)
+    with Database().session_scope():
+        Role.insert_roles()
+    catalog_cache.invalidate()
+    category_tree.load([])
+    permission_cache.clear()
+    value_filter.load([], 0)
+    try:
+        with Database().session_scope():
+            yield Database()
+    finally:
+        wait_for_compaction()
+        Database().remove_session()
+        metadata.drop_all(Database().engine)
@@ -0,0 +1,35 @@
+"""Run a test module in a fresh interpreter with its own database file.
+
+Settings are read once, when ``bot.misc`` is imported, so measurements that need
+a file database or another SQLite profile than the suite's in-memory one run in
+a child process. The test module is started as a script and prints its report as
+JSON on the last line of its output; it must not import ``tests.conftest``, which
+points the settings at the suite's in-memory database.
+"""
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_isolated(tmp_path, script: str, *args, profile: str = 'default') -> dict:
+    tmp_path.mkdir(parents=True, exist_ok=True)
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{tmp_path / "bench.db"}', SQLITE_PROFILE=profile,
+               PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, script, *map(str, args)], cwd=tmp_path, env=env,
+                            capture_output=True, text=True)
+    if result.returncode:
+        raise AssertionError(result.stderr)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def create_schema() -> None:
+    """Create the tables and the default roles in the child's database."""
+    from bot.database import Database
+    from bot.database.models import Role
+
+    Database.BASE.metadata.create_all(Database().engine)
+    with Database().session_scope():
+        Role.insert_roles()
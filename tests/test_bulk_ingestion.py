@@ -0,0 +1,59 @@
+import json
+import sys
+import time
+
+import pytest
+
+from bot.database.methods import add_values_to_item_bulk, create_category, create_item, select_item_values_amount
+from bot.utils.files import lines_count
+from tests.isolated import create_schema, run_isolated
+
+
+def test_bulk_upload_reports_progress_per_chunk(db):
+    create_category('Keys')
+    create_item('Key', 'd', 10, 'Keys')
+    progress = []
+
+    result = add_values_to_item_bulk('Key', (f'key-{number}' for number in range(2500)), progress=progress.append,
+                                     chunk_size=1000)
+
+    assert progress == [1000, 2000, 2500]
+    assert result.stored == select_item_values_amount('Key') == lines_count('Key') == 2500
+
+
+def _ingest(mode: str, lines: int) -> dict:
+    """Store ``lines`` values one commit per line or in one bulk transaction; run in a fresh interpreter."""
+    from bot.database import Database
+    from bot.database.methods import add_values_to_item
+
+    create_schema()
+    with Database().session_scope():
+        create_category('Keys')
+        create_item('Key', 'd', 10, 'Keys')
+    values = (f'key-{number:08d}' for number in range(lines))
+    started = time.perf_counter()
+    with Database().session_scope():
+        if mode == 'per-line':
+            for value in values:
+                add_values_to_item('Key', value, False)
+        else:
+            add_values_to_item_bulk('Key', values)
+    elapsed = time.perf_counter() - started
+    with Database().session_scope():
+        stored = select_item_values_amount('Key')
+    return {'seconds': elapsed, 'stored': stored, 'in_file': lines_count('Key')}
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('mode, lines', [('per-line', 10_000), ('bulk', 10_000), ('bulk', 100_000),
+                                         ('bulk', 1_000_000)])
+def test_ingestion_speed(tmp_path, record_property, mode, lines):
+    report = run_isolated(tmp_path, __file__, mode, lines, profile='performance')
+    rate = lines / report['seconds']
+    record_property('lines_per_second', round(rate))
+    print(f'{mode} {lines} lines: {report["seconds"]:.2f}s ({rate:.0f} lines/s)')
+    assert report['stored'] == report['in_file'] == lines
+
+
+if __name__ == '__main__':
+    print(json.dumps(_ingest(sys.argv[1], int(sys.argv[2]))))
@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from bot.database.cache import catalog_cache
+from bot.database.methods import create_category, create_item, add_values_to_item_bulk, add_values_to_item, \
+    get_category_availability, get_subcategories, get_all_items, get_item_info, check_value, \
+    select_item_values_amount
+from tests.test_user_context import count_queries
+
+ROUNDS = 20
+
+
+def _catalog(subcategories: int, items: int) -> None:
+    create_category('District')
+    for sub in range(subcategories):
+        create_category(f'Street {sub}', 'District')
+        for item in range(items):
+            name = f'Key {sub}-{item}'
+            create_item(name, 'd', 10, f'Street {sub}')
+            if item % 10 == 0:
+                add_values_to_item(name, 'forever', True)
+            else:
+                add_values_to_item_bulk(name, [f'{name} #{number}' for number in range(3)])
+
+
+def _page_per_item(parent: str) -> list[tuple]:
+    """The subcategory page as it was read before: a few queries for every item."""
+    rows = []
+    for sub in get_subcategories(parent):
+        for name in get_all_items(sub):
+            item = get_item_info(name)
+            rows.append((sub, name, item['price'], select_item_values_amount(name), check_value(name)))
+    return rows
+
+
+def _page(parent: str) -> list[tuple]:
+    return [(row.category_name, row.item_name, row.price, row.stock_count, row.is_infinite)
+            for row in get_category_availability(parent) if row.parent_name == parent and row.item_name]
+
+
+def test_subcategory_page_is_one_query(db):
+    _catalog(5, 4)
+    catalog_cache.invalidate()
+
+    with count_queries() as statements:
+        page = _page('District')
+
+    assert len(statements) == 1
+    assert sorted(page) == sorted(_page_per_item('District'))
+
+
+@pytest.mark.benchmark
+def test_catalog_page_speed(db, record_property):
+    _catalog(50, 40)
+    for name, read in (('per item', _page_per_item), ('one query', _page)):
+        catalog_cache.invalidate()
+        with count_queries() as statements:
+            assert len(read('District')) == 50 * 40
+        started = time.perf_counter()
+        for _ in range(ROUNDS):
+            catalog_cache.invalidate()
+            read('District')
+        milliseconds = (time.perf_counter() - started) / ROUNDS * 1000
+        record_property(f'{name.replace(" ", "_")}_ms', round(milliseconds, 2))
+        print(f'{name}: {len(statements)} queries, {milliseconds:.2f} ms per page')
@@ -0,0 +1,46 @@
+import datetime
+
+from bot.database import Database
+from bot.database.methods import create_user, create_operation, rebuild_daily_stats, get_dashboard_stats, \
+    set_role, update_balance, create_category, create_item, add_values_to_item_bulk, purchase_item
+from bot.database.models import DailyStats
+from tests.test_user_context import count_queries
+
+
+def test_rebuild_daily_stats_is_committed(db):
+    now = datetime.datetime(2025, 7, 7, 12, 0)
+    create_user(1, now, None)
+    create_user(2, now + datetime.timedelta(days=1), 1)
+    create_operation(1, 50, now)
+    db.session.query(DailyStats).delete()
+    db.session.commit()
+
+    assert rebuild_daily_stats() == 2
+    db.remove_session()
+
+    with Database().session_scope() as session:
+        rows = {row.day: (row.users, row.top_ups) for row in session.query(DailyStats)}
+    assert rows == {datetime.date(2025, 7, 7): (1, 50), datetime.date(2025, 7, 8): (1, 0)}
+
+
+def test_dashboard_after_registration_top_up_and_purchase(db):
+    now = datetime.datetime(2025, 7, 7, 12, 0)
+    create_user(1, now - datetime.timedelta(days=1), None)
+    create_user(2, now, None)
+    set_role(2, 2)
+    create_operation(1, 50, now - datetime.timedelta(days=1))
+    update_balance(1, 50)
+    create_operation(1, 30, now)
+    update_balance(1, 30)
+    create_category('Keys')
+    create_item('Key', 'd', 10, 'Keys')
+    add_values_to_item_bulk('Key', ['k1', 'k2', 'k3'])
+    assert purchase_item(1, 'Key', 10, now) == (70, 'k1')
+
+    with count_queries() as statements:
+        stats = get_dashboard_stats('2025-07-07')
+
+    assert len(statements) == 1
+    assert stats._asdict() == {
+        'today_users': 1, 'admins': 1, 'users': 2, 'today_revenue': 10, 'revenue': 10, 'today_top_ups': 30,
+        'balance': 70, 'top_ups': 80, 'items': 2, 'goods': 1, 'categories': 1, 'sold': 1}
@@ -0,0 +1,73 @@
+import shutil
+import threading
+
+import pytest
+import sqlalchemy as sa
+from alembic import command
+from alembic.config import Config
+from sqlalchemy.pool import QueuePool, StaticPool
+
+from bot.database.main import engine_options, apply_sqlite_profile
+from bot.misc import EnvKeys
+from tests.conftest import MIGRATIONS
+from tests.test_migrations import SHIPPED_DATABASE
+
+
+def _engine(url: str, profile: str = 'default'):
+    engine = sa.create_engine(url, **engine_options(url))
+    apply_sqlite_profile(engine, profile)
+    return engine
+
+
+def _read_in_thread(engine) -> list:
+    result = []
+
+    def read():
+        with engine.connect() as connection:
+            result.extend(connection.exec_driver_sql('SELECT value FROM sample').scalars())
+
+    thread = threading.Thread(target=read)
+    thread.start()
+    thread.join()
+    return result
+
+
+@pytest.mark.parametrize('url', ['sqlite://', 'sqlite:///:memory:'])
+def test_in_memory_database_is_shared_by_threads(url):
+    engine = _engine(url)
+    assert isinstance(engine.pool, StaticPool)
+    with engine.begin() as connection:
+        connection.exec_driver_sql('CREATE TABLE sample (value INTEGER)')
+        connection.exec_driver_sql('INSERT INTO sample VALUES (1)')
+
+    assert _read_in_thread(engine) == [1]
+
+
+def test_file_database_uses_configured_pool(tmp_path):
+    url = f'sqlite:///{tmp_path / "shop.db"}'
+    engine = _engine(url, 'performance')
+    assert isinstance(engine.pool, QueuePool)
+    assert engine.pool.size() == EnvKeys.DB_POOL_SIZE
+    assert engine.pool._max_overflow == EnvKeys.DB_MAX_OVERFLOW
+    with engine.begin() as connection:
+        assert connection.exec_driver_sql('PRAGMA journal_mode').scalar() == 'wal'
+        connection.exec_driver_sql('CREATE TABLE sample (value INTEGER)')
+        connection.exec_driver_sql('INSERT INTO sample VALUES (1)')
+    assert _read_in_thread(engine) == [1]
+    engine.dispose()
+
+    assert _read_in_thread(_engine(url)) == [1]
+
+
+def test_migrations_use_database_url(tmp_path, monkeypatch):
+    path = tmp_path / 'migrated.db'
+    shutil.copy(SHIPPED_DATABASE, path)
+    monkeypatch.setattr(EnvKeys, 'DATABASE_URL', f'sqlite:///{path}')
+    config = Config()
+    config.set_main_option('script_location', MIGRATIONS)
+
+    command.stamp(config, '365d7977dc8d')
+    command.upgrade(config, 'head')
+
+    tables = set(sa.inspect(sa.create_engine(f'sqlite:///{path}')).get_table_names())
+    assert {'users', 'goods', 'daily_stats', 'reservations', 'value_hashes', 'alembic_version'} <= tables
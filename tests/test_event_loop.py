@@ -0,0 +1,103 @@
+import asyncio
+import json
+import sys
+import threading
+import time
+
+import pytest
+
+from tests.isolated import create_schema, run_isolated
+
+USERS = 500
+UPDATES_PER_USER = 4
+# the reply sent to Telegram after every update
+API_ROUND_TRIP = 0.02
+
+
+def test_database_run_does_not_block_the_loop():
+    from bot.database import Database
+
+    released = threading.Event()
+
+    def blocking_query():
+        # a statement that only finishes once another coroutine got to run
+        return released.wait(timeout=5)
+
+    async def release():
+        released.set()
+
+    async def main():
+        return await asyncio.gather(Database().run(blocking_query), release())
+
+    assert asyncio.run(main())[0] is True
+
+
+def _serve(mode: str) -> dict:
+    """Process updates of ``USERS`` concurrent users; run in a fresh interpreter."""
+    import datetime
+
+    from bot.database import Database
+    from bot.database.methods import aio, create_user, get_user_context, update_balance
+
+    create_schema()
+    for user_id in range(1, USERS + 1):
+        with Database().session_scope():
+            create_user(user_id, datetime.datetime(2025, 7, 7), None)
+
+    def blocking(func):
+        # what the handlers did before: the query runs on the event loop thread
+        async def call(*args):
+            with Database().session_scope():
+                return func(*args)
+        return call
+
+    if mode == 'blocking':
+        load_context, top_up = blocking(get_user_context), blocking(update_balance)
+    else:
+        load_context, top_up = aio.get_user_context, aio.update_balance
+
+    async def user(user_id: int) -> None:
+        for _ in range(UPDATES_PER_USER):
+            await load_context(user_id)
+            await top_up(user_id, 1)
+            await asyncio.sleep(API_ROUND_TRIP)
+
+    async def main() -> tuple[float, float]:
+        lag = 0.0
+        done = False
+
+        async def heartbeat():
+            nonlocal lag
+            while not done:
+                started = time.perf_counter()
+                await asyncio.sleep(0.001)
+                lag = max(lag, time.perf_counter() - started - 0.001)
+
+        beat = asyncio.create_task(heartbeat())
+        started = time.perf_counter()
+        await asyncio.gather(*(user(user_id) for user_id in range(1, USERS + 1)))
+        elapsed = time.perf_counter() - started
+        done = True
+        await beat
+        return elapsed, lag
+
+    elapsed, lag = asyncio.run(main())
+    with Database().session_scope():
+        balances = sum(get_user_context(user_id).balance for user_id in range(1, USERS + 1))
+    return {'updates_per_second': USERS * UPDATES_PER_USER / elapsed, 'max_loop_lag': lag, 'balances': balances}
+
+
+@pytest.mark.benchmark
+def test_concurrent_users_throughput(tmp_path, record_property):
+    reports = {mode: run_isolated(tmp_path / mode, __file__, mode, profile='performance')
+               for mode in ('blocking', 'async')}
+    for mode, report in reports.items():
+        record_property(f'{mode}_updates_per_second', round(report['updates_per_second']))
+        print(f'{mode}: {report["updates_per_second"]:.0f} updates/s, '
+              f'max event loop lag {report["max_loop_lag"] * 1000:.1f} ms')
+        assert report['balances'] == USERS * UPDATES_PER_USER
+    assert reports['async']['max_loop_lag'] < reports['blocking']['max_loop_lag']
+
+
+if __name__ == '__main__':
+    print(json.dumps(_serve(sys.argv[1])))
@@ -0,0 +1,18 @@
+from bot.database.methods import create_category, create_item, get_items_page
+
+NAMES = [f'Key_{number:02d}' for number in range(25)]
+
+
+def test_pages_walk_goods_by_name(db):
+    create_category('Keys_and_locks')
+    for name in reversed(NAMES):
+        create_item(name, 'd', 10, 'Keys_and_locks')
+
+    first = get_items_page('Keys_and_locks')
+    second = get_items_page('Keys_and_locks', after=first[-1])
+    third = get_items_page('Keys_and_locks', after=second[-1])
+    assert first + second + third == NAMES
+    assert get_items_page('Keys_and_locks', after=third[-1]) == []
+    assert get_items_page('Keys_and_locks', before=third[0]) == second
+    assert get_items_page('Keys_and_locks', before=second[0]) == first
+    assert get_items_page('Keys_and_locks', before=first[0]) == []
@@ -0,0 +1,42 @@
+from bot.database.cache import catalog_cache
+from bot.database.methods import create_category, create_item, add_values_to_item, add_values_to_item_bulk, \
+    delete_only_items, get_item_info, rebuild_stock_counters
+from bot.database.models import Goods
+
+
+def _item(db):
+    create_category('Keys')
+    create_item('Key', 'd', 10, 'Keys')
+    assert get_item_info('Key')['is_infinite'] is False
+
+
+def test_infinite_value_refreshes_item_info(db):
+    _item(db)
+    add_values_to_item('Key', 'forever', True)
+    assert get_item_info('Key')['is_infinite'] is True
+
+
+def test_infinite_bulk_upload_refreshes_item_info(db):
+    _item(db)
+    add_values_to_item_bulk('Key', ['forever'], is_infinity=True)
+    assert get_item_info('Key')['is_infinite'] is True
+
+
+def test_deleting_stock_refreshes_item_info(db):
+    _item(db)
+    add_values_to_item('Key', 'forever', True)
+    assert get_item_info('Key')['is_infinite'] is True
+    delete_only_items('Key')
+    assert get_item_info('Key')['is_infinite'] is False
+
+
+def test_repaired_counters_refresh_item_info(db):
+    _item(db)
+    add_values_to_item('Key', 'forever', True)
+    db.session.query(Goods).update({Goods.is_infinite: False})
+    db.session.commit()
+    catalog_cache.invalidate()
+    assert get_item_info('Key')['is_infinite'] is False
+    rebuild_stock_counters()
+    assert get_item_info('Key')['is_infinite'] is True
+
@@ -0,0 +1,80 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bot.utils import files
+from bot.utils.files import append_lines_to_file, pop_line_from_file, lines_count, item_lock
+from tests.conftest import wait_for_compaction
+
+ITEM = 'Stress item'
+POPS = 1000
+PROCESSES = 4
+THREADS = 8
+
+
+@pytest.fixture
+def stock(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # compact every few pops, so compaction races with the pops as well
+    monkeypatch.setattr(files, 'LINES_COMPACT_THRESHOLD', 256)
+    lines = [f'line-{number:04d}' for number in range(POPS)]
+    append_lines_to_file(ITEM, lines)
+    yield lines
+    wait_for_compaction()
+
+
+def _pop_until_empty(_=None) -> list[str]:
+    popped = []
+    while (line := pop_line_from_file(ITEM)) is not None:
+        popped.append(line)
+    return popped
+
+
+def _drain_with_threads(threads: int) -> list[str]:
+    with ThreadPoolExecutor(threads) as pool:
+        return [line for popped in pool.map(_pop_until_empty, range(threads)) for line in popped]
+
+
+def _report(record_property, name: str, seconds: float) -> None:
+    rate = POPS / seconds
+    record_property(f'{name}_pops_per_second', round(rate))
+    print(f'{name}: {POPS} pops in {seconds:.3f}s ({rate:.0f} pops/s)')
+
+
+def test_threads_deliver_every_line_once(stock, record_property):
+    started = time.perf_counter()
+    popped = _drain_with_threads(THREADS * 2)
+    _report(record_property, 'threads', time.perf_counter() - started)
+
+    assert sorted(popped) == stock
+    assert lines_count(ITEM) == 0
+
+
+@pytest.mark.skipif(files.fcntl is None, reason='cross-process locking needs fcntl')
+def test_processes_deliver_every_line_once(stock, record_property):
+    started = time.perf_counter()
+    with multiprocessing.get_context('fork').Pool(PROCESSES) as pool:
+        popped = [line for lines in pool.map(_drain_with_threads, [THREADS] * PROCESSES) for line in lines]
+    _report(record_property, 'processes', time.perf_counter() - started)
+
+    assert sorted(popped) == stock
+    assert lines_count(ITEM) == 0
+
+
+def test_coroutines_deliver_every_line_once(stock, record_property):
+    async def sell() -> str | None:
+        async with item_lock(ITEM):
+            return await asyncio.to_thread(pop_line_from_file, ITEM)
+
+    async def main() -> list[str | None]:
+        return await asyncio.gather(*(sell() for _ in range(POPS + 10)))
+
+    started = time.perf_counter()
+    popped = asyncio.run(main())
+    _report(record_property, 'coroutines', time.perf_counter() - started)
+
+    assert sorted(line for line in popped if line is not None) == stock
+    assert popped.count(None) == 10
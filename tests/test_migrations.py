@@ -0,0 +1,72 @@
+import datetime
+import shutil
+from pathlib import Path
+
+import sqlalchemy as sa
+from alembic import command
+
+from tests.conftest import alembic_config
+
+SHIPPED_DATABASE = Path(__file__).resolve().parent.parent / 'database.db'
+TIMESTAMPS = (
+    ('users', 'registration_date'),
+    ('bought_goods', 'bought_datetime'),
+    ('operations', 'operation_time'),
+)
+
+
+def _seed_varchar_timestamps(connection) -> None:
+    connection.exec_driver_sql('CREATE TABLE users (telegram_id BIGINT NOT NULL PRIMARY KEY, '
+                               'registration_date VARCHAR NOT NULL, referral_id BIGINT)')
+    connection.exec_driver_sql('CREATE TABLE bought_goods (id INTEGER NOT NULL PRIMARY KEY, '
+                               'bought_datetime VARCHAR NOT NULL)')
+    connection.exec_driver_sql('CREATE TABLE operations (id INTEGER NOT NULL PRIMARY KEY, '
+                               'operation_time VARCHAR NOT NULL)')
+    connection.exec_driver_sql("INSERT INTO users VALUES (1, '2025-07-07 02:38:21', NULL)")
+    connection.exec_driver_sql("INSERT INTO bought_goods VALUES (1, '2025-07-08 10:00:00')")
+    connection.exec_driver_sql("INSERT INTO operations VALUES (1, '2025-07-09 23:59:59')")
+
+
+def _timestamps(connection, table: str, column: str) -> list:
+    query = sa.select(sa.column(column, sa.DateTime)).select_from(sa.table(table))
+    return connection.execute(query).scalars().all()
+
+
+def test_datetime_migration_keeps_sqlite_text(tmp_path):
+    engine = sa.create_engine(f'sqlite:///{tmp_path / "varchar.db"}')
+    with engine.begin() as connection:
+        _seed_varchar_timestamps(connection)
+        config = alembic_config(connection)
+        command.stamp(config, '5c1f0e9a7b23')
+        command.upgrade(config, '9e4b27d1c6fa')
+
+        for table, column in TIMESTAMPS:
+            stored = connection.exec_driver_sql(f'SELECT {column}, typeof({column}) FROM {table}').one()
+            assert stored[1] == 'text'
+            assert len(stored[0]) == 26
+            assert f'ix_{table}_{column}' in {index['name'] for index in sa.inspect(connection).get_indexes(table)}
+        assert _timestamps(connection, 'users', 'registration_date') == [datetime.datetime(2025, 7, 7, 2, 38, 21)]
+        assert _timestamps(connection, 'operations', 'operation_time') == [datetime.datetime(2025, 7, 9, 23, 59, 59)]
+
+        command.downgrade(config, '5c1f0e9a7b23')
+        assert connection.exec_driver_sql('SELECT registration_date FROM users').scalar() == '2025-07-07 02:38:21'
+
+
+def test_shipped_database_upgrades_to_head(tmp_path):
+    path = tmp_path / 'database.db'
+    shutil.copy(SHIPPED_DATABASE, path)
+    engine = sa.create_engine(f'sqlite:///{path}')
+    with engine.begin() as connection:
+        before = {table: connection.exec_driver_sql(f'SELECT {column} FROM {table} ORDER BY rowid').scalars().all()
+                  for table, column in TIMESTAMPS}
+        config = alembic_config(connection)
+        command.stamp(config, '365d7977dc8d')
+        command.upgrade(config, 'head')
+
+        for table, column in TIMESTAMPS:
+            after = connection.exec_driver_sql(f'SELECT {column} FROM {table} ORDER BY rowid').scalars().all()
+            assert [value[:19] for value in after] == before[table]
+        days = connection.exec_driver_sql('SELECT day FROM daily_stats').scalars().all()
+        registered = {value[:10] for value in before['users']}
+        assert registered <= set(days)
+        assert all(day.startswith('20') for day in days)
@@ -0,0 +1,29 @@
+import datetime
+
+from bot.database.methods import create_user, check_role, set_role, select_max_role_id
+from bot.database.models import Permission
+
+
+def test_role_masks(db):
+    now = datetime.datetime(2025, 7, 7)
+    create_user(1, now, None)
+    create_user(2, now, None, role=2)
+    create_user(3, now, None, role=select_max_role_id())
+
+    user, admin, owner = check_role(1), check_role(2), check_role(3)
+    assert user == Permission.USE
+    assert admin & Permission.SHOP_MANAGE and not admin & Permission.ADMINS_MANAGE
+    assert owner & Permission.ADMINS_MANAGE and owner & Permission.OWN
+    assert not user & Permission.CONSOLE and admin & Permission.CONSOLE
+
+
+def test_string_ids_share_cache_entry(db):
+    create_user(555, datetime.datetime(2025, 7, 7), None)
+    assert check_role('555') == check_role(555) == Permission.USE
+
+    set_role('555', 2)
+    assert check_role('555') == check_role(555)
+    assert check_role('555') & Permission.SHOP_MANAGE
+
+    set_role(555, 1)
+    assert check_role('555') == Permission.USE
@@ -0,0 +1,83 @@
+import json
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tests.isolated import create_schema, run_isolated
+
+# the database threads of the bot (DB_POOL_SIZE) and the IPN server
+WORKERS = 6
+OPERATIONS = 3000
+BUYERS = 200
+# share of each kind of operation in the load
+MIX = {'purchase': 5, 'top_up': 3, 'statistics': 2}
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def _load() -> dict:
+    """Run the mixed load against the profile the child was started with."""
+    import datetime
+
+    from bot.database import Database
+    from bot.database.methods import add_values_to_item_bulk, create_category, create_item, create_operation, \
+        create_user, get_dashboard_stats, purchase_item, update_balance
+
+    create_schema()
+    now = datetime.datetime(2025, 7, 7, 12, 0)
+    with Database().session_scope():
+        for user_id in range(1, BUYERS + 1):
+            create_user(user_id, now, None)
+            update_balance(user_id, 10 ** 6)
+        create_category('Keys')
+        create_item('Key', 'd', 10, 'Keys')
+        add_values_to_item_bulk('Key', (f'key-{number}' for number in range(OPERATIONS)))
+
+    operations = {
+        'purchase': lambda user_id: purchase_item(user_id, 'Key', 10, now),
+        'top_up': lambda user_id: (create_operation(user_id, 5, now), update_balance(user_id, 5)),
+        'statistics': lambda user_id: get_dashboard_stats(now.strftime('%Y-%m-%d')),
+    }
+    plan = random.Random(7).choices(list(MIX), weights=list(MIX.values()), k=OPERATIONS)
+
+    def run(index: int) -> tuple[str, float]:
+        kind = plan[index]
+        started = time.perf_counter()
+        with Database().session_scope():
+            operations[kind](index % BUYERS + 1)
+        return kind, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(WORKERS) as pool:
+        samples = list(pool.map(run, range(OPERATIONS)))
+    elapsed = time.perf_counter() - started
+    report = {'operations_per_second': OPERATIONS / elapsed}
+    for kind in MIX:
+        latencies = [latency for sample_kind, latency in samples if sample_kind == kind]
+        report[kind] = {'p50': _percentile(latencies, 0.5), 'p99': _percentile(latencies, 0.99)}
+    with Database().session_scope():
+        report['sold'] = get_dashboard_stats(now.strftime('%Y-%m-%d')).sold
+    report['purchases'] = plan.count('purchase')
+    return report
+
+
+@pytest.mark.benchmark
+def test_profile_latency(tmp_path, record_property):
+    for profile in ('default', 'performance'):
+        report = run_isolated(tmp_path / profile, __file__, profile=profile)
+        assert report['sold'] == report['purchases']
+        print(f'{profile}: {report["operations_per_second"]:.0f} operations/s')
+        for kind in MIX:
+            p50, p99 = report[kind]['p50'] * 1000, report[kind]['p99'] * 1000
+            record_property(f'{profile}_{kind}_p99_ms', round(p99, 2))
+            print(f'  {kind}: p50 {p50:.2f} ms, p99 {p99:.2f} ms')
+
+
+if __name__ == '__main__':
+    print(json.dumps(_load()))
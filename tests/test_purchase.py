@@ -0,0 +1,137 @@
+import datetime
+
+import pytest
+
+from bot.database.methods import purchase
+from bot.database.methods import create_user, update_balance, create_category, create_item, \
+    add_values_to_item_bulk, get_user_balance, purchase_item, reserve_item, get_basket, checkout_reservations, \
+    expire_reservations, delete_only_items
+from bot.database.models import ItemValues, ValueHashes
+from bot.utils.files import lines_count, pop_line_from_file
+
+NOW = datetime.datetime(2025, 7, 7, 12, 0)
+
+
+@pytest.fixture
+def shop(db):
+    create_user(1, NOW, None)
+    update_balance(1, 100)
+    create_category('Keys')
+    create_item('Key', 'd', 10, 'Keys')
+    add_values_to_item_bulk('Key', ['k1', 'k2'])
+    return db
+
+
+def test_purchase_sells_the_first_line(shop):
+    assert purchase_item(1, 'Key', 10, NOW) == (90, 'k1')
+    assert lines_count('Key') == 1
+
+
+def test_failed_purchase_keeps_the_line(shop, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError('commit failed')
+
+    monkeypatch.setattr(purchase, 'record_daily_stats', fail)
+    with pytest.raises(RuntimeError):
+        purchase_item(1, 'Key', 10, NOW)
+
+    assert get_user_balance(1) == 100
+    assert lines_count('Key') == 2
+    assert sorted([pop_line_from_file('Key'), pop_line_from_file('Key')]) == ['k1', 'k2']
+
+
+def test_failed_reservation_keeps_the_line(shop, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError('commit failed')
+
+    monkeypatch.setattr(purchase, '_consume_stock', fail)
+    with pytest.raises(RuntimeError):
+        reserve_item(1, 'Key', NOW + datetime.timedelta(minutes=15))
+
+    assert get_basket(1) == []
+    assert lines_count('Key') == 2
+
+
+@pytest.fixture
+def legacy_shop(shop):
+    # stock uploaded before value_hashes existed has no digests
+    shop.session.query(ValueHashes).delete()
+    shop.session.commit()
+    return shop
+
+
+def test_sold_legacy_line_cannot_be_uploaded_again(legacy_shop):
+    assert purchase_item(1, 'Key', 10, NOW) == (90, 'k1')
+    assert add_values_to_item_bulk('Key', ['k1']).duplicates == 1
+
+
+def test_checked_out_legacy_line_cannot_be_uploaded_again(legacy_shop):
+    assert reserve_item(1, 'Key', NOW + datetime.timedelta(minutes=10))
+    assert checkout_reservations(1, NOW) == (90, [('Key', 'k1')])
+    assert add_values_to_item_bulk('Key', ['k1']).duplicates == 1
+
+
+def test_checkout_sells_only_what_it_claims(shop, monkeypatch):
+    assert reserve_item(1, 'Key', NOW + datetime.timedelta(minutes=15))
+    # the expiry sweep releases the basket right before checkout claims it
+    delete = purchase.sqlalchemy.delete
+
+    def swept_delete(table):
+        if table is purchase.Reservations:
+            monkeypatch.setattr(purchase.sqlalchemy, 'delete', delete)
+            expire_reservations(NOW + datetime.timedelta(hours=1))
+        return delete(table)
+
+    monkeypatch.setattr(purchase.sqlalchemy, 'delete', swept_delete)
+    assert checkout_reservations(1, NOW) == (100, [])
+    assert get_user_balance(1) == 100
+    assert sorted([pop_line_from_file('Key'), pop_line_from_file('Key')]) == ['k1', 'k2']
+
+
+def test_checkout_refuses_expired_reservations(shop):
+    assert reserve_item(1, 'Key', NOW + datetime.timedelta(minutes=15))
+    assert checkout_reservations(1, NOW + datetime.timedelta(minutes=15)) == (100, [])
+    assert len(get_basket(1)) == 1
+
+
+def test_checkout_keeps_basket_without_funds(shop):
+    assert reserve_item(1, 'Key', NOW + datetime.timedelta(minutes=15))
+    update_balance(1, -95)
+    assert checkout_reservations(1, NOW) is None
+    assert len(get_basket(1)) == 1
+
+
+def test_sale_removes_the_row_of_the_sold_value(shop, monkeypatch):
+    # a failed sale appends k1 back behind k2, so the file no longer follows the row order
+    def fail(*args, **kwargs):
+        raise RuntimeError('commit failed')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(purchase, 'record_daily_stats', fail)
+        with pytest.raises(RuntimeError):
+            purchase_item(1, 'Key', 10, NOW)
+
+    assert purchase_item(1, 'Key', 10, NOW) == (90, 'k2')
+    assert [value for value, in shop.session.query(ItemValues.value)] == ['k1']
+    delete_only_items('Key')
+    assert add_values_to_item_bulk('Key', ['k2']).duplicates == 1
+
+
+def test_basket_is_capped(shop):
+    add_values_to_item_bulk('Key', [f'k{number}' for number in range(3, 10)])
+    assert [reserve_item(1, 'Key', NOW, limit=3) for _ in range(4)] == [True, True, True, False]
+    assert len(get_basket(1)) == 3
+
+
+def test_balance_must_cover_the_basket(shop):
+    update_balance(1, -85)
+    assert reserve_item(1, 'Key', NOW)
+    assert not reserve_item(1, 'Key', NOW)
+    assert lines_count('Key') == 1
+
+
+def test_reservations_keep_their_own_expiry(shop):
+    assert reserve_item(1, 'Key', NOW)
+    assert reserve_item(1, 'Key', NOW + datetime.timedelta(minutes=15))
+    assert expire_reservations(NOW) == 1
+    assert [row.item_name for row in get_basket(1)] == ['Key']
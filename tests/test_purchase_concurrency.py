@@ -0,0 +1,100 @@
+import json
+import sys
+import time
+
+import pytest
+
+from tests.isolated import create_schema, run_isolated
+
+PRICE = 10
+BUYERS = 200
+PURCHASES_PER_BUYER = 10
+ITEMS = 20
+
+
+def _shop(items: int, stock: int, buyers: int, balance: int):
+    import datetime
+
+    from bot.database import Database
+    from bot.database.methods import add_values_to_item_bulk, create_category, create_item, create_user, \
+        update_balance
+
+    create_schema()
+    with Database().session_scope():
+        create_category('Keys')
+        for item in range(items):
+            create_item(f'Key {item}', 'd', PRICE, 'Keys')
+            add_values_to_item_bulk(f'Key {item}', (f'key-{item}-{number}' for number in range(stock)))
+        for user_id in range(1, buyers + 1):
+            create_user(user_id, datetime.datetime(2025, 7, 7), None)
+            update_balance(user_id, balance)
+
+
+def _overdraw() -> dict:
+    """Fire ten purchases at once against a balance that covers two of them."""
+    import asyncio
+    import datetime
+
+    from bot.database import Database
+    from bot.database.methods import aio, get_user_balance
+
+    _shop(items=5, stock=10, buyers=1, balance=25)
+
+    async def main():
+        now = datetime.datetime(2025, 7, 7, 12, 0)
+        return await asyncio.gather(*(aio.purchase_item(1, f'Key {number % 5}', PRICE, now)
+                                      for number in range(10)))
+
+    sold = [sale for sale in asyncio.run(main()) if sale is not None]
+    with Database().session_scope():
+        return {'sold': len(sold), 'balances': sorted(balance for balance, _ in sold),
+                'balance': get_user_balance(1)}
+
+
+def _sales() -> dict:
+    """Let ``BUYERS`` users buy concurrently through the aio layer and measure sales per second."""
+    import asyncio
+    import datetime
+
+    from bot.database import Database
+    from bot.database.methods import aio, get_dashboard_stats
+
+    _shop(items=ITEMS, stock=BUYERS * PURCHASES_PER_BUYER // ITEMS, buyers=BUYERS,
+          balance=PRICE * PURCHASES_PER_BUYER)
+    now = datetime.datetime(2025, 7, 7, 12, 0)
+
+    async def buyer(user_id: int) -> list[str]:
+        values = []
+        for number in range(PURCHASES_PER_BUYER):
+            sale = await aio.purchase_item(user_id, f'Key {(user_id + number) % ITEMS}', PRICE, now)
+            if sale is not None:
+                values.append(sale[1])
+        return values
+
+    async def main():
+        return await asyncio.gather(*(buyer(user_id) for user_id in range(1, BUYERS + 1)))
+
+    started = time.perf_counter()
+    values = [value for bought in asyncio.run(main()) for value in bought]
+    elapsed = time.perf_counter() - started
+    with Database().session_scope():
+        recorded = get_dashboard_stats(now.strftime('%Y-%m-%d')).sold
+    return {'sales_per_second': len(values) / elapsed, 'sold': len(values), 'unique': len(set(values)),
+            'recorded': recorded}
+
+
+def test_concurrent_purchases_cannot_overdraw(tmp_path):
+    report = run_isolated(tmp_path, __file__, 'overdraw', profile='performance')
+    assert report == {'sold': 2, 'balances': [5, 15], 'balance': 5}
+
+
+@pytest.mark.benchmark
+def test_sales_per_second(tmp_path, record_property):
+    report = run_isolated(tmp_path, __file__, 'sales', profile='performance')
+    record_property('sales_per_second', round(report['sales_per_second']))
+    print(f'{BUYERS} buyers: {report["sold"]} sales at {report["sales_per_second"]:.0f} sales/s')
+    assert report['sold'] == report['unique'] == report['recorded'] == BUYERS * PURCHASES_PER_BUYER
+
+
+if __name__ == '__main__':
+    print(json.dumps({'overdraw': _overdraw, 'sales': _sales}[sys.argv[1]]()))
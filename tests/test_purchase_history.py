@@ -0,0 +1,69 @@
+import datetime
+import time
+
+import pytest
+import sqlalchemy
+
+from bot.database.methods import create_user, select_bought_items, select_bought_items_page, bought_items_list, \
+    select_user_items
+from bot.database.models import BoughtGoods, User
+from tests.test_user_context import count_queries
+
+BOUGHT = datetime.datetime(2025, 7, 7)
+ROUNDS = 20
+
+
+def _history(db, purchases: int) -> None:
+    create_user(1, BOUGHT, None)
+    create_user(2, BOUGHT, None)
+    db.session.execute(sqlalchemy.insert(BoughtGoods.__table__), [
+        {'item_name': f'Key {number}', 'value': f'value-{number}' * 8, 'price': 10, 'buyer_id': 1 + number % 2,
+         'bought_datetime': BOUGHT, 'unique_id': number}
+        for number in range(purchases * 2)])
+    db.session.query(User).update({User.purchases_count: purchases})
+    db.session.commit()
+
+
+def _page_by_slicing(index: int) -> tuple[list[str], int]:
+    """A history page as it was read before: every purchase loaded, ten kept."""
+    items = select_bought_items(1)
+    return [item.item_name for item in items[index * 10:index * 10 + 10]], len(bought_items_list(1))
+
+
+def test_pages_match_the_whole_history(db):
+    _history(db, 35)
+    pages, page = [], select_bought_items_page(1)
+    while page:
+        pages.append([row.item_name for row in page])
+        page = select_bought_items_page(1, after_id=page[-1].id)
+
+    assert pages == [_page_by_slicing(index)[0] for index in range(4)]
+    assert select_bought_items_page(1, before_id=select_bought_items_page(1, after_id=0)[0].id) == []
+    with count_queries() as statements:
+        select_bought_items_page(1, after_id=40)
+        assert select_user_items(1) == 35
+    assert len(statements) == 2
+
+
+@pytest.mark.benchmark
+def test_history_page_speed(db, record_property):
+    _history(db, 20_000)
+    last_page = select_bought_items_page(1, before_id=2 ** 31)
+    # the cursor of the page before the last one, as the keyboard would hold it
+    cursor = last_page[0].id
+
+    def keyset() -> tuple[list[str], int]:
+        return [row.item_name for row in select_bought_items_page(1, before_id=cursor)], select_user_items(1)
+
+    def slicing() -> tuple[list[str], int]:
+        return _page_by_slicing(1998)
+
+    assert keyset() == slicing()
+    for name, read in (('slicing', slicing), ('keyset', keyset)):
+        started = time.perf_counter()
+        for _ in range(ROUNDS):
+            read()
+            db.remove_session()
+        milliseconds = (time.perf_counter() - started) / ROUNDS * 1000
+        record_property(f'{name}_ms', round(milliseconds, 2))
+        print(f'{name}: {milliseconds:.2f} ms per page')
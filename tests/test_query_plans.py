@@ -0,0 +1,154 @@
+import datetime
+import inspect
+import re
+
+import pytest
+from sqlalchemy import event
+
+from bot.database import Database
+from bot.database.cache import CategoryTree, ValueFilter
+from bot.database.methods import read, create_user, create_category, create_item, add_values_to_item_bulk
+
+DAY = '2025-07-07'
+
+# every query function of read.py with the arguments it is planned with
+QUERIES = {
+    'check_user': (1,),
+    'get_user_context': (1,),
+    'check_role': (1,),
+    'check_role_name_by_id': (1,),
+    'select_max_role_id': (),
+    'select_today_users': (DAY,),
+    'get_user_count': (),
+    'select_admins': (),
+    'get_all_users': (),
+    'get_category_tree': (),
+    'get_value_filter': (),
+    'known_digests': ([b'\0' * 32],),
+    'get_items_page': ('Keys',),
+    'count_items': ('Keys',),
+    'get_all_items': ('Keys',),
+    'get_category_availability': ('Keys',),
+    'get_bought_item_info': ('1',),
+    'get_item_info': ('Key',),
+    'get_user_balance': (1,),
+    'get_user_language': (1,),
+    'get_all_admins': (),
+    'check_item': ('Key',),
+    'check_category': ('Keys',),
+    'get_item_value': ('Key',),
+    'select_item_values_amount': ('Key',),
+    'check_value': ('Key',),
+    'select_user_items': (1,),
+    'select_bought_items': (1,),
+    'select_bought_items_page': (1,),
+    'get_basket': (1,),
+    'select_bought_item': (1,),
+    'bought_items_list': (1,),
+    'select_all_users': (),
+    'get_dashboard_stats': (DAY,),
+    'select_count_items': (),
+    'select_count_goods': (),
+    'select_count_categories': (),
+    'select_count_bought_items': (),
+    'select_today_orders': (DAY,),
+    'select_all_orders': (),
+    'select_today_operations': (DAY,),
+    'select_all_operations': (),
+    'select_users_balance': (),
+    'select_user_operations': (1,),
+    'select_unfinished_operations': ('op',),
+    'get_unfinished_operation': ('op',),
+    'check_user_referrals': (1,),
+    'get_user_referral': (1,),
+}
+# functions of read.py that build or serve queries without running one of their own
+NOT_QUERIES = {'day_bounds', 'category_subtree', 'get_all_categories', 'get_subcategories', 'get_category_parent',
+               'get_categories_page', 'get_subcategories_page'}
+# tables read whole by design: lifetime aggregates, exports and the loaders of the in-memory indexes
+WHOLE_TABLE_READS = {
+    'check_role': {'roles'},
+    'get_user_count': {'users'},
+    'get_all_users': {'users'},
+    'select_all_users': {'users'},
+    'get_category_tree': {'categories'},
+    'get_value_filter': {'value_hashes'},
+    'get_dashboard_stats': {'users', 'daily_stats', 'item_values', 'goods', 'categories'},
+    'select_count_items': {'item_values'},
+    'select_count_goods': {'goods'},
+    'select_count_categories': {'categories'},
+    'select_count_bought_items': {'bought_goods'},
+    'select_all_orders': {'bought_goods'},
+    'select_all_operations': {'operations'},
+    'select_users_balance': {'users'},
+}
+TABLES = set(Database.BASE.metadata.tables)
+
+
+@pytest.fixture
+def plans(db, monkeypatch):
+    create_user(1, datetime.datetime(2025, 7, 7), None)
+    create_category('Keys')
+    create_item('Key', 'd', 10, 'Keys')
+    add_values_to_item_bulk('Key', ['k1'])
+    # unloaded indexes, so their loaders query the database
+    monkeypatch.setattr(read, 'category_tree', CategoryTree())
+    monkeypatch.setattr(read, 'value_filter', ValueFilter())
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not statement.startswith('EXPLAIN'):
+            statements.append((statement, parameters))
+
+    def explain(name):
+        statements.clear()
+        getattr(read, name)(*QUERIES[name])
+        connection = Database().session.connection()
+        return [detail for statement, parameters in list(statements)
+                for *_, detail in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+
+    event.listen(Database().engine, 'before_cursor_execute', capture)
+    try:
+        yield explain
+    finally:
+        event.remove(Database().engine, 'before_cursor_execute', capture)
+
+
+def table_scans(plan: list[str], allowed: set[str] = frozenset()) -> list[str]:
+    """Return the plan steps that read a whole table, other than ``allowed``, rather than searching an index."""
+    return [step for step in plan
+            if (match := re.match(r'SCAN (\w+)', step)) and match.group(1) in TABLES - allowed]
+
+
+def test_every_query_is_planned():
+    functions = {name for name, function in inspect.getmembers(read, inspect.isfunction)
+                 if inspect.unwrap(function).__module__ == read.__name__}
+    assert functions - NOT_QUERIES == set(QUERIES)
+
+
+@pytest.mark.parametrize('name', sorted(QUERIES))
+def test_query_uses_index(plans, name):
+    plan = plans(name)
+    assert plan, f'{name} ran no query'
+    assert not table_scans(plan, WHOLE_TABLE_READS.get(name, set())), f'{name}: {plan}'
+
+
+@pytest.mark.parametrize('name', ['select_admins', 'get_all_admins'])
+def test_admin_lookups_use_role_index(plans, name):
+    assert any('ix_users_role_id' in step for step in plans(name))
+
+
+def test_dashboard_counts_admins_by_index(plans):
+    plan = plans('get_dashboard_stats')
+    assert any('ix_users_role_id' in step for step in plan)
+    # today's users, revenue and top-ups are primary key lookups in the rollup
+    assert sum(step.startswith('SEARCH daily_stats') for step in plan) == 3
+
+
+@pytest.mark.parametrize('cursor', [(None, None), ('Key', None), (None, 'Key')], ids=['first', 'after', 'before'])
+def test_goods_pages_use_category_name_index(plans, monkeypatch, cursor):
+    monkeypatch.setitem(QUERIES, 'get_items_page', ('Keys', *cursor))
+    plan = plans('get_items_page')
+    assert any('ix_goods_category_name_name' in step for step in plan), plan
+    # the index already holds each category's goods in name order
+    assert not any('TEMP B-TREE' in step for step in plan), plan
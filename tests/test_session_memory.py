@@ -0,0 +1,67 @@
+import datetime
+import gc
+import os
+
+import pytest
+import sqlalchemy
+
+from bot.database import Database
+from bot.database.methods import create_user, select_bought_items
+from bot.database.models import BoughtGoods
+
+BUYERS = 10
+ROWS_PER_BUYER = 10_000
+# 100k purchases held as ORM objects take well over 100 MiB
+MAX_GROWTH = 16 * 1024 * 1024
+
+pytestmark = pytest.mark.skipif(not os.path.exists('/proc/self/statm'), reason='RSS is read from /proc')
+
+
+def rss() -> int:
+    gc.collect()
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+@pytest.fixture
+def purchases(db):
+    bought = datetime.datetime(2025, 7, 7)
+    for buyer in range(1, BUYERS + 1):
+        create_user(buyer, bought, None)
+    statement = sqlalchemy.insert(BoughtGoods.__table__)
+    for buyer in range(1, BUYERS + 1):
+        db.session.execute(statement, [
+            {'item_name': 'Key', 'value': f'value-{buyer}-{number:05d}' * 4, 'price': 10, 'buyer_id': buyer,
+             'bought_datetime': bought, 'unique_id': buyer * ROWS_PER_BUYER + number}
+            for number in range(ROWS_PER_BUYER)])
+    db.session.commit()
+    db.remove_session()
+
+
+def read_every_buyer() -> int:
+    rows = 0
+    for buyer in range(1, BUYERS + 1):
+        with Database().session_scope():
+            rows += len(select_bought_items(buyer))
+    return rows
+
+
+def test_rss_stays_flat_across_units_of_work(purchases):
+    # the first pass warms up the allocator, statement caches and the like
+    assert read_every_buyer() == BUYERS * ROWS_PER_BUYER
+    baseline = rss()
+
+    for _ in range(3):
+        read_every_buyer()
+
+    growth = rss() - baseline
+    print(f'RSS growth after {3 * BUYERS * ROWS_PER_BUYER} more rows: {growth / 1024 / 1024:.1f} MiB')
+    assert growth < MAX_GROWTH
+
+
+def test_sessions_end_with_their_unit_of_work(purchases):
+    with Database().session_scope() as session:
+        items = select_bought_items(1)
+        assert len(session.identity_map) == ROWS_PER_BUYER
+    assert all(sqlalchemy.inspect(item).detached for item in items)
+    assert len(Database().session().identity_map) == 0
@@ -0,0 +1,89 @@
+import json
+import os
+import resource
+import sys
+
+import pytest
+
+from tests.isolated import create_schema, run_isolated
+
+LINE_PADDING = 'x' * 500
+# a 500 MB upload that was held in memory would take several times its size
+MAX_GROWTH = 64 * 1024 * 1024
+
+
+class _Document:
+    """Stand-in for a Telegram document that is downloaded in chunks of generated lines."""
+
+    file_name = 'stock.txt'
+
+    def __init__(self, megabytes: int):
+        self.size = megabytes * 1024 * 1024
+        self.lines = 0
+
+    async def download(self, destination_file: str) -> None:
+        written = 0
+        with open(destination_file, 'w') as f:
+            while written < self.size:
+                chunk = ''.join(f'{self.lines + number:012d}-{LINE_PADDING}\n' for number in range(128))
+                self.lines += 128
+                written += f.write(chunk)
+
+
+def _rss() -> int:
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def _upload(megabytes: int) -> dict:
+    """Upload a ``megabytes`` document into a file database; run in a fresh interpreter."""
+    import asyncio
+    from types import SimpleNamespace
+
+    from bot.database import Database
+    from bot.database.methods import add_values_to_item_bulk, create_category, create_item
+    from bot.utils.files import lines_count, uploaded_values
+
+    create_schema()
+    with Database().session_scope():
+        create_category('Keys')
+        create_item('Key', 'd', 10, 'Keys')
+    message = SimpleNamespace(document=_Document(megabytes), text=None)
+    baseline = _rss()
+
+    async def upload():
+        async with uploaded_values(message) as values:
+            return await Database().run(add_values_to_item_bulk, 'Key', values)
+
+    result = asyncio.run(upload())
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return {'lines': message.document.lines, 'stored': result.stored, 'in_file': lines_count('Key'),
+            'growth': peak - baseline}
+
+
+def run_upload(tmp_path, megabytes: int) -> dict:
+    report = run_isolated(tmp_path, __file__, megabytes)
+    print(f'{megabytes} MB upload: {report["stored"]} lines, '
+          f'peak RSS growth {report["growth"] / 1024 / 1024:.1f} MiB')
+    assert report['stored'] == report['lines'] == report['in_file']
+    return report
+
+
+pytestmark = pytest.mark.skipif(not os.path.exists('/proc/self/statm'), reason='RSS is read from /proc')
+
+
+def test_upload_memory_does_not_grow_with_file_size(tmp_path):
+    small = run_upload(tmp_path / 'small', 4)
+    large = run_upload(tmp_path / 'large', 48)
+    assert large['growth'] - small['growth'] < 16 * 1024 * 1024
+
+
+@pytest.mark.benchmark
+def test_upload_500_mb(tmp_path, record_property):
+    report = run_upload(tmp_path, 500)
+    record_property('peak_rss_growth_mib', round(report['growth'] / 1024 / 1024, 1))
+    assert report['growth'] < MAX_GROWTH
+
+
+if __name__ == '__main__':
+    print(json.dumps(_upload(int(sys.argv[1]))))
@@ -0,0 +1,28 @@
+import os
+
+from bot.database.methods import create_category, create_item, add_values_to_item, delete_item
+from bot.utils.files import UPLOADS_ROOT, get_next_file_path
+
+
+def _upload(path: str) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write('file')
+    return path
+
+
+def test_deleting_item_removes_only_legacy_uploads_one_by_one(db, monkeypatch):
+    create_category('Keys')
+    create_item('Key', 'd', 10, 'Keys')
+    sharded = [_upload(get_next_file_path('Key')) for _ in range(3)]
+    legacy = _upload(os.path.join(UPLOADS_ROOT, '1.jpg'))
+    for path in sharded + [legacy]:
+        add_values_to_item('Key', path, False)
+    removed = []
+    remove = os.remove
+    monkeypatch.setattr(os, 'remove', lambda path: removed.append(path) or remove(path))
+
+    delete_item('Key')
+
+    assert [path for path in removed if path.startswith(UPLOADS_ROOT + os.sep)] == [legacy]
+    assert not any(os.path.exists(path) for path in sharded + [legacy])
@@ -0,0 +1,79 @@
+import asyncio
+import datetime
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from bot.database import Database
+from bot.database.methods import create_user, get_user_context, update_balance
+from bot.database.models import Permission
+from bot.utils.user_context import load_user_context, register_user
+
+NOW = datetime.datetime(2025, 7, 7, 12, 0)
+
+
+@contextmanager
+def count_queries():
+    """Count the statements sent to the database inside the block, from any thread."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(Database().engine, 'before_cursor_execute', capture)
+    try:
+        yield statements
+    finally:
+        event.remove(Database().engine, 'before_cursor_execute', capture)
+
+
+def test_user_context_is_one_query(db):
+    create_user(1, NOW, None)
+    update_balance(1, 40)
+
+    with count_queries() as statements:
+        row = get_user_context(1)
+
+    assert len(statements) == 1
+    assert (row.balance, row.permissions, row.purchases, row.basket) == (40, Permission.USE, 0, 0)
+
+
+def test_registration_is_one_upsert(db):
+    with count_queries() as statements:
+        create_user(1, NOW, None)
+    # the user upsert and the daily statistics upsert
+    assert len(statements) == 2
+
+    with count_queries() as statements:
+        create_user(1, NOW, None)
+    assert len(statements) == 1
+
+
+def test_queries_per_update(db):
+    async def start(user_id: int) -> tuple[list, object]:
+        # what the middleware does for /start in a private chat
+        with count_queries() as statements:
+            await register_user(user_id, '')
+            context = await load_user_context(user_id)
+        return statements, context
+
+    async def other_update(user_id: int) -> tuple[list, object]:
+        with count_queries() as statements:
+            context = await load_user_context(user_id)
+        return statements, context
+
+    statements, context = asyncio.run(start(7))
+    # the user upsert, the daily statistics upsert and the context
+    assert len(statements) == 3
+    assert context.registered
+
+    statements, context = asyncio.run(start(7))
+    assert len(statements) == 2
+
+    statements, context = asyncio.run(other_update(7))
+    assert len(statements) == 1
+    assert (context.permissions, context.balance, context.basket) == (Permission.USE, 0, 0)
+
+    statements, context = asyncio.run(other_update(8))
+    assert len(statements) == 1
+    assert not context.registered